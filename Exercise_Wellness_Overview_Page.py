@@ -1,10 +1,23 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-from googleapiclient.discovery import build
-from google.oauth2.service_account import Credentials
 from datetime import datetime, timedelta
-from streamlit_date_picker import date_range_picker, date_picker, PickerType
+from tracker.analytics import activity_totals
+from tracker.ingest import load_responses
+from tracker.lazy import LazyModule
+from tracker.page_data import PageData
+from tracker.query import load_rollup_index
+from tracker.schema import EXERCISE_TYPES
+from tracker.rollup import sessions_for
+from tracker.streaks import ALL, load_streak_table
+from tracker.summary import lookup as lookup_summary
+from tracker.debug_panel import show_rerun_timings
+from tracker.timing import start_rerun
+
+# The date pickers are only imported when one is enabled in the sidebar
+date_picker = LazyModule("streamlit_date_picker")
+
+# Time this rerun's stages for the debug panel and metrics (tracker/timing.py)
+start_rerun("Overview")
 
 # --------- Streamlit Layout -----------
 
@@ -38,78 +51,37 @@ st.markdown(
 )
 
 
-# Authenticate with the Google Sheets API
-SCOPES = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
-credentials = Credentials.from_service_account_info(st.secrets["gcp_service_account"], scopes=SCOPES)
-
-# Build the API service
-service = build('sheets', 'v4', credentials=credentials)
-
-# Fetch data from specific worksheets in the Google Sheet
-SPREADSHEET_ID = "1dgjmSBRlBNNjQMQkj1jaFS6ml_uOTh0Gec5X1WsgCao"
-
-# Function to fetch data from a specific sheet
-def fetch_data(sheet_name, range_name):
-    result = service.spreadsheets().values().get(spreadsheetId=SPREADSHEET_ID, range=f"{sheet_name}!{range_name}").execute()
-    data = result.get('values', [])
-    if data:
-        header = data[0]
-        # Ensures each row has the same number
-        # of elements as the header by appending None values for any missing columns.
-        rows = [row + [None] * (len(header) - len(row)) for row in data[1:]]
-        return pd.DataFrame(rows, columns=header)
-    else:
-        return pd.DataFrame()  # Return an empty DataFrame if no data
+# Sheets (and columns) this page reads; each is fetched on first use only
+page_data = PageData(
+    raw_form=("Raw_Form_Responses", "A1:R"),  # Only for the raw data view
+    users=("App_Users", ["User"]),
+    quotes=("Inspirational_Quotes", "A1:C"),
+    regime=("Regime", ["Day of Week", "Type"]),
+)
 
-# Read data for Raw Form Responses
-raw_form_df = fetch_data("Raw_Form_Responses", "A1:R1000")
-filtered_df = raw_form_df.copy()
+# Read the sheets needed on every run in one round trip
+user_df, inspirational_quotes_df, regime_df = page_data.load("users", "quotes", "regime")
 
 # Read data for users
-user_df = fetch_data("App_Users", "A1:B1000")  # Adjust range as needed
 filtered_user_df = user_df.copy()
 
 # Read data for Inspirational Quotes
-inspirational_quotes_df = fetch_data("Inspirational_Quotes", "A1:C100")
 filtered_inspirational_quotes_df = inspirational_quotes_df.copy()
 
 # Read data for Regime
-regime_df = fetch_data("Regime", "A1:D100")
 filtered_regime_df = regime_df.copy()
 
 # STREAMLIT SECTION
 
 # ------------ Data Preparation ---------------
 
-# Convert Timestamp to day first datetime type
-filtered_df['Timestamp'] = pd.to_datetime(filtered_df['Timestamp'], dayfirst=True)
-
-if all(isinstance(val, pd.Timestamp) for val in filtered_df['Timestamp']):
-    print("All values are datetime")
-else:
-    print("Not all values are datetime")
-
-
-# Set Duration as numeric
-filtered_df['Duration'] = pd.to_numeric(filtered_df['Duration'], errors="coerce")
-
-# Set Distance as numeric
-filtered_df = filtered_df.rename(columns={'Optional: Distance (miles)': 'Distance in Miles'})
-filtered_df['Distance in Miles'] = pd.to_numeric(filtered_df['Distance in Miles'], errors="coerce")
-
-# Set number of reps as numeric
-filtered_df = filtered_df.rename(columns={'Optional: Strength: Reps': 'Reps'})
-filtered_df['Reps'] = pd.to_numeric(filtered_df['Reps'], errors="coerce")
+# Daily rollup of the responses (sessions, duration, distance, reps and intensity
+# per user, exercise type and day), indexed by date once per data version. Every
+# figure on this page is read from it.
+rollup_index = load_rollup_index()
 
 # Set exercise types
-all_exercise_types = [
-    "Cycling",
-    "Strength",
-    "Yoga",
-    "Running",
-    "Meditation",
-    "Hiking",
-]
+all_exercise_types = list(EXERCISE_TYPES)
 
 # Inspiration Quote
 
@@ -154,13 +126,12 @@ with st.container():
             index=0
         )
 
-        # Filter DataFrame by Exercise Type
-        if exercise_type_filter != "All Exercise Types":
-            filtered_df = filtered_df[filtered_df["Exercise Type"] == exercise_type_filter]
+        # Exercise Type to filter by (None for all)
+        selected_exercise_type = None if exercise_type_filter == "All Exercise Types" else exercise_type_filter
 
     # User Filter in the Right Column
     with right_column:
-        dynamic_users = filtered_user_df.iloc[:, 1].unique()
+        dynamic_users = filtered_user_df["User"].unique()
         app_users_plus_all = ["All app users"] + list(dynamic_users)
 
         app_user_filter = st.multiselect(
@@ -169,21 +140,20 @@ with st.container():
             default="All app users"
         )
 
-        # Filter DataFrame by Users
+        # Users to filter by (None for all)
         if "All app users" in app_user_filter:
             # If "All App Users" is selected, show all data
-            filtered_df = filtered_df
+            selected_users = None
         else:
             # Filter for specific users
-            filtered_df = filtered_df[filtered_df["User"].isin(app_user_filter)]
+            selected_users = app_user_filter
 
 
 
 # Date Range Picker and week filter
 
-# Create Week and Year columns for filtering
-filtered_df["Year"] = filtered_df["Timestamp"].dt.isocalendar().year
-filtered_df["Week"] = filtered_df["Timestamp"].dt.isocalendar().week
+# (start, end) days selected by the week and month pickers
+date_ranges = []
 
 # Add a toggle to enable or disable the week picker
 use_week_picker = st.sidebar.checkbox("Enable Week Picker", value=False, key="week_picker_toggle")
@@ -198,8 +168,8 @@ if use_week_picker:
     ]
 
     # Week picker with default range
-    date_range_string = date_range_picker(
-        picker_type=PickerType.week,
+    date_range_string = date_picker.date_range_picker(
+        picker_type=date_picker.PickerType.week,
         start=default_start,
         end=default_end,
         key='week_range_picker',
@@ -215,8 +185,9 @@ if use_week_picker:
 
         st.write(f"Selected Year: {year}, Week: {week_number}")
 
-        # Filter dataframe by the selected week
-        filtered_df = filtered_df[(filtered_df["Year"] == year) & (filtered_df["Week"] == week_number)]
+        # Filter by the selected ISO week, Monday to Sunday
+        week_start = datetime.fromisocalendar(year, week_number, 1)
+        date_ranges.append((week_start, week_start + timedelta(days=6)))
     else:
         st.write("No valid range selected. Showing all data.")
 else:
@@ -244,8 +215,8 @@ if use_month_picker:
     ]
 
     # Month picker with default range
-    date_range_string = date_range_picker(
-        picker_type=PickerType.month,
+    date_range_string = date_picker.date_range_picker(
+        picker_type=date_picker.PickerType.month,
         start=default_start,
         end=default_end,
         key='month_range_picker',
@@ -268,21 +239,15 @@ if use_month_picker:
         # Display the formatted date range
         st.write(f"Selected Month Range: {start.strftime('%Y-%m')} to {end.strftime('%Y-%m')}")
 
-        # Ensure your dataframe has datetime-compatible dates
-        if "Timestamp" in filtered_df.columns:
-            filtered_df["Timestamp"] = pd.to_datetime(filtered_df["Timestamp"])
-
-        # Filter dataframe by the selected month range
-        filtered_df = filtered_df[
-            (filtered_df["Timestamp"] >= start) &
-            (filtered_df["Timestamp"] <= end)
-            ]
+        # Filter by the selected month range (whole days, so the last day is included)
+        date_ranges.append((start, end))
     else:
         st.write("No valid range selected. Showing all data.")
 else:
     st.write("")
 
-# Filter the dataframe by exercise
+# Apply the exercise type, user and date filters in one indexed selection
+filtered_rollup = rollup_index.select(selected_exercise_type, selected_users, date_ranges)
 
 
 # ------ Visualisations --------------------------------------------
@@ -319,14 +284,34 @@ with left_column:
     )
 
 
+# Card figures.
+# A single user (or all users) without a date filter is one entry of the
+# activity summary, which is kept up to date as activities are logged; other
+# selections add up the filtered rollup and run the streak engine over its days.
+streak_exercise = ALL if exercise_type_filter == "All Exercise Types" else exercise_type_filter
+if not date_ranges and (len(app_user_filter) == 1 or "All app users" in app_user_filter):
+    summary_user = ALL if "All app users" in app_user_filter else app_user_filter[0]
+    totals = lookup_summary(summary_user, streak_exercise)
+else:
+    totals = activity_totals(filtered_rollup)
+num_times_exercised = totals["sessions"]
+num_minutes_exercised = totals["minutes"]
+num_miles_travelled = totals["miles"]
+num_reps_completed = totals["reps"]
+current_streak, longest_streak = totals["current_streak"], totals["longest_streak"]
+num_hours_exercised = round(num_minutes_exercised/60, 1)
+
+
+# Show whole totals without a trailing ".0"
+def format_total(value):
+    return int(value) if float(value).is_integer() else round(float(value), 1)
+
+
 # Create rows of cards using st.columns
 row1 = st.columns(2)
 row2 = st.columns(2)
 row3 = st.columns(2)
 
-# Count of number of times exercised
-num_times_exercised = len(filtered_df['Timestamp'])
-
 # Add 'num_times_exercised' to the first card
 with row1[0]:
     with st.container():
@@ -337,10 +322,6 @@ with row1[0]:
             unsafe_allow_html=True
         )
 
-# Number of hours exercised
-num_minutes_exercised = np.sum(filtered_df['Duration'])
-num_hours_exercised = round(num_minutes_exercised/60, 1)
-
 # Add 'num_hours_exercised' to card
 with row1[1]:
     with st.container():
@@ -355,15 +336,12 @@ with row1[1]:
             unsafe_allow_html=True
         )
 
-# Number of miles travelled
-num_miles_travelled = np.sum(filtered_df['Distance in Miles'])
-
 # Add 'num_hours_exercised' to card
 with row2[0]:
     with st.container():
         # Display the large font number
         st.markdown(
-            f"<h1 style='text-align: center; color: white;'>{num_miles_travelled} miles</h1>",
+            f"<h1 style='text-align: center; color: white;'>{format_total(num_miles_travelled)} miles</h1>",
             unsafe_allow_html=True
         )
         # Display the smaller subtitle underneath
@@ -372,15 +350,12 @@ with row2[0]:
             unsafe_allow_html=True
         )
 
-# Number of miles travelled
-num_reps_completed = np.sum(filtered_df['Reps'])
-
 # Add 'num_reps' to the card
 with row2[1]:
     with st.container():
         # Display the large font number
         st.markdown(
-            f"<h1 style='text-align: center; color: white;'>{num_reps_completed} reps</h1>",
+            f"<h1 style='text-align: center; color: white;'>{format_total(num_reps_completed)} reps</h1>",
             unsafe_allow_html=True
         )
         # Display the smaller subtitle underneath
@@ -389,48 +364,6 @@ with row2[1]:
             unsafe_allow_html=True
         )
 
-# Streak Tracker
-
-# Create list of all virtual dates
-virtual_dates_list_start_date = '2024-01-01'
-virtual_dates_list_end_date = datetime.today().date()
-full_virtual_date_range = pd.date_range(start=virtual_dates_list_start_date, end=virtual_dates_list_end_date)
-
-# Create Dataframe from list of virtual dates
-full_virtual_date_df = pd.DataFrame({'Virtual_Dates': full_virtual_date_range})
-full_virtual_date_df["Virtual_Dates"] = pd.to_datetime(full_virtual_date_df["Virtual_Dates"]).dt.date
-
-# Extract unique exercise dates from actual data
-filtered_df["Date"] = pd.to_datetime(filtered_df["Timestamp"]).dt.date
-unique_exercise_dates = set(filtered_df['Date'])
-
-# Mark each virtual date as active or inactive
-# Add a column 'Active' to indicate whether exercise occurred on each virtual date
-# (1 if the date is in exercise_dates, otherwise 0)
-full_virtual_date_df['Active'] = (
-    full_virtual_date_df['Virtual_Dates'].apply
-    (lambda x: 1 if x in unique_exercise_dates else 0))
-
-# Initialize variables to track the current streak and store all streak values
-
-current_streak = 0
-streaks = []
-
-# Iterate through the 'Active' column to calculate streaks
-
-for active in full_virtual_date_df['Active']:
-    if active == 1:
-        current_streak += 1
-    else:
-        current_streak = 0
-    streaks.append(current_streak)
-
-# Add the calculated streak values as a new columns in filtered and virtual dataframes
-full_virtual_date_df['Streak'] = streaks
-
-# Calculate longest streak
-longest_streak = full_virtual_date_df['Streak'].max()
-
 # Display 'card' for streaks
 with row3[0]:
     with st.container():
@@ -465,6 +398,16 @@ if current_streak == 0:
 else:
     st.write("")
 
+# Streaks by user for the selected exercise type, from the streak table that is
+# computed for every user and exercise type once per data version
+streak_table = load_streak_table()
+st.markdown("#### Streaks by User")
+user_streaks = streak_table[(streak_table["User"] != ALL) & (streak_table["Exercise Type"] == streak_exercise)]
+st.dataframe(
+    user_streaks[["User", "Current Streak", "Longest Streak"]].sort_values("Current Streak", ascending=False),
+    hide_index=True,
+)
+
 # Ensure this doesn't interfere with other layouts
 # Any additional content should go below the card section
 st.markdown("---")
@@ -480,9 +423,13 @@ st.markdown("---")
 # Display the dataframe
 if st.sidebar.checkbox("Show Filtered Data", value=False):
     st.markdown("### Filtered Data")
-    st.dataframe(filtered_df)
+    st.dataframe(sessions_for(load_responses(), filtered_rollup))
 
 # Display raw data
 if st.sidebar.checkbox("Show Raw Data", value=False):
     st.markdown("### Raw Data")
-    st.dataframe(raw_form_df)
+    st.dataframe(page_data.raw_form)
+
+
+# Rerun timings in the sidebar when the debug panel is on
+show_rerun_timings()
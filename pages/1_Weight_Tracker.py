@@ -1,10 +1,27 @@
 import streamlit as st
 import pandas as pd
-from googleapiclient.discovery import build
-from google.oauth2.service_account import Credentials
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from tracker.analytics import weight_table
+from tracker.config import HIGH_VOLUME_ROWS, WEIGHT_CHART_POINTS
+from tracker.data import append_data
+from tracker.downsample import downsample_lines
+from tracker.figures import cached_figure, user_colors
+from tracker.ingest import load_weights_versioned
+from tracker.journal import clear_submission_id, form_submission_id
+from tracker.lazy import LazyModule
+from tracker.page_data import PageData
+from tracker.targets import load_target_index, set_target
+from tracker.trend import load_weight_trends, project_targets
+from tracker.debug_panel import show_rerun_timings
+from tracker.timing import span, start_rerun
+
+# Plotly is only imported when the chart is built (a cached figure and the
+# weight and target forms don't need it)
+go = LazyModule("plotly.graph_objects")
+px = LazyModule("plotly.express")
+
+# Time this rerun's stages for the debug panel and metrics (tracker/timing.py)
+start_rerun("Weight Tracker")
 
 # App Prep
 
@@ -21,78 +38,19 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-# Authenticate with the Google Sheets API
-SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
-credentials = Credentials.from_service_account_info(st.secrets["gcp_service_account"], scopes=SCOPES)
-
-# Build the API service
-service = build('sheets', 'v4', credentials=credentials)
-
-# Fetch data from specific worksheets in the Google Sheet
-SPREADSHEET_ID = "1dgjmSBRlBNNjQMQkj1jaFS6ml_uOTh0Gec5X1WsgCao"
-
-
-# Function to fetch data from a specific sheet
-def fetch_data(
-
-        sheet_name, range_name):
-    result = service.spreadsheets().values().get(spreadsheetId=SPREADSHEET_ID,
-                                                 range=f"{sheet_name}!{range_name}").execute()
-    data = result.get('values', [])
-    if data:
-        header = data[0]
-        rows = [row + [None] * (len(header) - len(row)) for row in data[1:]]  # Normalize row lengths
-        return pd.DataFrame(rows, columns=header)
-    else:
-        return pd.DataFrame()  # Return an empty DataFrame if no data
-
-
-def append_data(sheet_name, values):
-    body = {
-        "values": [values]
-    }
-    result = service.spreadsheets().values().append(
-        spreadsheetId=SPREADSHEET_ID,
-        range=sheet_name,
-        valueInputOption="RAW",
-        body=body
-    ).execute()
-    return result
-
-
-# Read data for Weight Tracker
-weight_data_df = fetch_data("Weight_Tracker", "A1:D1000")  # Adjust range as needed
-
-# Read data for users
-user_df = fetch_data("App_Users", "A1:B1000")  # Adjust range as needed
+# Sheets (and columns) this page reads besides the typed weight log; each is fetched on first use only
+page_data = PageData(users=("App_Users", ["User"]))
 
 # Data Preparation Section
-filtered_weight_data = weight_data_df.copy()
 
-# Convert Timestamp to datetime and create Date column
-filtered_weight_data["Timestamp"] = pd.to_datetime(
-    filtered_weight_data["Timestamp"], errors="coerce"
-)
-filtered_weight_data["Date"] = filtered_weight_data["Timestamp"].dt.date
-
-# Convert Current Weight to numeric
-filtered_weight_data["Current Weight"] = pd.to_numeric(
-    filtered_weight_data["Current Weight"], errors="coerce"
-)
-
-# Reorganize columns: Date to front, Timestamp to back
-filtered_weight_data = filtered_weight_data[
-    ['Date'] + [col for col in filtered_weight_data.columns if col != 'Date']
-]
-filtered_weight_data = filtered_weight_data[
-    [col for col in filtered_weight_data.columns if col != 'Timestamp'] + ['Timestamp']
-]
+# Typed weight log (datetime64 timestamps, float32 weights, categorical users), parsed once per data version
+weights_df, weights_version = load_weights_versioned()
 
 # Display the filtered data in Streamlit
 st.subheader("Weight Tracker Data")
 
 # User Filter
-dynamic_users = user_df.iloc[:, 1].unique()
+dynamic_users = page_data.users["User"].unique()
 
 app_users_plus_all = ["All app users"] + list(dynamic_users)
 
@@ -103,16 +61,9 @@ app_user_filter = st.multiselect(
     key="User Filter"
 )
 
-# Filter DataFrame by Users
-if "All app users" in app_user_filter:
-    # If "All App Users" is selected, show all data
-    filtered_weight_data = filtered_weight_data
-else:
-    # Filter for specific users
-    filtered_weight_data = filtered_weight_data[filtered_weight_data["User"].isin(app_user_filter)]
-
-# Sort weight data by timestamp
-filtered_weight_data = filtered_weight_data.sort_values('Timestamp')
+# Weight log of the selected users (all of them for "All app users"), with a Date
+# column in front and the timestamp last, sorted by timestamp
+filtered_weight_data = weight_table(weights_df, None if "All app users" in app_user_filter else app_user_filter)
 
 # Current weight input
 
@@ -164,10 +115,20 @@ if current_weight_checkbox:
                     current_user[0] if current_user else "",  # Assuming single selection
                 ]
 
+                # The same weight for the same user submitted again within a few seconds
+                # reuses its submission ID, so a double-click logs it once
+                submission_id = form_submission_id(
+                    st.session_state, "weight_submission", [datetime.today().date()] + values[1:]
+                )
+
                 # Try to save the data
                 try:
-                    append_data("Weight_Tracker", values)  # Replace "Weight_Tracker" with your sheet name
-                    st.success("Data saved successfully!")
+                    if append_data("Weight_Tracker", values, submission_id):  # Replace "Weight_Tracker" with your sheet name
+                        st.success("Saved! It will show up in the charts within a few seconds.")
+                    else:
+                        # The next click logs it as a new weigh-in
+                        clear_submission_id(st.session_state, "weight_submission")
+                        st.warning("This weight was already logged a moment ago. Click again to log it as another weigh-in.")
                 except Exception as e:
                     st.error(f"Failed to save data: {e}")
             else:
@@ -212,20 +173,17 @@ if target_weight_checkbox:
         # Submit button centered below both columns
         if st.button("Log your target weight."):
             # Validate required fields
-            if current_user and current_weight_input and target_date:
-                # Collect data for all columns
-                values = [
-                    datetime.now().strftime("%d/%m/%Y %H:%M:%S"),  # Timestamp
-                    current_user[0] if current_user else "",  # Assuming single selection
-                    target_weight_input,
-                    target_date.strftime("%d/%m/%Y %H:%M:%S"),
-
-                ]
-
-                # Try to save the data
+            if current_user and target_weight_input and target_date:
+                # Try to save the data; the new target replaces the user's previous one
+                submission_id = form_submission_id(
+                    st.session_state, "target_submission", [current_user[0], target_weight_input, target_date]
+                )
                 try:
-                    append_data("Weight_Tracker", values)  # Replace "Weight_Tracker" with your sheet name
-                    st.success("Data saved successfully!")
+                    if set_target(current_user[0], target_weight_input, target_date, submission_id):  # Assuming single selection
+                        st.success("Saved! It will show up in the charts within a few seconds.")
+                    else:
+                        clear_submission_id(st.session_state, "target_submission")
+                        st.warning("This target was already logged a moment ago. Click again to log it again.")
                 except Exception as e:
                     st.error(f"Failed to save data: {e}")
             else:
@@ -233,87 +191,172 @@ if target_weight_checkbox:
 
 
 
-# Calculate start and end dates for the trend line
-regime_start_date = datetime(2025, 1, 1)
-regime_end_date = regime_start_date + timedelta(days=6 * 30)  # Approx 6 months
-
-# Define the trend line data (80kg - 70kg)
-weight_trend_line_data = {
-    'Date': [regime_start_date, regime_end_date],
-    'Weight': [80, 70],
-}
-
-# Calculate the dynamic y-axis (min weight)
-min_weight = min(filtered_weight_data['Current Weight'])
-y_axis_min = min(68, min_weight - 2)
-
-# Create Line Graph
-weight_Line_fig = px.line(
-    filtered_weight_data,
-    x='Date',
-    y='Current Weight',
-    title='Weight Tracker',
-    markers=False,
-    color='User'
-)
-
-# Add the trend line
-weight_Line_fig.add_trace(
-    go.Scatter(
-        x=weight_trend_line_data['Date'],
-        y=weight_trend_line_data['Weight'],
-        mode='lines',
-        name='Trend Line',
-        line=dict(color='orange', dash='dot'),
-        showlegend=False,  # Hide from legend
+# Users in colour order, so each keeps a stable colour: App_Users order first,
+# then anyone else in the log (the colours are picked when the chart is built)
+charted_users = set(filtered_weight_data["User"].dropna())
+colour_order = list(dynamic_users) + sorted(set(weights_df["User"].dropna()) - set(dynamic_users))
+
+# Each user's latest target weight and target date from the Weight_Targets sheet
+target_index, targets_version = load_target_index()
+user_target_weights = {user: target for user, (_, target, _) in target_index.items()}
+
+# Smoothed weight, rate of change and projected target date for every user,
+# computed once per data version
+smoothed_weights, weight_trends, _ = load_weight_trends()
+weight_projections = project_targets(weight_trends, user_target_weights)
+
+# High-volume mode for long weight logs: the lines are drawn with WebGL traces and
+# downsampled to WEIGHT_CHART_POINTS points per user (LTTB keeps the peaks and
+# troughs). Narrowing the chart window re-downsamples just that window, so a
+# short enough window is drawn at full resolution.
+high_volume = len(filtered_weight_data) > HIGH_VOLUME_ROWS
+chart_window = None
+if high_volume:
+    first_date, last_date = filtered_weight_data["Date"].min(), filtered_weight_data["Date"].max()
+    if first_date < last_date:
+        chart_window = st.slider(
+            "Chart window",
+            min_value=first_date,
+            max_value=last_date,
+            value=(first_date, last_date),
+            key="weight_chart_window",
+        )
+    st.caption(f"High-volume mode: showing up to {WEIGHT_CHART_POINTS} points per user in the chart window.")
+
+
+# Downsampled WebGL line per user for high-volume mode
+def build_high_volume_lines(weight_user_colors):
+    chart_data = filtered_weight_data
+    if chart_window is not None:
+        chart_data = chart_data[chart_data["Date"].between(*chart_window)]
+    chart_data = downsample_lines(chart_data, "Timestamp", "Current Weight", "User", WEIGHT_CHART_POINTS)
+    weight_Line_fig = go.Figure()
+    user_rows_by_user = dict(tuple(chart_data.groupby("User", observed=True)))
+    # Legend in the same user order as the colours, whatever the window holds
+    for user in weight_user_colors:
+        if user not in user_rows_by_user:
+            continue
+        user_rows = user_rows_by_user[user]
+        weight_Line_fig.add_trace(
+            go.Scattergl(
+                x=user_rows["Timestamp"],
+                y=user_rows["Current Weight"],
+                mode='lines',
+                name=user,
+                line=dict(color=weight_user_colors.get(user)),
+            )
+        )
+    weight_Line_fig.update_layout(
+        title='Weight Tracker',
+        xaxis_title='Date',
+        yaxis_title='Current Weight',
+        legend_title_text='User',
     )
-)
-
-# Set y-axis with a dynamic range
-weight_Line_fig.update_layout(
-    yaxis=dict(range=[y_axis_min, None])
-)
+    return weight_Line_fig
 
-# Set user target weights
-user_target_weights = {
-    "Tom C": 72,
-    "Pete C": 85,
-    "Saffi": 53,
-    "Maximus": 100,
 
-}
+# Build the weight chart; only called when the data or the user filter changed
+def build_weight_chart():
+    weight_user_colors = user_colors(colour_order)
 
-# Extract color mapping from the chart
-# This gets the assigned colors for each user
-user_colors = {trace['name']: trace['line']['color'] for trace in weight_Line_fig.to_dict()['data']}
+    # Calculate the dynamic y-axis (min weight)
+    min_weight = min(filtered_weight_data['Current Weight'])
+    y_axis_min = min(68, min_weight - 2)
 
-# Add target lines for users
-if "All app users" in app_user_filter:
-    # Add target lines for all users
-    for user, target_weight in user_target_weights.items():
-        if user in user_colors:  # Check if the user has a color in the chart
-            weight_Line_fig.add_hline(
-                y=target_weight,
-                line_color=user_colors[user],  # Match the user's line color
-                line_dash="dash",
-                annotation_text=f"{user} Target: {target_weight} kg",
-                annotation_position="top left"
+    # Create Line Graph
+    if high_volume:
+        weight_Line_fig = build_high_volume_lines(weight_user_colors)
+    else:
+        weight_Line_fig = px.line(
+            filtered_weight_data,
+            x='Date',
+            y='Current Weight',
+            title='Weight Tracker',
+            markers=False,
+            color='User',
+            color_discrete_map=weight_user_colors,
+        )
+
+    # Add each charted user's smoothed trend line (windowed and downsampled like the weights in high-volume mode)
+    trend_data = smoothed_weights[smoothed_weights["User"].isin(charted_users)]
+    trend_trace = go.Scatter
+    if high_volume:
+        if chart_window is not None:
+            trend_dates = trend_data["Timestamp"].dt.date
+            trend_data = trend_data[(trend_dates >= chart_window[0]) & (trend_dates <= chart_window[1])]
+        trend_data = downsample_lines(trend_data, "Timestamp", "Smoothed Weight", "User", WEIGHT_CHART_POINTS)
+        trend_trace = go.Scattergl
+    user_trends = dict(tuple(trend_data.groupby("User", sort=False)))
+    for user in weight_user_colors:
+        if user not in user_trends:
+            continue
+        user_trend = user_trends[user]
+        weight_Line_fig.add_trace(
+            trend_trace(
+                x=user_trend["Timestamp"],
+                y=user_trend["Smoothed Weight"],
+                mode='lines',
+                name=f'{user} Trend',
+                line=dict(color=weight_user_colors.get(user), dash='dot'),
+                showlegend=False,  # Hide from legend
+            )
+        )
+
+        # Extend the trend to the projected date the user reaches their target
+        if user in weight_projections.index and pd.notna(weight_projections.loc[user, "Projected Date"]):
+            projection = weight_projections.loc[user]
+            weight_Line_fig.add_trace(
+                go.Scatter(
+                    x=[projection["Last Weigh-in"], projection["Projected Date"]],
+                    y=[projection["Smoothed Weight"], projection["Target Weight"]],
+                    mode='lines',
+                    name=f'{user} Projection',
+                    line=dict(color=weight_user_colors.get(user), dash='dot', width=1),
+                    showlegend=False,  # Hide from legend
+                )
             )
-else:
-    # Add target lines only for selected users
-    for user in app_user_filter:
-        if user in user_target_weights and user in user_colors:
-            target_weight = user_target_weights[user]
+
+    # Set y-axis with a dynamic range
+    weight_Line_fig.update_layout(
+        yaxis=dict(range=[y_axis_min, None])
+    )
+
+    # Add target lines for users
+    if "All app users" in app_user_filter:
+        # Add target lines for all users
+        target_users = list(user_target_weights)
+    else:
+        # Add target lines only for selected users
+        target_users = [user for user in app_user_filter if user in user_target_weights]
+    for user in target_users:
+        if user in charted_users:  # Check if the user has a line in the chart
+            _, target_weight, target_date = target_index[user]
+            target_label = f"{user} Target: {target_weight:g} kg"
+            if target_date is not None:
+                target_label += f" by {target_date:%d %b %Y}"
+            if user in weight_projections.index and pd.notna(weight_projections.loc[user, "Projected Date"]):
+                target_label += f" (projected {weight_projections.loc[user, 'Projected Date']:%d %b %Y})"
             weight_Line_fig.add_hline(
                 y=target_weight,
-                line_color=user_colors[user],  # Match the user's line color
+                line_color=weight_user_colors[user],  # Match the user's line color
                 line_dash="dash",
-                annotation_text=f"{user} Target: {target_weight} kg",
+                annotation_text=target_label,
                 annotation_position="top left"
             )
+    return weight_Line_fig
+
+
+# Served from the figure cache while the weight log and the selection are unchanged
+weight_Line_fig = cached_figure(
+    "weight_line",
+    (weights_version, targets_version),
+    (tuple(app_user_filter), tuple(dynamic_users), high_volume, chart_window),
+    build_weight_chart,
+)
 
 # Display the line chart
-st.plotly_chart(weight_Line_fig)
+with span("plotly_chart"):
+    st.plotly_chart(weight_Line_fig)
 
 # Display (toggle) filtered weight data
 use_filtered_weight_data = st.checkbox(
@@ -325,3 +368,7 @@ if use_filtered_weight_data:
 
 # Embed Arnie Image
 st.image("https://www.trainmag.com/wp-content/uploads/2017/08/Arnold-Schwarzenegger-Now-Hero.jpg")
+
+
+# Rerun timings in the sidebar when the debug panel is on
+show_rerun_timings()
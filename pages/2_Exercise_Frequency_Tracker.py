@@ -1,11 +1,27 @@
 import streamlit as st
 import pandas as pd
-from googleapiclient.discovery import build
-from google.oauth2.service_account import Credentials
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from streamlit_date_picker import date_range_picker, date_picker, PickerType
+from tracker.analytics import active_week_labels, exercise_type_counts, time_of_day_counts
+from tracker.ingest import load_responses
+from tracker.page_data import PageData
+from tracker.figures import cached_figure
+from tracker.dimensions import DAY_NAMES
+from tracker.heatmap import weekday_matrix
+from tracker.lazy import LazyModule
+from tracker.query import load_rollup_index
+from tracker.schema import EXERCISE_TYPES
+from tracker.rollup import sessions_for
+from tracker.debug_panel import show_rerun_timings
+from tracker.timing import span, start_rerun
+
+# Imported on first use: the date pickers only when one is enabled in the
+# sidebar, plotly only when a chart is built (not for cached figures)
+date_picker = LazyModule("streamlit_date_picker")
+go = LazyModule("plotly.graph_objects")
+px = LazyModule("plotly.express")
+
+# Time this rerun's stages for the debug panel and metrics (tracker/timing.py)
+start_rerun("Exercise Frequency Tracker")
 
 # --------- Streamlit Layout -----------
 
@@ -22,76 +38,20 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-# Authenticate with the Google Sheets API
-SCOPES = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
-credentials = Credentials.from_service_account_info(st.secrets["gcp_service_account"], scopes=SCOPES)
-
-# Build the API service
-service = build('sheets', 'v4', credentials=credentials)
-
-# Fetch data from specific worksheets in the Google Sheet
-SPREADSHEET_ID = "1dgjmSBRlBNNjQMQkj1jaFS6ml_uOTh0Gec5X1WsgCao"
-
-# Function to fetch data from a specific sheet
-def fetch_data(sheet_name, range_name):
-    result = service.spreadsheets().values().get(spreadsheetId=SPREADSHEET_ID, range=f"{sheet_name}!{range_name}").execute()
-    data = result.get('values', [])
-    if data:
-        header = data[0]
-        rows = [row + [None] * (len(header) - len(row)) for row in data[1:]]  # Normalize row lengths
-        return pd.DataFrame(rows, columns=header)
-    else:
-        return pd.DataFrame()  # Return an empty DataFrame if no data
-
-# Read data for Raw Form Responses
-raw_form_df = fetch_data("Raw_Form_Responses", "A1:R1000")  # Adjust range as needed
-
-# Read data for Inspirational Quotes (optional)
-inspirational_quotes_df = fetch_data("Inspirational_Quotes", "A1:C100")  # Adjust range as needed
-
-# Initialize filtered DataFrame for Raw Form Responses
-filtered_df = raw_form_df.copy()
+# Sheets this page reads; the raw responses are only fetched for the raw data view
+page_data = PageData(raw_form=("Raw_Form_Responses", "A1:R"))
 
 # STREAMLIT SECTION
 
-# Data Preparation: Example for converting and renaming columns
-filtered_df["Timestamp"] = pd.to_datetime(filtered_df["Timestamp"], dayfirst=True, errors="coerce")
-filtered_df["Duration"] = pd.to_numeric(filtered_df["Duration"], errors="coerce")
-filtered_df.rename(columns={"Optional: Distance (miles)": "Distance in Miles"}, inplace=True)
-filtered_df["Distance in Miles"] = pd.to_numeric(filtered_df["Distance in Miles"], errors="coerce")
-
 # ------------ Data Preparation ---------------
 
-# Convert Timestamp to day first datetime type
-filtered_df['Timestamp'] = pd.to_datetime(filtered_df['Timestamp'], dayfirst=True)
-
-if all(isinstance(val, pd.Timestamp) for val in filtered_df['Timestamp']):
-    print("All values are datetime")
-else:
-    print("Not all values are datetime")
-
-
-# Set Duration as numeric
-filtered_df['Duration'] = pd.to_numeric(filtered_df['Duration'], errors="coerce")
-
-# Set Distance as numbric
-filtered_df = filtered_df.rename(columns={'Optional: Distance (miles)': 'Distance in Miles'})
-filtered_df['Distance in Miles'] = pd.to_numeric(filtered_df['Distance in Miles'], errors="coerce")
-
-# Set number of reps as numeric
-filtered_df = filtered_df.rename(columns={'Optional: Strength: Reps': 'Reps'})
-filtered_df['Reps'] = pd.to_numeric(filtered_df['Reps'], errors="coerce")
+# Daily rollup of the responses shared with the overview page, indexed by date
+# once per data version; the charts below count sessions from it
+rollup_index = load_rollup_index()
 
 
 # Set exercise types
-all_exercise_types = [
-    "Cycling",
-    "Strength",
-    "Yoga",
-    "Running",
-    "Meditation",
-    "Hiking",
-]
+all_exercise_types = list(EXERCISE_TYPES)
 
 
 
@@ -100,9 +60,8 @@ all_exercise_types = [
 
 # Date Range Picker and week filter
 
-# Create Week and Year columns for filtering
-filtered_df["Year"] = filtered_df["Timestamp"].dt.isocalendar().year
-filtered_df["Week"] = filtered_df["Timestamp"].dt.isocalendar().week
+# (start, end) days selected by the week and month pickers
+date_ranges = []
 
 # Add a toggle to enable or disable the week picker
 use_week_picker = st.sidebar.checkbox("Enable Week Picker", value=False, key="week_picker_toggle")
@@ -117,8 +76,8 @@ if use_week_picker:
     ]
 
     # Week picker with default range
-    date_range_string = date_range_picker(
-        picker_type=PickerType.week,
+    date_range_string = date_picker.date_range_picker(
+        picker_type=date_picker.PickerType.week,
         start=default_start,
         end=default_end,
         key='week_range_picker',
@@ -134,8 +93,9 @@ if use_week_picker:
 
         st.write(f"Selected Year: {year}, Week: {week_number}")
 
-        # Filter dataframe by the selected week
-        filtered_df = filtered_df[(filtered_df["Year"] == year) & (filtered_df["Week"] == week_number)]
+        # Filter by the selected ISO week, Monday to Sunday
+        week_start = datetime.fromisocalendar(year, week_number, 1)
+        date_ranges.append((week_start, week_start + timedelta(days=6)))
     else:
         st.write("No valid range selected. Showing all data.")
 else:
@@ -163,8 +123,8 @@ if use_month_picker:
     ]
 
     # Month picker with default range
-    date_range_string = date_range_picker(
-        picker_type=PickerType.month,
+    date_range_string = date_picker.date_range_picker(
+        picker_type=date_picker.PickerType.month,
         start=default_start,
         end=default_end,
         key='month_range_picker',
@@ -187,15 +147,8 @@ if use_month_picker:
         # Display the formatted date range
         st.write(f"Selected Month Range: {start.strftime('%Y-%m')} to {end.strftime('%Y-%m')}")
 
-        # Ensure your dataframe has datetime-compatible dates
-        if "Timestamp" in filtered_df.columns:
-            filtered_df["Timestamp"] = pd.to_datetime(filtered_df["Timestamp"])
-
-        # Filter dataframe by the selected month range
-        filtered_df = filtered_df[
-            (filtered_df["Timestamp"] >= start) &
-            (filtered_df["Timestamp"] <= end)
-            ]
+        # Filter by the selected month range (whole days, so the last day is included)
+        date_ranges.append((start, end))
 
 
     else:
@@ -206,167 +159,162 @@ else:
 # Display raw data
 if st.sidebar.checkbox("Show Raw Data", value=False):
     st.markdown("### Raw Data")
-    st.dataframe(df)
+    st.dataframe(page_data.raw_form)
 
-# Display the dataframe
-if st.sidebar.checkbox("Show Filtered Data", value=False):
-    st.markdown("### Filtered Data")
-    st.dataframe(filtered_df)
+# Display the dataframe once every filter has been applied
+show_filtered_data = st.sidebar.checkbox("Show Filtered Data", value=False)
 
 # Filter the dataframe by exercise
 
 # Add "All Exercise Types" to the filter options
 exercise_types = ["All Exercise Types"] + all_exercise_types
 exercise_type_filter = st.selectbox("Select the Exercise Type", exercise_types, index=0)
+selected_exercise_type = None if exercise_type_filter == "All Exercise Types" else exercise_type_filter
 
+# Apply the exercise type and date filters in one indexed selection
+filtered_rollup = rollup_index.select(selected_exercise_type, None, date_ranges)
 
-if exercise_type_filter != "All Exercise Types":
-    filtered_df = filtered_df[filtered_df["Exercise Type"] == exercise_type_filter]
+if show_filtered_data:
+    st.markdown("### Filtered Data")
+    st.dataframe(sessions_for(load_responses(), filtered_rollup))
 
 # Identify missing exercise types (those not in the dataframe)
-missing_exercises = set(all_exercise_types) - set(filtered_df["Exercise Type"])
+missing_exercises = set(all_exercise_types) - set(filtered_rollup["Exercise Type"])
 
 
 # Exercise Days Recent and Over Time
 
-# Convert datestamp to weekday, number, and year number
-filtered_df['Day of Week'] = filtered_df['Timestamp'].dt.day_name()
-filtered_df['Week Number'] = filtered_df['Timestamp'].dt.isocalendar().week
-filtered_df['Year'] = filtered_df['Timestamp'].dt.year
-
-# Group and count occurrences of each exercise type
-exercise_type_chart_data = filtered_df['Exercise Type'].value_counts().reset_index()
-exercise_type_chart_data.columns = ['Exercise Type', 'Count']
-
-# Create time of day bar chart
-exercise_type_bar = go.Figure(
-    data=[
-        go.Bar(
-            x=exercise_type_chart_data['Exercise Type'],  # Use the column for x-axis
-            y=exercise_type_chart_data['Count'],          # Use the column for y-axis
-            name="Exercise Type",
-            marker=dict(color='skyblue'),  # Customize bar color
+
+# Filter state every figure below depends on, next to the rollup's data version.
+# Figures are built only when these change and otherwise come from the figure cache.
+figure_filters = (selected_exercise_type, tuple(date_ranges))
+
+
+# Exercise type bar chart
+def build_exercise_type_bar():
+    # Count sessions of each exercise type, most frequent first
+    exercise_type_chart_data = exercise_type_counts(filtered_rollup)
+
+    # Create time of day bar chart
+    exercise_type_bar = go.Figure(
+        data=[
+            go.Bar(
+                x=exercise_type_chart_data['Exercise Type'],  # Use the column for x-axis
+                y=exercise_type_chart_data['Count'],          # Use the column for y-axis
+                name="Exercise Type",
+                marker=dict(color='skyblue'),  # Customize bar color
+            )
+        ],
+        layout=dict(
+            title="Exercise Sessions by Type",
+            bargap=0.2,          # Gap between bars
+            barcornerradius=15,  # Rounded corners for bars
         )
-    ],
-    layout=dict(
-        title="Exercise Sessions by Type",
-        bargap=0.2,          # Gap between bars
-        barcornerradius=15,  # Rounded corners for bars
     )
-)
+    return exercise_type_bar
+
+
+exercise_type_bar = cached_figure("exercise_type_bar", rollup_index.version, figure_filters, build_exercise_type_bar)
 
 # Display the chart in Streamlit
-st.plotly_chart(exercise_type_bar, use_container_width=True)
+with span("plotly_chart"):
+    st.plotly_chart(exercise_type_bar, use_container_width=True)
 
 # Heatmaps
 
 # Set number and layout of columns
 left_column, right_column = st.columns(2)
 
-# Ensure all days of the week are included, even if no exercise happens
-all_days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-heatmap_data = (
-    filtered_df.groupby(['Year', 'Week Number', 'Day of Week']).size()
-    .unstack(fill_value=0)  # Fill missing combinations with 0
-    .reindex(columns=all_days, fill_value=0)  # Ensure all days of the week are included
-)
+# Sessions per ISO week (rows) and day of week (columns, Monday first) in one dense
+# matrix, counted with a single bincount; both heatmaps are slices of it
+all_days = DAY_NAMES
+heatmap_counts, heatmap_week_starts = weekday_matrix(filtered_rollup["Date"], filtered_rollup["Sessions"])
 
+# Overall Heatmap in the Left Column
+def build_overall_heatmap():
+    overall_heatmap = pd.DataFrame([heatmap_counts.sum(axis=0)], index=["Total Count"], columns=all_days)
+    return px.imshow(
+        overall_heatmap,
+        labels={"x": "Day of Week", "y": " ", "color": "Total Exercises"},
+        title="Overall Exercise Frequency by Day of Week",
+        color_continuous_scale="Blues",
+        text_auto=True,
+    )
 
 
-# Overall Heatmap in the Left Column
-overall_heatmap = heatmap_data.sum(axis=0).to_frame(name="Total Count").T
-fig_overall = px.imshow(
-overall_heatmap,
-    labels={"x": "Day of Week", "y": " ", "color": "Total Exercises"},
-    title="Overall Exercise Frequency by Day of Week",
-    color_continuous_scale="Blues",
-    text_auto=True,
-)
-st.plotly_chart(fig_overall, use_container_width=True)
+fig_overall = cached_figure("overall_heatmap", rollup_index.version, figure_filters, build_overall_heatmap)
+with span("plotly_chart"):
+    st.plotly_chart(fig_overall, use_container_width=True)
 
-# Function to calculate week range using ISO calendar
-def calculate_week_range(year, week):
-    # Find the first day of the week
-    week_start = datetime.fromisocalendar(year, week, 1)  # ISO week starts on Monday
-    week_end = week_start + timedelta(days=6)  # Add 6 days to get Sunday
-    return week_start.date(), week_end.date()
+# Weeks with at least one session, as rows of the matrix, and their week range
+# labels, e.g. "Week 7 2025 [2025-02-10 - 2025-02-16]", from the calendar dimension
+heatmap_week_labels = active_week_labels(heatmap_counts, heatmap_week_starts)
 
 # Weekly Heatmap: Sidebar Selection
 selected_week_heatmap = st.sidebar.selectbox(
     "Select Week for Weekly Heatmap",
-    options=heatmap_data.index,  # Use the MultiIndex directly
-    format_func=lambda x: f"Week {x[1]} {x[0]} [{calculate_week_range(x[0], x[1])[0]} - {calculate_week_range(x[0], x[1])[1]}]",
+    options=list(heatmap_week_labels),  # Rows of the heatmap matrix
+    format_func=lambda week: heatmap_week_labels[week],
 )
 
-# Extract selected year and week
-selected_year, selected_week = selected_week_heatmap
-
 # Weekly Heatmap
-try:
-    weekly_data_heatmap = heatmap_data.loc[(selected_year, selected_week)].to_frame(name="Count").T
+def build_weekly_heatmap():
+    weekly_data_heatmap = pd.DataFrame([heatmap_counts[selected_week_heatmap]], index=["Count"], columns=all_days)
 
     # Title Text
-    weekly_heatmap_title_text = f"Week {selected_week} {selected_year} [{calculate_week_range(selected_year, selected_week)[0]} - {calculate_week_range(selected_year, selected_week)[1]}]"
+    weekly_heatmap_title_text = heatmap_week_labels[selected_week_heatmap]
 
     # Create the heatmap using Plotly
-    fig_weekly = px.imshow(
+    return px.imshow(
         weekly_data_heatmap,
         labels={"x": "Day of Week", "y": " ", "color": "Exercises"},
         title=weekly_heatmap_title_text,
         color_continuous_scale="blues",
         text_auto=True,
     )
-    st.plotly_chart(fig_weekly, use_container_width=True)
-except KeyError:
+
+
+if selected_week_heatmap is not None:
+    fig_weekly = cached_figure(
+        "weekly_heatmap", rollup_index.version, figure_filters + (selected_week_heatmap,), build_weekly_heatmap
+    )
+    with span("plotly_chart"):
+        st.plotly_chart(fig_weekly, use_container_width=True)
+else:
     st.error("The selected week's data is unavailable. Please select another week.")
 
 # Time of Day Exercised
 
-# Create dictionary of times of day
-time_of_day = {
-    "Morning": range(6, 12),   # 6 AM to 11:59 AM
-    "Afternoon": range(12, 17),  # 12 PM to 4:59 PM
-    "Evening": range(17, 21),   # 5 PM to 8:59 PM
-    "Night": range(21, 6),    # 9 PM to 5:59 AM (wraps around midnight)
-}
-
-# Function to classify time of day
-def classify_time_of_day(hour):
-    if 6 <= hour < 12:
-        return "Morning"
-    elif 12 <= hour < 17:
-        return "Afternoon"
-    elif 17 <= hour < 21:
-        return "Evening"
-    else:
-        return "Night"
-
-# Apply classification
-filtered_df['time_of_day'] = (
-    filtered_df['Timestamp'].dt.hour.apply(classify_time_of_day))
-
-# Count Occurrences
-time_of_day_counts = filtered_df['time_of_day'].value_counts()
-
-# Re-order times of day into logical sequence
-time_logical_order = ["Morning", "Afternoon", "Evening", "Night"]
-time_of_day_counts = time_of_day_counts.reindex(time_logical_order, fill_value=0) # Ensures the order and handles missing categories
-
-# Create time of day bar chart
-time_of_day_bar = go.Figure(
-    data=[
-        go.Bar(
-            x=time_of_day_counts.index,
-            y=time_of_day_counts.values,
-            name="Exercise Sessions",
-            marker=dict(color='skyblue'),  # You can customize the color
-        )
-    ],
-    layout=dict(
-        title="Exercise Sessions by Time of Day",
-        bargap=0.2,
-        barcornerradius=15,  # Adds rounded corners
+# Sessions are classified as Morning (6 AM to 11:59 AM), Afternoon (12 PM to 4:59 PM),
+# Evening (5 PM to 8:59 PM) or Night (9 PM to 5:59 AM) by the calendar dimension
+def build_time_of_day_bar():
+    # Count occurrences in the logical order of the times of day, with zeros for empty ones
+    session_counts = time_of_day_counts(filtered_rollup)
+
+    # Create time of day bar chart
+    time_of_day_bar = go.Figure(
+        data=[
+            go.Bar(
+                x=session_counts.index,
+                y=session_counts.values,
+                name="Exercise Sessions",
+                marker=dict(color='skyblue'),  # You can customize the color
+            )
+        ],
+        layout=dict(
+            title="Exercise Sessions by Time of Day",
+            bargap=0.2,
+            barcornerradius=15,  # Adds rounded corners
 
+        )
     )
-)
-st.plotly_chart(time_of_day_bar)
\ No newline at end of file
+    return time_of_day_bar
+
+
+time_of_day_bar = cached_figure("time_of_day_bar", rollup_index.version, figure_filters, build_time_of_day_bar)
+with span("plotly_chart"):
+    st.plotly_chart(time_of_day_bar)
+
+
+# Rerun timings in the sidebar when the debug panel is on
+show_rerun_timings()
@@ -1,8 +1,17 @@
 import streamlit as st
-import pandas as pd
-from googleapiclient.discovery import build
-from google.oauth2.service_account import Credentials
 from datetime import datetime
+from tracker.data import append_data, write_queue_stats
+from tracker.ingest import legacy_target_mask
+from tracker.journal import clear_submission_id, form_submission_id
+from tracker.page_data import PageData
+from tracker.schema import EXERCISE_TYPES, MOOD_OPTIONS, INTENSITY_SCORES, BODY_PARTS
+from tracker.debug_panel import show_rerun_timings
+from tracker.timing import start_rerun
+# Keeps the overview's activity summary up to date as rows are appended
+import tracker.summary
+
+# Time this rerun's stages for the debug panel and metrics (tracker/timing.py)
+start_rerun("Log Your Activity")
 
 # Page and data configuration
 st.set_page_config(page_title="Exercise and Wellness Tracker", layout="centered")
@@ -19,45 +28,23 @@ st.markdown(
 
 st.write("-----")
 
-# Authenticate with the Google Sheets API
-SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
-credentials = Credentials.from_service_account_info(st.secrets["gcp_service_account"], scopes=SCOPES)
-
-# Build the API service
-service = build('sheets', 'v4', credentials=credentials)
+# "Saved!" means the entry was queued; say so here if earlier entries haven't
+# reached the sheet yet, or were set aside after failing (they are sent again
+# with the next entry, and stay in the local journal until they are written)
+write_status = write_queue_stats()
+if write_status["failed"]:
+    st.warning(
+        f"Earlier entries couldn't be saved to the sheet yet ({write_status['failed']} waiting). "
+        "They are kept and will be sent again with the next entry."
+    )
+elif write_status["depth"]:
+    st.info(f"Earlier entries are still being saved to the sheet ({write_status['depth']} waiting).")
 
-SPREADSHEET_ID = "1dgjmSBRlBNNjQMQkj1jaFS6ml_uOTh0Gec5X1WsgCao"
-
-# Function to fetch data from a specific sheet
-def fetch_data(sheet_name, range_name):
-    result = service.spreadsheets().values().get(spreadsheetId=SPREADSHEET_ID, range=f"{sheet_name}!{range_name}").execute()
-    data = result.get('values', [])
-    if data:
-        header = data[0]
-        rows = [row + [None] * (len(header) - len(row)) for row in data[1:]]
-        return pd.DataFrame(rows, columns=header)
-    else:
-        return pd.DataFrame()
-
-# Function to append data to a sheet
-def append_data(sheet_name, values):
-    body = {"values": [values]}
-    result = service.spreadsheets().values().append(
-        spreadsheetId=SPREADSHEET_ID,
-        range=sheet_name,
-        valueInputOption="RAW",
-        body=body
-    ).execute()
-    return result
-
-# Fetch initial data
-def init_data():
-    raw_form_df = fetch_data("Raw_Form_Responses", "A1:N1000")
-    weight_data_df = fetch_data("Weight_Tracker", "A1:C1000")
-    return raw_form_df, weight_data_df
-
-raw_form_df, weight_data_df = init_data()
-dynamic_users = weight_data_df.iloc[:, 2].unique()
+# The page only needs the users who have logged a weight, so it reads those two
+# columns (the weight tells old target rows, with a target as the user, apart)
+page_data = PageData(weight_users=("Weight_Tracker", ["Current Weight", "User"]))
+weight_users = page_data.weight_users
+dynamic_users = weight_users.loc[~legacy_target_mask(weight_users), "User"].unique()
 
 # Initialize session state variables
 session_state_defaults = {
@@ -101,20 +88,14 @@ with st.container():
 selected_datetime = datetime.combine(st.session_state.date_exercised, datetime.now().time())
 formatted_datetime = selected_datetime.strftime("%d/%m/%Y %H:%M:%S")
 
-activity_options = ["Cycling", "Strength", "Yoga", "Running", "Meditation", "Hiking"]
+activity_options = EXERCISE_TYPES
 st.session_state.selected_exercise = st.selectbox(
     "Which activity have you completed?*",
     activity_options,
     key="exercise_type_question"
 )
 
-mood_options = {
-    "Very Unhappy": "😟 Sluggish, Tired, Drained",
-    "Unhappy": "🙁 Frustrated, Low Energy",
-    "Neutral": "😐 Okay, Balanced, Indifferent",
-    "Happy": "🙂 Content, Energetic, Positive",
-    "Very Happy": "😁 Proud, Excited, Accomplished"
-}
+mood_options = MOOD_OPTIONS
 
 with st.container():
     st.session_state.mood_prior = st.radio(
@@ -142,7 +123,7 @@ st.session_state.distance = st.slider(
 
 st.session_state.part_of_body = st.selectbox(
     "Which part of the body did you focus on?",
-    ("Upper Body", "Chest", "Core", "Legs", "Whole Body"),
+    BODY_PARTS,
     index=None,
     placeholder="Select from this list.",
     key="part_of_body_question"
@@ -156,13 +137,7 @@ st.session_state.reps = st.slider(
     key="reps_question"
 )
 
-intensity_mapping = {
-    "Very Light": 1,
-    "Light": 2,
-    "Moderate": 3,
-    "Hard": 4,
-    "Very Hard": 5,
-}
+intensity_mapping = INTENSITY_SCORES
 
 st.session_state.intensity = st.select_slider(
     "Select the perceived intensity of your workout*:",
@@ -210,10 +185,24 @@ if st.button("Log your activity!!"):
             st.session_state.notes,
             st.session_state.selected_person
         ]
+        # The same answers submitted again within a few seconds reuse their
+        # submission ID (the timestamp's time part changes every rerun, so the
+        # date stands in for it), so a double-click logs once
+        submission_id = form_submission_id(
+            st.session_state, "activity_submission", [st.session_state.date_exercised] + values[1:]
+        )
         try:
-            append_data("Raw_Form_Responses", values)
-            st.success("Data saved successfully!")
+            if append_data("Raw_Form_Responses", values, submission_id):
+                st.success("Saved! It will show up in the charts within a few seconds.")
+            else:
+                # The next click logs it as a new activity
+                clear_submission_id(st.session_state, "activity_submission")
+                st.warning("This activity was already logged a moment ago. Click again to log it as another activity.")
         except Exception as e:
             st.error(f"Failed to save data: {e}")
     else:
         st.error("Please fill in all required fields.")
+
+
+# Rerun timings in the sidebar when the debug panel is on
+show_rerun_timings()
@@ -0,0 +1,36 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The tests run against the local SQLite backend, writing straight through (no
+# write queue), with every state file (mirror, summary, journal) in a per-test
+# folder. The paths are read when tracker.config is imported, so the defaults
+# are pointed away from the app's own .tracker folder before anything imports it.
+os.environ.setdefault("TRACKER_BACKEND", "local")
+os.environ.setdefault("TRACKER_STATE_DIR", tempfile.mkdtemp(prefix="tracker-tests-"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracker import data, journal, summary, sync  # noqa: E402
+from tracker.local import LocalBackend  # noqa: E402
+from tracker.storage import get_backend, set_backend  # noqa: E402
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, "JOURNAL_PATH", str(tmp_path / "journal.sqlite3"))
+    monkeypatch.setattr(sync, "MIRROR_PATH", str(tmp_path / "mirror.sqlite3"))
+    monkeypatch.setattr(summary, "SUMMARY_PATH", str(tmp_path / "summary.sqlite3"))
+    monkeypatch.setattr(data, "WRITE_BEHIND", False)
+    monkeypatch.setattr(data, "_replayed", True)
+    monkeypatch.setattr(data, "_cache", {})
+    monkeypatch.setattr(data, "_row_counts", {})
+    monkeypatch.setattr(data, "_ttls", dict(data._ttls))
+    monkeypatch.setattr(summary, "_state", None)
+    monkeypatch.setattr(sync, "_mirrors", {})
+    previous = get_backend()
+    local = LocalBackend(str(tmp_path / "local.sqlite3"))
+    set_backend(local)
+    yield local
+    set_backend(previous)
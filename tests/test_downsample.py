@@ -0,0 +1,80 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tracker.downsample import downsample_lines, lttb
+
+
+# Largest-Triangle-Three-Buckets as usually written, one bucket and one point at a time
+def loop_lttb(x, y, n_out):
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return list(range(n))
+    every = (n - 2) / (n_out - 2)
+    kept, previous = [0], 0
+    for i in range(n_out - 2):
+        next_start = math.floor((i + 1) * every) + 1
+        next_end = min(math.floor((i + 2) * every) + 1, n)
+        average_x = sum(x[next_start:next_end]) / (next_end - next_start)
+        average_y = sum(y[next_start:next_end]) / (next_end - next_start)
+        best, best_area = None, -1.0
+        for j in range(math.floor(i * every) + 1, math.floor((i + 1) * every) + 1):
+            area = abs((x[previous] - average_x) * (y[j] - y[previous]) - (x[previous] - x[j]) * (average_y - y[previous]))
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+        previous = best
+    kept.append(n - 1)
+    return kept
+
+
+@pytest.mark.parametrize("n, n_out", [(1000, 100), (1000, 3), (997, 250), (50, 49), (10, 4)])
+def test_lttb_matches_the_loop(n, n_out):
+    rng = np.random.default_rng(n + n_out)
+    x = np.cumsum(rng.uniform(0.5, 2.0, n))
+    y = np.cumsum(rng.normal(0, 1, n))
+    assert lttb(x, y, n_out).tolist() == loop_lttb(x.tolist(), y.tolist(), n_out)
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 5, 100])
+def test_series_no_longer_than_the_threshold_is_kept_whole(n):
+    x = np.arange(n, dtype=np.float64)
+    assert lttb(x, np.sin(x), 100).tolist() == list(range(n))
+
+
+def test_peaks_survive():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.zeros(1000)
+    y[[123, 617]] = [10, -10]
+    kept = lttb(x, y, 20)
+    assert {0, 123, 617, 999} <= set(kept.tolist())
+
+
+def test_every_line_is_downsampled_on_its_own():
+    rng = np.random.default_rng(1)
+    timestamps = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.permutation(600), unit="h")
+    df = pd.DataFrame({
+        "Timestamp": timestamps,
+        "Current Weight": rng.normal(80, 2, 600),
+        "User": ["Tom C"] * 500 + ["Saffi"] * 100,
+    })
+    kept = downsample_lines(df, "Timestamp", "Current Weight", "User", 50)
+    assert kept["User"].value_counts().to_dict() == {"Tom C": 50, "Saffi": 50}
+    assert kept["Timestamp"].is_monotonic_increasing
+
+    for user, rows in df.sort_values("Timestamp").groupby("User"):
+        x = rows["Timestamp"].astype("int64").tolist()
+        expected = rows.iloc[loop_lttb(x, rows["Current Weight"].tolist(), 50)]
+        pd.testing.assert_frame_equal(kept[kept["User"] == user], expected)
+
+
+def test_single_short_line_is_kept_whole():
+    df = pd.DataFrame({
+        "Timestamp": pd.date_range("2025-01-01", periods=30),
+        "Current Weight": np.linspace(80, 78, 30),
+        "User": "Ana",
+    })
+    pd.testing.assert_frame_equal(downsample_lines(df, "Timestamp", "Current Weight", "User", 100), df)
+    assert downsample_lines(df.iloc[0:0], "Timestamp", "Current Weight", "User", 100).empty
@@ -0,0 +1,69 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tracker.dimensions import DAY_NAMES
+from tracker.heatmap import weekday_matrix
+
+
+# The groupby the frequency page used before: sessions summed per ISO year, ISO
+# week and day of week, unstacked into one row per active week
+def grouped_heatmap(dates, sessions):
+    rows = pd.DataFrame({"Date": pd.to_datetime(dates), "Sessions": sessions})
+    calendar = rows["Date"].dt.isocalendar()
+    rows["ISO Year"], rows["ISO Week"] = calendar["year"], calendar["week"]
+    rows["Day of Week"] = rows["Date"].dt.day_name()
+    return (
+        rows.groupby(["ISO Year", "ISO Week", "Day of Week"])["Sessions"].sum()
+        .unstack(fill_value=0)
+        .reindex(columns=DAY_NAMES, fill_value=0)
+    )
+
+
+# The matrix's non-empty weeks, keyed by the ISO year and week of their Monday
+def matrix_heatmap(dates, sessions):
+    counts, week_starts = weekday_matrix(np.asarray(pd.to_datetime(dates), dtype="datetime64[D]"), sessions)
+    active = counts.any(axis=1)
+    index = pd.MultiIndex.from_tuples(
+        [tuple(date.fromisoformat(str(monday)).isocalendar()[:2]) for monday in week_starts[active]],
+        names=["ISO Year", "ISO Week"],
+    )
+    return pd.DataFrame(counts[active], index=index, columns=DAY_NAMES)
+
+
+def assert_matches_groupby(dates, sessions):
+    expected = grouped_heatmap(dates, sessions)
+    got = matrix_heatmap(dates, sessions)
+    assert got.index.tolist() == [(int(year), int(week)) for year, week in expected.index]
+    assert got.to_numpy().tolist() == expected.to_numpy().tolist()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_weekday_matrix_matches_the_groupby(seed):
+    rng = np.random.default_rng(seed)
+    dates = np.datetime64("2025-10-01") + rng.integers(0, 500, 400).astype("timedelta64[D]")
+    assert_matches_groupby(dates, rng.integers(1, 4, 400))
+
+
+def test_iso_week_53_and_the_year_end():
+    # 2026-12-28 to 2027-01-03 is ISO week 53 of 2026; 2024-12-30 is in week 1 of 2025
+    dates = pd.date_range("2024-12-27", "2025-01-06").append(pd.date_range("2026-12-26", "2027-01-05"))
+    assert_matches_groupby(dates, np.ones(len(dates), dtype=np.int64))
+    counts, week_starts = weekday_matrix(np.asarray(dates, dtype="datetime64[D]"), np.ones(len(dates)))
+    assert str(week_starts[-2]) == "2026-12-28"
+    assert counts[-2].tolist() == [1] * 7
+
+
+def test_single_day():
+    counts, week_starts = weekday_matrix(np.array(["2026-10-17"], dtype="datetime64[D]"), np.array([3]))
+    # A Saturday, in the week starting Monday 2026-10-12
+    assert counts.tolist() == [[0, 0, 0, 0, 0, 3, 0]]
+    assert week_starts.tolist() == [date(2026, 10, 12)]
+
+
+def test_no_sessions():
+    counts, week_starts = weekday_matrix(np.array([], dtype="datetime64[D]"), np.array([]))
+    assert counts.shape == (0, 7)
+    assert len(week_starts) == 0
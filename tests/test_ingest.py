@@ -0,0 +1,29 @@
+import pandas as pd
+
+from tracker.ingest import legacy_target_mask, prepare_weights
+from tracker.targets import legacy_target_rows
+
+WEIGHTS = pd.DataFrame(
+    [
+        ["01/10/2026 08:00:00", "80.5", "Tom C", ""],
+        # Written by an old Weight page as [Timestamp, User, Target Weight, Target Date]
+        ["02/10/2026 08:00:00", "Tom C", "75", "01/01/2027 00:00:00"],
+        ["03/10/2026 08:00:00", "", "Saffi", ""],
+        ["04/10/2026 08:00:00", "62", "Saffi", ""],
+    ],
+    columns=["Timestamp", "Current Weight", "User", "Target Date"],
+)
+
+
+def test_legacy_target_rows_are_recognised():
+    assert list(legacy_target_mask(WEIGHTS)) == [False, True, False, False]
+    rows, row_numbers = legacy_target_rows(WEIGHTS)
+    assert rows == [["02/10/2026 08:00:00", "Tom C", "75", "01/01/2027 00:00:00"]]
+    assert row_numbers == [3]
+
+
+def test_weight_log_leaves_legacy_target_rows_out():
+    df = prepare_weights(WEIGHTS)
+    assert list(df["User"]) == ["Tom C", "Saffi", "Saffi"]
+    assert "75" not in set(df["User"].cat.categories)
+    assert list(df.index) == [0, 1, 2]
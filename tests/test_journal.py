@@ -0,0 +1,109 @@
+from tracker import data, journal
+from tracker.config import SUBMISSION_REPEAT_SECONDS
+from tracker.data import append_data, replay_journal
+from tracker.local import LocalBackend
+from tracker.storage import set_backend
+from tracker.writer import WriteQueue
+
+SHEET = "Weight_Tracker"
+ROW = ["17/10/2026 08:00:00", "80.5", "Tom C", ""]
+
+
+def sheet_rows(backend):
+    (rows,) = backend.read_ranges([(SHEET, "A2:E")])
+    return rows
+
+
+def test_record_drops_a_repeated_submission_id(backend):
+    assert journal.record(SHEET, ROW, "abc")
+    assert not journal.record(SHEET, ROW, "abc")
+    assert journal.journal_stats() == {"journaled": 1, "written": 0, "waiting": 1}
+
+
+def test_with_id_puts_the_id_in_the_sheet_id_column(backend):
+    row = journal.with_id(SHEET, ROW, "abc")
+    assert row == ROW + ["abc"]
+    assert journal.row_id(SHEET, row) == "abc"
+    assert journal.row_id("App_Users", ["1", "Tom C"]) is None
+
+
+def test_form_submission_id_is_reused_for_a_double_click():
+    state = {}
+    first = journal.form_submission_id(state, "form", ROW, now=100)
+    assert journal.form_submission_id(state, "form", ROW, now=100 + SUBMISSION_REPEAT_SECONDS) == first
+
+
+def test_form_submission_id_is_new_after_the_window_or_with_other_values():
+    state = {}
+    first = journal.form_submission_id(state, "form", ROW, now=100)
+    later = journal.form_submission_id(state, "form", ROW, now=101 + SUBMISSION_REPEAT_SECONDS)
+    assert later != first
+    assert journal.form_submission_id(state, "form", ROW[:1] + ["81"] + ROW[2:], now=102 + SUBMISSION_REPEAT_SECONDS) != later
+
+
+def test_clear_submission_id_makes_the_next_submit_new():
+    state = {}
+    first = journal.form_submission_id(state, "form", ROW, now=100)
+    journal.clear_submission_id(state, "form")
+    assert "form" not in state
+    assert journal.form_submission_id(state, "form", ROW, now=100) != first
+
+
+def test_append_data_writes_a_submission_once(backend):
+    assert append_data(SHEET, ROW, "abc")
+    assert not append_data(SHEET, ROW, "abc")
+    assert sheet_rows(backend) == [ROW + ["abc"]]
+    assert journal.pending() == []
+
+
+def test_replay_sends_submissions_that_were_never_written(backend):
+    # Journaled, then the process stopped before the append
+    journal.record(SHEET, ROW, "abc")
+    assert replay_journal() == 1
+    assert sheet_rows(backend) == [ROW + ["abc"]]
+    assert replay_journal() == 0
+    assert sheet_rows(backend) == [ROW + ["abc"]]
+
+
+def test_replay_skips_submissions_already_in_the_sheet(backend):
+    # Handed to the backend and written, but the process stopped before marking it
+    journal.record(SHEET, ROW, "abc")
+    journal.mark_attempted(["abc"])
+    backend.append_rows(SHEET, [journal.with_id(SHEET, ROW, "abc")])
+    journal.record(SHEET, ROW, "def")
+
+    assert replay_journal() == 2
+    assert sheet_rows(backend) == [ROW + ["abc"], ROW + ["def"]]
+    assert journal.pending() == []
+
+
+class FlakyBackend(LocalBackend):
+    def __init__(self, path, failures):
+        super().__init__(path)
+        self.failures = failures
+
+    def append_rows(self, sheet_name, rows):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("connection reset")
+        return super().append_rows(sheet_name, rows)
+
+
+def test_rows_set_aside_by_the_write_queue_are_sent_with_the_next_submission(backend, tmp_path, monkeypatch):
+    flaky = FlakyBackend(str(tmp_path / "flaky.sqlite3"), failures=3)
+    set_backend(flaky)
+    monkeypatch.setattr(data, "WRITE_BEHIND", True)
+    queue = WriteQueue(data._append_rows, data._rows_written, linger=0, retry_delay=0.001, max_attempts=2)
+    monkeypatch.setattr(data, "_write_queue", queue)
+
+    assert append_data(SHEET, ROW, "abc")
+    queue.flush()
+    assert queue.stats()["failed"] == 1
+    assert sheet_rows(flaky) == []
+
+    # The API is still failing for this one's first attempt, then it is back
+    assert append_data(SHEET, ROW, "def")
+    queue.flush()
+    assert queue.stats()["failed"] == 0
+    assert sheet_rows(flaky) == [ROW + ["abc"], ROW + ["def"]]
+    assert journal.pending() == []
@@ -0,0 +1,20 @@
+from tracker.page_data import PageData, column_ranges
+
+
+def test_adjacent_columns_are_read_as_one_range():
+    assert column_ranges("Weight_Tracker", ["User", "Current Weight"]) == [("B1:C", ["Current Weight", "User"])]
+    assert column_ranges("Weight_Tracker", ["Timestamp", "User"]) == [("A1:A", ["Timestamp"]), ("C1:C", ["User"])]
+    assert column_ranges("Regime", "A1:B") == [("A1:B", None)]
+
+
+def test_columns_are_named_as_requested_whatever_the_sheet_header_says(backend):
+    backend.import_rows("App_Users", [["#", "Name"], ["1", "Tom C"], ["2", "Saffi"]])
+    page_data = PageData(users=("App_Users", ["User"]))
+    assert list(page_data.users.columns) == ["User"]
+    assert list(page_data.users["User"]) == ["Tom C", "Saffi"]
+
+
+def test_columns_from_several_ranges_are_joined(backend):
+    backend.import_rows("Weight_Tracker", [["When", "Kg", "Who"], ["01/10/2026 08:00:00", "80", "Tom C"]])
+    page_data = PageData(weights=("Weight_Tracker", ["Timestamp", "User"]))
+    assert page_data.weights.to_dict("records") == [{"Timestamp": "01/10/2026 08:00:00", "User": "Tom C"}]
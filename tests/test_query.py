@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tracker.query import RollupIndex
+from tracker.rollup import ROLLUP_KEYS
+
+USERS = ["Tom C", "Saffi", "Ana"]
+TYPES = ["Run", "Yoga", "Swim"]
+
+
+def random_rollup(seed, n=300):
+    rng = np.random.default_rng(seed)
+    first = np.datetime64("2026-11-20")
+    return pd.DataFrame({
+        "User": rng.choice(USERS, n),
+        "Exercise Type": rng.choice(TYPES, n),
+        "Date": pd.to_datetime(first + rng.integers(0, 60, n).astype("timedelta64[D]")),
+        "Time of Day": rng.choice(["Morning", "Evening"], n),
+        "Sessions": rng.integers(1, 4, n),
+    }).drop_duplicates(ROLLUP_KEYS).reset_index(drop=True)
+
+
+# The chained masks the pages used before the index: exercise type, users, then
+# the week picker (ISO year and week) and the month picker (whole days)
+def masked(rollup, exercise_type=None, users=None, week=None, month=None):
+    rows = rollup
+    if exercise_type is not None:
+        rows = rows[rows["Exercise Type"] == exercise_type]
+    if users is not None:
+        rows = rows[rows["User"].isin(users)]
+    if week is not None:
+        calendar = rows["Date"].dt.isocalendar()
+        rows = rows[(calendar["year"] == week[0]) & (calendar["week"] == week[1])]
+    if month is not None:
+        rows = rows[(rows["Date"] >= month[0]) & (rows["Date"] <= month[1])]
+    return rows
+
+
+# The (start, end) ranges the pages hand to select() for the same pickers
+def date_ranges(week=None, month=None):
+    ranges = []
+    if week is not None:
+        week_start = datetime.fromisocalendar(week[0], week[1], 1)
+        ranges.append((week_start, week_start + timedelta(days=6)))
+    if month is not None:
+        ranges.append(month)
+    return ranges
+
+
+def same_rows(selected, expected):
+    def ordered(frame):
+        return frame.sort_values(ROLLUP_KEYS).reset_index(drop=True)
+    pd.testing.assert_frame_equal(ordered(selected), ordered(expected), check_dtype=False)
+
+
+FILTERS = [
+    {},
+    {"exercise_type": "Run"},
+    {"users": ["Saffi"]},
+    {"users": ["Tom C", "Ana", "Nobody"]},
+    {"users": []},
+    {"exercise_type": "Yoga", "users": ["Ana"]},
+    # ISO week 53 of 2026 runs from 2026-12-28 to 2027-01-03
+    {"week": (2026, 53)},
+    {"week": (2027, 1), "exercise_type": "Swim"},
+    {"month": (datetime(2026, 12, 1), datetime(2026, 12, 31))},
+    {"week": (2026, 53), "month": (datetime(2026, 12, 1), datetime(2026, 12, 31)), "users": ["Tom C"]},
+    {"month": (datetime(2025, 1, 1), datetime(2025, 1, 31))},
+]
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("filters", FILTERS)
+def test_select_matches_the_chained_masks(seed, filters):
+    rollup = random_rollup(seed)
+    index = RollupIndex(rollup)
+    week, month = filters.get("week"), filters.get("month")
+    selected = index.select(filters.get("exercise_type"), filters.get("users"), date_ranges(week, month))
+    same_rows(selected, masked(rollup, **filters))
+
+
+def test_single_user():
+    rollup = random_rollup(0)
+    rollup = rollup[rollup["User"] == "Ana"].reset_index(drop=True)
+    index = RollupIndex(rollup)
+    same_rows(index.select("Run", ["Ana"], date_ranges((2026, 53))), masked(rollup, "Run", ["Ana"], (2026, 53)))
+
+
+def test_empty_rollup():
+    rollup = random_rollup(0).iloc[0:0]
+    index = RollupIndex(rollup)
+    assert index.select("Run", ["Ana"], date_ranges((2026, 53))).empty
+    assert index.select().empty
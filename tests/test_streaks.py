@@ -0,0 +1,98 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tracker.streaks import ALL, STREAK_START, streak_table, streaks_for
+
+
+# The day-by-day loop the engine replaced: walk every day from the start to
+# today, counting up on active days and back to 0 on the others
+def loop_streaks(timestamps, today, start=STREAK_START):
+    active_days = {timestamp.date() for timestamp in timestamps}
+    current, streaks = 0, [0]
+    day = start
+    while day <= today:
+        current = current + 1 if day in active_days else 0
+        streaks.append(current)
+        day += timedelta(days=1)
+    return current, max(streaks)
+
+
+def sessions(*days_and_groups):
+    return pd.DataFrame(
+        [(datetime.combine(day, datetime.min.time()) + timedelta(hours=7), user, exercise_type)
+         for day, user, exercise_type in days_and_groups],
+        columns=["Timestamp", "User", "Exercise Type"],
+    ).astype({"Timestamp": "datetime64[ns]"})
+
+
+def random_sessions(seed, n, today, users=("Tom C", "Saffi", "Ana"), types=("Run", "Yoga", "Swim")):
+    rng = np.random.default_rng(seed)
+    first = (today - STREAK_START).days
+    return sessions(*(
+        (today - timedelta(days=int(days)), users[rng.integers(len(users))], types[rng.integers(len(types))])
+        # Mostly recent days, so long runs happen, and a few after today
+        for days in np.concatenate([rng.integers(-3, 40, n), rng.integers(0, first + 5, n // 4)])
+    ))
+
+
+def assert_matches_loop(df, today):
+    table = streak_table(df, today)
+    groups = [(ALL, ALL)] + [(user, ALL) for user in df["User"].unique()]
+    groups += [(ALL, exercise_type) for exercise_type in df["Exercise Type"].unique()]
+    groups += [(user, exercise_type) for user in df["User"].unique() for exercise_type in df["Exercise Type"].unique()]
+    for user, exercise_type in groups:
+        selected = df[((df["User"] == user) | (user == ALL)) & ((df["Exercise Type"] == exercise_type) | (exercise_type == ALL))]
+        expected = loop_streaks(selected["Timestamp"], today)
+        row = table[(table["User"] == user) & (table["Exercise Type"] == exercise_type)]
+        got = (0, 0) if row.empty else (int(row["Current Streak"].iloc[0]), int(row["Longest Streak"].iloc[0]))
+        assert got == expected, (user, exercise_type)
+        assert streaks_for(selected, today) == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_streak_table_matches_the_day_loop(seed):
+    today = date(2026, 10, 17)
+    assert_matches_loop(random_sessions(seed, 200, today), today)
+
+
+def test_single_user():
+    today = date(2026, 10, 17)
+    assert_matches_loop(random_sessions(7, 60, today, users=("Tom C",), types=("Run",)), today)
+
+
+def test_empty_frame():
+    today = date(2026, 10, 17)
+    empty = sessions()
+    assert streaks_for(empty, today) == (0, 0)
+    table = streak_table(empty, today)
+    assert table[["Current Streak", "Longest Streak"]].values.tolist() == [[0, 0]]
+
+
+def test_streak_across_the_year_end():
+    today = date(2025, 1, 3)
+    df = sessions(*((date(2024, 12, 28) + timedelta(days=i), "Tom C", "Run") for i in range(7)))
+    assert streaks_for(df, today) == loop_streaks(df["Timestamp"], today) == (7, 7)
+    assert_matches_loop(df, today)
+
+
+def test_streak_through_iso_week_53():
+    # 2026-12-28 to 2027-01-03 is ISO week 53 of 2026
+    today = date(2027, 1, 5)
+    days = [date(2026, 12, 20) + timedelta(days=i) for i in range(17) if i != 3]
+    df = sessions(*((day, "Saffi", "Yoga") for day in days))
+    assert streaks_for(df, today) == loop_streaks(df["Timestamp"], today) == (13, 13)
+    assert_matches_loop(df, today)
+
+
+def test_days_before_the_start_and_after_today_are_ignored():
+    today = date(2026, 10, 17)
+    df = sessions(
+        (STREAK_START - timedelta(days=1), "Tom C", "Run"),
+        (STREAK_START, "Tom C", "Run"),
+        (today, "Tom C", "Run"),
+        (today + timedelta(days=1), "Tom C", "Run"),
+    )
+    assert streaks_for(df, today) == loop_streaks(df["Timestamp"], today) == (1, 1)
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+
+from tracker import data, summary
+from tracker.config import SHEET_HEADERS
+from tracker.data import append_data, set_ttl
+from tracker.ingest import RESPONSES_SHEET, load_responses
+from tracker.streaks import ALL
+
+TODAY = datetime.today().date()
+
+
+def response(days_ago, user, exercise_type, minutes="30"):
+    timestamp = datetime.combine(TODAY - timedelta(days=days_ago), datetime.min.time()) + timedelta(hours=8)
+    return [timestamp.strftime("%d/%m/%Y %H:%M:%S"), exercise_type, "5", minutes, "2", "Legs", "10", "Moderate", "7", "", user]
+
+
+def fill(backend, rows):
+    backend.import_rows(RESPONSES_SHEET, [SHEET_HEADERS[RESPONSES_SHEET]] + rows)
+
+
+def rebuilt_totals():
+    totals, _ = summary.build_totals(load_responses(), TODAY)
+    return totals
+
+
+def test_appended_rows_update_the_summary_like_a_rebuild(backend):
+    fill(backend, [response(3, "Tom C", "Run"), response(2, "Tom C", "Run"), response(2, "Saffi", "Yoga")])
+    summary.load_summary(TODAY)
+
+    for row in [response(1, "Tom C", "Run"), response(0, "Tom C", "Run"), response(0, "Saffi", "Run", minutes="")]:
+        append_data(RESPONSES_SHEET, row)
+
+    state = summary._state
+    assert state["meta"]["sheet_rows"] == 6
+    assert not state["meta"]["dirty"]
+    assert state["totals"] == rebuilt_totals()
+    assert summary.lookup("Tom C", "Run", TODAY)["current_streak"] == 4
+    assert summary.lookup(ALL, ALL, TODAY)["sessions"] == 6
+
+
+def test_unchanged_sheet_is_not_rebuilt(backend, monkeypatch):
+    fill(backend, [response(1, "Tom C", "Run")])
+    summary.load_summary(TODAY)
+    append_data(RESPONSES_SHEET, response(0, "Tom C", "Run"))
+
+    def no_rebuild(df, today):
+        raise AssertionError("the summary was rebuilt")
+
+    monkeypatch.setattr(summary, "build_totals", no_rebuild)
+    assert summary.lookup("Tom C", "Run", TODAY)["sessions"] == 2
+    # Nor after a restart, from the persisted summary
+    monkeypatch.setattr(summary, "_state", None)
+    assert summary.lookup("Tom C", "Run", TODAY)["sessions"] == 2
+
+
+def test_rows_added_outside_the_app_trigger_a_rebuild(backend):
+    set_ttl(RESPONSES_SHEET, 0)
+    fill(backend, [response(1, "Tom C", "Run")])
+    summary.load_summary(TODAY)
+
+    # e.g. a Google Form submission, which no append listener sees
+    backend.append_rows(RESPONSES_SHEET, [response(0, "Tom C", "Run")])
+    assert summary._state["meta"]["sheet_rows"] == 1
+
+    state = summary.load_summary(TODAY)
+    assert state["meta"]["sheet_rows"] == 2
+    assert state["totals"] == rebuilt_totals()
+    assert summary.lookup("Tom C", "Run", TODAY)["current_streak"] == 2
+
+
+def test_backdated_row_marks_the_summary_dirty_until_rebuilt(backend):
+    fill(backend, [response(4, "Tom C", "Run"), response(2, "Tom C", "Run")])
+    summary.load_summary(TODAY)
+
+    # Joins the runs ending 4 and 2 days ago, which record_row can't tell
+    append_data(RESPONSES_SHEET, response(3, "Tom C", "Run"))
+    assert summary._state["meta"]["dirty"]
+
+    state = summary.load_summary(TODAY)
+    assert not state["meta"]["dirty"]
+    assert state["totals"] == rebuilt_totals()
+    assert summary.lookup("Tom C", "Run", TODAY)["longest_streak"] == 3
+
+
+def test_sheet_is_counted_without_holding_the_summary_lock(backend, monkeypatch):
+    fill(backend, [response(1, "Tom C", "Run")])
+    counted = []
+
+    def row_count(sheet_name):
+        # record_row on the write queue's thread needs this lock
+        assert not summary._lock.locked()
+        counted.append(sheet_name)
+        return data.row_count(sheet_name)
+
+    monkeypatch.setattr(summary, "row_count", row_count)
+    summary.load_summary(TODAY)
+    assert counted
+
+
+def test_row_appended_during_a_rebuild_is_not_lost(backend, monkeypatch):
+    fill(backend, [response(2, "Tom C", "Run"), response(1, "Tom C", "Run")])
+    build_totals = summary.build_totals
+    appended = []
+
+    def build_totals_racing_an_append(df, today):
+        if not appended:
+            # Written and folded in after the rebuild read the sheet
+            appended.append(append_data(RESPONSES_SHEET, response(0, "Tom C", "Run")))
+        return build_totals(df, today)
+
+    monkeypatch.setattr(summary, "build_totals", build_totals_racing_an_append)
+    state = summary.load_summary(TODAY)
+    assert appended == [True]
+    assert state["meta"]["sheet_rows"] == 3
+    assert state["totals"] == rebuilt_totals()
+    assert summary.lookup("Tom C", "Run", TODAY)["current_streak"] == 3
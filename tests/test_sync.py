@@ -0,0 +1,49 @@
+from tracker import sync
+
+SHEET = "Weight_Tracker"
+HEADER = ["Timestamp", "Current Weight", "User", "Target Date"]
+ROWS = [HEADER, ["01/10/2026 08:00:00", "80", "Tom C"], ["02/10/2026 08:00:00", "79.5", "Saffi"]]
+
+
+def test_first_sync_downloads_the_whole_sheet(backend):
+    assert sync.sync_range(SHEET) == ("A1:D", True)
+    assert sync.merge(SHEET, ROWS, full=True) == ROWS
+    assert sync.row_count(SHEET) == 3
+    assert sync.sync_range(SHEET) == ("A3:D", False)
+
+
+def test_delta_appends_the_rows_below_the_overlap_row(backend):
+    sync.merge(SHEET, ROWS, full=True)
+    new_row = ["03/10/2026 08:00:00", "79", "Tom C"]
+    # The Sheets API drops trailing empty cells, so the overlap row may come back shorter
+    assert sync.merge(SHEET, [ROWS[-1] + [""], new_row], full=False) == ROWS + [new_row]
+    assert sync.row_count(SHEET) == 4
+    assert sync.edit_count(SHEET) == 0
+
+
+def test_overlap_mismatch_asks_for_a_full_reconcile(backend):
+    sync.merge(SHEET, ROWS, full=True)
+    assert sync.merge(SHEET, [["02/10/2026 08:00:00", "70", "Saffi"]], full=False) is None
+    assert sync.row_count(SHEET) == 3
+    assert sync.sync_range(SHEET) == ("A1:D", True)
+
+
+def test_full_reconcile_counts_rows_edited_by_hand(backend):
+    sync.merge(SHEET, ROWS, full=True)
+    # Rows only appended is not an edit
+    appended = ROWS + [["03/10/2026 08:00:00", "79", "Tom C"]]
+    sync.merge(SHEET, appended, full=True)
+    assert sync.edit_count(SHEET) == 0
+
+    edited = [HEADER, ["01/10/2026 08:00:00", "81", "Tom C"]] + appended[2:]
+    assert sync.merge(SHEET, edited, full=True) == edited
+    assert sync.edit_count(SHEET) == 1
+
+
+def test_mirror_is_reloaded_from_disk(backend, monkeypatch):
+    sync.merge(SHEET, ROWS, full=True)
+    sync.merge(SHEET, [HEADER, ROWS[1]], full=True)
+    monkeypatch.setattr(sync, "_mirrors", {})
+    assert sync.row_count(SHEET) == 2
+    assert sync.edit_count(SHEET) == 1
+    assert sync.sync_range(SHEET) == ("A2:D", False)
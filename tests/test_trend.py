@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tracker.trend import EWMA_SPAN, MAX_PROJECTION_DAYS, MEDIAN_WINDOW, TREND_DAYS, fit_trends, project_targets, smooth
+
+
+# The per-user loop the grouped kernels replaced
+def loop_trends(weights_df):
+    trends = {}
+    for user, rows in weights_df.groupby("User", sort=True):
+        rows = rows.sort_values("Timestamp", kind="stable")
+        weights = rows["Current Weight"].astype("float64")
+        smoothed = weights.rolling(MEDIAN_WINDOW, min_periods=1).median().ewm(span=EWMA_SPAN).mean()
+        last = rows["Timestamp"].iloc[-1]
+        days = ((rows["Timestamp"] - last) / pd.Timedelta(days=1)).to_numpy()
+        recent = days >= -TREND_DAYS
+        if len(np.unique(days[recent])) >= 2:
+            rate = np.polyfit(days[recent], weights.to_numpy()[recent], 1)[0] * 7
+        else:
+            rate = np.nan
+        trends[user] = (last, smoothed.iloc[-1], rate, int(recent.sum()))
+    return trends
+
+
+# The per-user loop behind the projected dates
+def loop_projection(last, smoothed, rate, target):
+    if target is None:
+        return pd.NaT
+    if abs(target - smoothed) < 0.05:
+        return last.round("s")
+    if not rate:
+        return pd.NaT
+    days = (target - smoothed) / (rate / 7)
+    if 0 <= days <= MAX_PROJECTION_DAYS:
+        return (last + pd.Timedelta(days=days)).round("s")
+    return pd.NaT
+
+
+def weigh_ins(seed, users, per_user=60):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for user in users:
+        start = pd.Timestamp("2025-11-01") + pd.Timedelta(hours=int(rng.integers(0, 500)))
+        steps = rng.integers(6, 120, per_user)
+        for hours, weight in zip(np.cumsum(steps), 85 + np.cumsum(rng.normal(-0.05, 0.6, per_user))):
+            rows.append((start + pd.Timedelta(hours=int(hours)), user, round(float(weight), 1)))
+    order = rng.permutation(len(rows))
+    return pd.DataFrame([rows[i] for i in order], columns=["Timestamp", "User", "Current Weight"])
+
+
+@pytest.mark.parametrize("seed, users", [(0, ["Tom C", "Saffi", "Ana"]), (1, ["Ana"]), (2, ["B", "A", "C", "D"])])
+def test_trends_match_the_loop(seed, users):
+    weights_df = weigh_ins(seed, users)
+    rows = smooth(weights_df)
+    trends = fit_trends(rows)
+    expected = loop_trends(weights_df)
+    assert sorted(trends.index) == sorted(expected)
+    for user, (last, smoothed, rate, count) in expected.items():
+        assert trends.at[user, "Last Weigh-in"] == last
+        assert trends.at[user, "Smoothed Weight"] == pytest.approx(smoothed)
+        assert trends.at[user, "Rate (kg/week)"] == pytest.approx(rate)
+        assert trends.at[user, "Weigh-ins"] == count
+
+
+def test_single_day_has_no_rate():
+    weights_df = pd.DataFrame({
+        "Timestamp": pd.to_datetime(["2025-12-31 07:00", "2025-12-31 07:00", "2026-03-01 08:00"]),
+        "User": ["Ana", "Ana", "Tom C"],
+        "Current Weight": [70.0, 70.4, 90.0],
+    })
+    trends = fit_trends(smooth(weights_df))
+    assert trends["Rate (kg/week)"].isna().all()
+    assert trends["Weigh-ins"].to_dict() == {"Ana": 2, "Tom C": 1}
+
+
+def test_no_weigh_ins():
+    weights_df = pd.DataFrame({"Timestamp": pd.Series(dtype="datetime64[ns]"), "User": [], "Current Weight": []})
+    rows = smooth(weights_df)
+    assert rows.empty
+    trends = fit_trends(rows)
+    assert trends.empty
+    assert project_targets(trends, {"Ana": 60}).empty
+
+
+def test_projections_match_the_loop():
+    last = pd.Timestamp("2026-01-15 07:31:12.345")
+    cases = {
+        "losing": (80.0, -0.5, 75.0),
+        "gaining": (60.0, 0.25, 62.5),
+        "flat": (80.0, 0.0, 75.0),
+        "wrong way": (80.0, 0.5, 75.0),
+        "reached": (75.02, 0.5, 75.0),
+        "reached and flat": (75.0, 0.0, 75.0),
+        "too far": (120.0, -0.01, 70.0),
+        "no rate": (80.0, np.nan, 75.0),
+        "no target": (80.0, -0.5, None),
+    }
+    trends = pd.DataFrame({
+        "Last Weigh-in": [last] * len(cases),
+        "Smoothed Weight": [smoothed for smoothed, _, _ in cases.values()],
+        "Rate (kg/week)": [rate for _, rate, _ in cases.values()],
+        "Weigh-ins": 10,
+    }, index=pd.Index(list(cases), name="User"))
+    targets = {user: target for user, (_, _, target) in cases.items() if target is not None}
+    projected = project_targets(trends, targets)
+    for user, (smoothed, rate, target) in cases.items():
+        expected = loop_projection(last, smoothed, rate, target)
+        actual = projected.at[user, "Projected Date"]
+        assert (pd.isna(actual) and pd.isna(expected)) or actual == expected, user
+    assert pd.notna(projected.at["losing", "Projected Date"])
+    assert pd.isna(projected.at["flat", "Projected Date"])
+    assert pd.isna(projected.at["wrong way", "Projected Date"])
+    assert projected.at["reached", "Projected Date"] == last.round("s")
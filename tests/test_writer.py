@@ -0,0 +1,92 @@
+import threading
+from types import SimpleNamespace
+
+from tracker.writer import WriteQueue, is_retryable
+
+
+class FakeSheet:
+    # Appends that fail (with `error`) for the first `failures` calls
+    def __init__(self, failures=0, error=None):
+        self.failures = failures
+        self.error = error or ConnectionError("connection reset")
+        self.calls = 0
+        self.rows = {}
+        self.first_call = threading.Event()
+
+    def write(self, sheet_name, rows):
+        self.calls += 1
+        self.first_call.set()
+        if self.calls <= self.failures:
+            raise self.error
+        self.rows.setdefault(sheet_name, []).extend(rows)
+
+
+def http_error(status):
+    error = Exception(f"HTTP {status}")
+    error.resp = SimpleNamespace(status=status)
+    return error
+
+
+def queue_for(sheet, max_attempts=4):
+    return WriteQueue(sheet.write, linger=0, retry_delay=0.01, max_delay=0.02, max_attempts=max_attempts)
+
+
+def test_retryable_errors():
+    assert is_retryable(ConnectionError())
+    assert is_retryable(http_error(429))
+    assert is_retryable(http_error(503))
+    assert not is_retryable(http_error(400))
+    assert not is_retryable(http_error(403))
+
+
+def test_failed_append_is_retried_until_it_succeeds():
+    sheet = FakeSheet(failures=2)
+    queue = queue_for(sheet)
+    queue.submit("Weight_Tracker", ["a"])
+    assert queue.flush(timeout=5)
+
+    assert sheet.rows == {"Weight_Tracker": [["a"]]}
+    stats = queue.stats()
+    assert (stats["written"], stats["retries"], stats["failed"], stats["depth"]) == (1, 2, 0, 0)
+    assert queue.failed == []
+
+
+def test_rows_submitted_during_a_retry_stay_behind_the_failed_batch():
+    sheet = FakeSheet(failures=1)
+    queue = queue_for(sheet)
+    queue.submit("Weight_Tracker", ["a"])
+    assert sheet.first_call.wait(5)
+    queue.submit("Weight_Tracker", ["b"])
+    queue.submit("Weight_Tracker", ["c"])
+    queue.submit("App_Users", ["x"])
+    assert queue.flush(timeout=5)
+
+    assert sheet.rows == {"Weight_Tracker": [["a"], ["b"], ["c"]], "App_Users": [["x"]]}
+
+
+def test_batch_is_set_aside_after_the_last_attempt_and_sent_with_the_next_submit():
+    sheet = FakeSheet(failures=3)
+    queue = queue_for(sheet, max_attempts=3)
+    queue.submit("Weight_Tracker", ["a"])
+    assert queue.flush(timeout=5)
+
+    assert sheet.calls == 3
+    assert [(sheet_name, rows) for sheet_name, rows, _ in queue.failed] == [("Weight_Tracker", [["a"]])]
+    assert queue.stats()["failed"] == 1
+    assert sheet.rows == {}
+
+    queue.submit("Weight_Tracker", ["b"])
+    assert queue.flush(timeout=5)
+    assert sheet.rows == {"Weight_Tracker": [["a"], ["b"]]}
+    assert queue.stats()["failed"] == 0
+
+
+def test_error_retrying_cant_fix_is_set_aside_at_once():
+    sheet = FakeSheet(failures=1, error=http_error(400))
+    queue = queue_for(sheet)
+    queue.submit("Weight_Tracker", ["a"])
+    assert queue.flush(timeout=5)
+
+    assert sheet.calls == 1
+    assert queue.stats()["failed"] == 1
+    assert queue.stats()["retries"] == 0
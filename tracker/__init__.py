@@ -0,0 +1 @@
+# Shared helpers for the Exercise and Wellness Tracker pages
@@ -0,0 +1,46 @@
+import re
+
+# Helpers for A1 notation ranges such as "A1:R1000", "A2:D" or "C:C"
+
+_CELL = re.compile(r"^([A-Z]*)(\d*)$")
+
+
+# "A" -> 0, "R" -> 17, "AA" -> 26
+def column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+
+# 0 -> "A", 17 -> "R", 26 -> "AA"
+def column_letter(index):
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+# Split a range into (first_col, first_row, last_col, last_row).
+# Columns are 0-based indexes, rows are 1-based sheet rows and open ends are None.
+def parse_range(range_name):
+    start, _, end = range_name.upper().partition(":")
+    start_match = _CELL.match(start)
+    end_match = _CELL.match(end or start)
+    if start_match is None or end_match is None:
+        raise ValueError(f"Not an A1 range: {range_name!r}")
+
+    first_col = column_index(start_match.group(1)) if start_match.group(1) else 0
+    first_row = int(start_match.group(2)) if start_match.group(2) else 1
+    last_col = column_index(end_match.group(1)) if end_match.group(1) else None
+    last_row = int(end_match.group(2)) if end_match.group(2) else None
+    return first_col, first_row, last_col, last_row
+
+
+# Cut the cells of a range out of a list of sheet rows (row 1 first)
+def crop_rows(rows, range_name):
+    first_col, first_row, last_col, last_row = parse_range(range_name)
+    stop_col = None if last_col is None else last_col + 1
+    return [row[first_col:stop_col] for row in rows[first_row - 1:last_row]]
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from tracker.dimensions import TIME_OF_DAY_ORDER, join_calendar
+from tracker.streaks import streaks_for
+
+# Page computations that don't need Streamlit.
+# The pages load the shared frames (tracker.ingest, tracker.rollup,
+# tracker.query, tracker.streaks, tracker.trend) and pass their filtered
+# selections to these functions for the numbers and tables they show, so every
+# stage between the sheet and a chart can be run, timed and scaled outside the
+# app (see tracker/bench.py). Nothing here imports streamlit or reads a sheet.
+
+
+# Sessions, minutes, miles, reps, current and longest streak of some rows of the
+# daily rollup, in the same shape as tracker.summary.lookup
+def activity_totals(rollup, today=None):
+    current_streak, longest_streak = streaks_for(rollup, today, column="Date")
+    return {
+        "sessions": int(rollup["Sessions"].sum()),
+        "minutes": float(rollup["Duration"].sum()),
+        "miles": float(rollup["Distance in Miles"].sum()),
+        "reps": float(rollup["Reps"].sum()),
+        "current_streak": current_streak,
+        "longest_streak": longest_streak,
+    }
+
+
+# Sessions per exercise type, most frequent first (sessions without a type are left out)
+def exercise_type_counts(rollup):
+    counts = (
+        rollup[rollup["Exercise Type"] != ""]
+        .groupby("Exercise Type")["Sessions"].sum()
+        .sort_values(ascending=False)
+        .reset_index()
+    )
+    counts.columns = ["Exercise Type", "Count"]
+    return counts
+
+
+# Sessions per time of day, in TIME_OF_DAY_ORDER with zeros for empty buckets
+def time_of_day_counts(rollup):
+    counts = rollup.groupby("Time of Day")["Sessions"].sum()
+    return counts.reindex(TIME_OF_DAY_ORDER, fill_value=0)
+
+
+# {row: week label} for the rows of a weekday matrix (tracker.heatmap) with at
+# least one session, e.g. "Week 7 2025 [2025-02-10 - 2025-02-16]"
+def active_week_labels(counts, week_starts):
+    active_weeks = np.flatnonzero(counts.any(axis=1))
+    labels = join_calendar(week_starts[active_weeks], columns=["Week Label"])["Week Label"]
+    return dict(zip(active_weeks.tolist(), labels))
+
+
+# The weight log as the Weight page lists it: a Date column first, the timestamp
+# last, only the given users (None for all), sorted by timestamp
+def weight_table(weights_df, users=None):
+    table = weights_df.copy()
+    table.insert(0, "Date", table["Timestamp"].dt.date)
+    table = table[[column for column in table.columns if column != "Timestamp"] + ["Timestamp"]]
+    if users is not None:
+        table = table[table["User"].isin(users)]
+    return table.sort_values("Timestamp")
@@ -0,0 +1,142 @@
+import argparse
+import gc
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from tracker import synthetic
+from tracker.analytics import activity_totals, active_week_labels, exercise_type_counts, time_of_day_counts, weight_table
+from tracker.config import WEIGHT_CHART_POINTS
+from tracker.downsample import downsample_lines
+from tracker.heatmap import weekday_matrix
+from tracker.ingest import prepare_responses, prepare_weights
+from tracker.query import RollupIndex
+from tracker.rollup import aggregate
+from tracker.schema import footprint
+from tracker.streaks import streak_table
+from tracker.summary import build_totals
+from tracker.trend import fit_trends, smooth
+
+# Throughput and memory benchmark of the analytics stages.
+# For every size, synthetic Raw_Form_Responses and Weight_Tracker frames of that
+# many rows (tracker/synthetic.py) go through the same stages as a page rerun
+# on a new data version: typed ingestion, the daily rollup and its index, a
+# filtered selection, the card totals, the chart counts, the heatmap matrix,
+# the streak table, the activity summary, and the weight table, trend and
+# downsampled lines. Each stage is timed --repeat times (the median is reported,
+# with the input rows per second) and run once more under tracemalloc for its
+# peak allocation; the size of what it returns is listed next to it. No
+# Streamlit or storage backend is involved.
+#
+#     python -m tracker.bench --sizes 10000 100000 1000000
+#     python -m tracker.bench --sizes 10000000 --repeat 1 --json >> bench.jsonl
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+# (stage name, function of the outputs so far) in run order; each function
+# returns the stage's output, stored under the stage name for later stages
+def stages(today):
+    recent = (today - timedelta(days=90), today)
+    return [
+        ("ingest", lambda out: prepare_responses(out["raw_responses"])),
+        ("rollup", lambda out: aggregate(out["ingest"])),
+        ("rollup index", lambda out: RollupIndex(out["rollup"])),
+        ("select", lambda out: out["rollup index"].select("Running", synthetic.user_names(10), [recent])),
+        ("card totals", lambda out: activity_totals(out["select"], today)),
+        ("chart counts", lambda out: (exercise_type_counts(out["rollup"]), time_of_day_counts(out["rollup"]))),
+        ("heatmap", lambda out: active_week_labels(*weekday_matrix(out["rollup"]["Date"], out["rollup"]["Sessions"]))),
+        ("streak table", lambda out: streak_table(out["ingest"], today)),
+        ("summary", lambda out: build_totals(out["ingest"], today)),
+        ("weights ingest", lambda out: prepare_weights(out["raw_weights"])),
+        ("weight table", lambda out: weight_table(out["weights ingest"])),
+        ("weight trend", lambda out: fit_trends(smooth(out["weights ingest"]))),
+        ("downsample", lambda out: downsample_lines(
+            out["weight table"], "Timestamp", "Current Weight", "User", WEIGHT_CHART_POINTS,
+        )),
+    ]
+
+
+# Bytes of a stage output: frames counted deeply, anything else as 0
+def _size(output):
+    if isinstance(output, pd.DataFrame):
+        return footprint(output)
+    if isinstance(output, pd.Series):
+        return int(output.memory_usage(deep=True))
+    if isinstance(output, tuple):
+        return sum(_size(part) for part in output)
+    if isinstance(output, RollupIndex):
+        return footprint(output.frame)
+    return 0
+
+
+# (median seconds over `repeat` runs, peak bytes allocated in one traced run, output)
+def measure(function, outputs, repeat):
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        output = function(outputs)
+        timings.append(time.perf_counter() - started)
+    gc.collect()
+    tracemalloc.start()
+    function(outputs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak, output
+
+
+# One result per stage for a data size
+def run_size(n_rows, n_users=None, repeat=3, seed=0, today=None):
+    today = today or datetime.today().date()
+    outputs = {
+        "raw_responses": synthetic.responses(n_rows, n_users, today=today, seed=seed),
+        "raw_weights": synthetic.weights(n_rows, n_users, today=today, seed=seed),
+    }
+    results = []
+    for stage, function in stages(today):
+        seconds, peak, outputs[stage] = measure(function, outputs, repeat)
+        results.append({
+            "rows": n_rows,
+            "users": n_users or synthetic.default_users(n_rows),
+            "stage": stage,
+            "seconds": seconds,
+            "rows_per_second": n_rows / seconds if seconds > 0 else None,
+            "peak_bytes": peak,
+            "output_bytes": _size(outputs[stage]),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and memory of each analytics stage across data sizes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="form responses per run")
+    parser.add_argument("--users", type=int, help="users (default: one per 500 rows, 5 to 5000)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage (the median is reported)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print one JSON line per stage and size")
+    args = parser.parse_args()
+
+    if not args.json:
+        print(f"{'rows':>10} {'stage':<16} {'seconds':>9} {'rows/s':>12} {'peak MB':>9} {'output MB':>10}")
+    for n_rows in args.sizes:
+        for result in run_size(n_rows, args.users, args.repeat, args.seed):
+            if args.json:
+                print(json.dumps(result), flush=True)
+            else:
+                print(
+                    f"{result['rows']:>10} {result['stage']:<16} {result['seconds']:>9.4f} "
+                    f"{result['rows_per_second'] or 0:>12,.0f} {result['peak_bytes'] / 1e6:>9.1f} "
+                    f"{result['output_bytes'] / 1e6:>10.2f}",
+                    flush=True,
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
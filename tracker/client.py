@@ -0,0 +1,72 @@
+import threading
+
+import streamlit as st
+
+from tracker.config import SCOPES, HTTP_POOL_SIZE, HTTP_TIMEOUT
+from tracker.lazy import LazyModule
+
+# Process-wide Google Sheets API client.
+# The service is built once per process, from the discovery document bundled
+# with google-api-python-client (no discovery download), and shared by every
+# session and the write queue. Its requests go through one requests
+# AuthorizedSession, so TLS connections are pooled and reused across reruns
+# (httplib2, the default transport, keeps one connection per Http object and
+# can't be shared between threads). The service account token is fetched when
+# the client is built and refreshed in the background once it is close to
+# expiry, so no request waits for a token unless it has actually expired.
+# The Google client libraries are only imported when the client is first built.
+
+requests_adapters = LazyModule("requests.adapters")
+google_requests = LazyModule("google.auth.transport.requests")
+service_account = LazyModule("google.oauth2.service_account")
+discovery = LazyModule("googleapiclient.discovery")
+
+_lock = threading.Lock()
+_service = None
+
+
+# httplib2.Response look-alike: lower-cased headers plus status and reason
+class HttpResponse(dict):
+
+    def __init__(self, status, reason, headers):
+        super().__init__((name.lower(), value) for name, value in headers.items())
+        self.status = status
+        self.reason = reason
+        self["status"] = str(status)
+
+
+# The httplib2.Http interface googleapiclient calls, on a pooled AuthorizedSession
+class PooledHttp:
+
+    def __init__(self, credentials, pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT):
+        self.credentials = credentials
+        self.timeout = timeout
+        self.session = google_requests.AuthorizedSession(credentials)
+        self.session.mount("https://", requests_adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        response = self.session.request(method, uri, data=body, headers=headers, timeout=self.timeout)
+        return HttpResponse(response.status_code, response.reason, response.headers), response.content
+
+    # Fetch a token now, over the pooled session
+    def refresh(self):
+        self.credentials.refresh(google_requests.Request(self.session))
+
+
+# Service account credentials from the app's secrets
+def load_credentials():
+    return service_account.Credentials.from_service_account_info(st.secrets["gcp_service_account"], scopes=SCOPES)
+
+
+# The shared Sheets service, built on first use
+def get_service():
+    global _service
+    with _lock:
+        if _service is None:
+            credentials = load_credentials()
+            # A token close to expiry is refreshed in the background while the old one is still used
+            credentials.with_non_blocking_refresh()
+            http = PooledHttp(credentials)
+            http.refresh()
+            _service = discovery.build("sheets", "v4", http=http, static_discovery=True, cache_discovery=False)
+        return _service
@@ -0,0 +1,148 @@
+import os
+
+# Shared configuration for the tracker pages
+
+# Google Sheet holding every worksheet used by the app
+SPREADSHEET_ID = "1dgjmSBRlBNNjQMQkj1jaFS6ml_uOTh0Gec5X1WsgCao"
+
+# Read and write access (the Log and Weight pages append rows)
+SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
+
+# Storage backend: "sheets" (Google Sheets), "local" (SQLite file, no network) or
+# "fake" (the SQLite file behind a simulated Sheets API, see tracker/fake_sheets.py)
+BACKEND = os.environ.get("TRACKER_BACKEND", "sheets")
+
+# Folder for the app's own files (mirror, summary, journal). Backends other than
+# the live sheet keep theirs apart, so submissions journaled against a local or
+# fake sheet are never replayed into the real spreadsheet.
+STATE_DIR = os.environ.get("TRACKER_STATE_DIR", ".tracker" if BACKEND == "sheets" else os.path.join(".tracker", BACKEND))
+
+# Connections kept open to the Sheets API, and seconds before a request times out
+HTTP_POOL_SIZE = 10
+HTTP_TIMEOUT = 60
+
+# Seconds a fetched sheet stays cached before the next read goes to the network.
+# Sheets written by the app are invalidated straight after each append, so they
+# can be cached as long as the rarely edited lookup sheets.
+SHEET_TTLS = {
+    "Raw_Form_Responses": 300,
+    "Weight_Tracker": 300,
+    "Weight_Targets": 300,
+    "App_Users": 600,
+    "Inspirational_Quotes": 3600,
+    "Regime": 3600,
+}
+
+# TTL for any sheet not listed above
+DEFAULT_TTL = 300
+
+# Append-only sheets kept in a local mirror and synced incrementally.
+# Maps the sheet name to its last column; only rows added since the previous
+# sync are downloaded.
+SYNCED_SHEETS = {
+    "Raw_Form_Responses": "R",
+    "Weight_Tracker": "D",
+    "Weight_Targets": "D",
+}
+
+# Seconds between full re-downloads of a synced sheet, to pick up manual edits
+RECONCILE_INTERVAL = 6 * 60 * 60
+
+# Local SQLite file holding the mirror of the synced sheets
+MIRROR_PATH = os.environ.get("TRACKER_MIRROR_PATH", os.path.join(STATE_DIR, "mirror.sqlite3"))
+
+# Rows requested per call when a whole sheet is read in chunks
+CHUNK_ROWS = 2000
+
+# SQLite file used by the local backend
+LOCAL_DB_PATH = os.environ.get("TRACKER_LOCAL_DB", os.path.join(".tracker", "local.sqlite3"))
+
+# Header row used when the local backend creates a sheet that was never imported.
+# Raw_Form_Responses follows the order the Log Your Activity page writes in.
+SHEET_HEADERS = {
+    "Raw_Form_Responses": [
+        "Timestamp", "Exercise Type", "Mood Prior", "Duration", "Optional: Distance (miles)",
+        "Part of Body", "Optional: Strength: Reps", "Intensity", "Mood After", "Notes", "User",
+    ],
+    "Weight_Tracker": ["Timestamp", "Current Weight", "User", "Target Date"],
+    "Weight_Targets": ["Timestamp", "User", "Target Weight", "Target Date"],
+    "App_Users": ["Number", "User"],
+    "Inspirational_Quotes": ["Number", "Quote", "Author"],
+    "Regime": ["Day of Week", "Type"],
+}
+
+# Columns the local backend indexes in each sheet
+LOCAL_INDEXES = {
+    "Raw_Form_Responses": ["User", "Exercise Type"],
+    "Weight_Tracker": ["User"],
+    "Weight_Targets": ["User"],
+    "App_Users": ["User"],
+    "Inspirational_Quotes": ["Number"],
+    "Regime": ["Day of Week"],
+}
+
+# SQLite file holding the per-user activity summary behind the overview cards
+SUMMARY_PATH = os.environ.get("TRACKER_SUMMARY_PATH", os.path.join(STATE_DIR, "summary.sqlite3"))
+
+# Built Plotly figures kept in memory (least recently used are dropped first)
+FIGURE_CACHE_SIZE = int(os.environ.get("TRACKER_FIGURE_CACHE_SIZE", 64))
+
+# Weight log rows above which the weight chart switches to high-volume mode:
+# WebGL traces with every user's line downsampled to WEIGHT_CHART_POINTS points
+HIGH_VOLUME_ROWS = int(os.environ.get("TRACKER_HIGH_VOLUME_ROWS", 5000))
+WEIGHT_CHART_POINTS = int(os.environ.get("TRACKER_WEIGHT_CHART_POINTS", 1000))
+
+# Appends go through the background write queue (tracker/writer.py) unless
+# TRACKER_WRITE_BEHIND=0, in which case append_data waits for the backend
+WRITE_BEHIND = os.environ.get("TRACKER_WRITE_BEHIND", "1") != "0"
+
+# Seconds the write queue waits for more rows before appending, so a burst is one call
+WRITE_LINGER = 0.05
+
+# Retries of a failed append: first delay in seconds (doubled on every retry), the
+# longest delay, and the attempts before the rows are set aside
+WRITE_RETRY_DELAY = 0.5
+WRITE_RETRY_MAX_DELAY = 30
+WRITE_MAX_ATTEMPTS = 8
+
+# Local write-ahead journal: every submission is stored here before it is sent
+JOURNAL_PATH = os.environ.get("TRACKER_JOURNAL_PATH", os.path.join(STATE_DIR, "journal.sqlite3"))
+
+# Days written submissions are kept in the journal
+JOURNAL_RETENTION_DAYS = 30
+
+# Seconds after a form submission during which submitting the same values again
+# counts as a double-click and reuses its submission ID (so it is logged once)
+SUBMISSION_REPEAT_SECONDS = 10
+
+# Column holding each row's submission ID, past the range the pages read
+SUBMISSION_ID_COLUMNS = {
+    "Raw_Form_Responses": "S",
+    "Weight_Tracker": "E",
+    "Weight_Targets": "E",
+}
+
+# Simulated Sheets API behind TRACKER_BACKEND=fake: seconds added to every request
+# (plus up to FAKE_JITTER more), the shares of requests answered with a 503 and
+# with a 429, and read and write requests allowed per minute before the quota
+# is exhausted (0 for no quota; the live API allows 60 of each per user).
+# FAKE_SHEETS_URL points the app at a fake server shared by several processes.
+FAKE_LATENCY = float(os.environ.get("TRACKER_FAKE_LATENCY", 0.1))
+FAKE_JITTER = float(os.environ.get("TRACKER_FAKE_JITTER", 0.05))
+FAKE_ERROR_RATE = float(os.environ.get("TRACKER_FAKE_ERROR_RATE", 0))
+FAKE_THROTTLE_RATE = float(os.environ.get("TRACKER_FAKE_THROTTLE_RATE", 0))
+FAKE_READ_QUOTA = int(os.environ.get("TRACKER_FAKE_READ_QUOTA", 0))
+FAKE_WRITE_QUOTA = int(os.environ.get("TRACKER_FAKE_WRITE_QUOTA", 0))
+FAKE_SHEETS_URL = os.environ.get("TRACKER_FAKE_SHEETS_URL", "")
+
+# Rerun stage timings (tracker/timing.py). The sidebar panel with the current
+# rerun's breakdown is shown on every page with TRACKER_DEBUG_PANEL=1, or in one
+# session by opening a page with ?debug=1. With TRACKER_METRICS_PATH set, p50/p95
+# per page and stage over the last METRICS_WINDOW reruns are written there every
+# METRICS_INTERVAL seconds (Prometheus text for a .prom path, else JSON lines
+# holding the last METRICS_KEEP snapshots).
+DEBUG_PANEL = os.environ.get("TRACKER_DEBUG_PANEL", "0") != "0"
+METRICS_PATH = os.environ.get("TRACKER_METRICS_PATH", "")
+METRICS_WINDOW = int(os.environ.get("TRACKER_METRICS_WINDOW", 200))
+METRICS_INTERVAL = float(os.environ.get("TRACKER_METRICS_INTERVAL", 60))
+METRICS_KEEP = int(os.environ.get("TRACKER_METRICS_KEEP", 60))
@@ -0,0 +1,250 @@
+import atexit
+import itertools
+import threading
+import time
+
+import pandas as pd
+
+from tracker import journal
+from tracker.config import SHEET_TTLS, DEFAULT_TTL, CHUNK_ROWS, WRITE_BEHIND
+from tracker.storage import get_backend
+from tracker.timing import span
+from tracker.writer import WriteQueue
+
+# Shared data access for every page.
+# Imported modules live for the whole Streamlit process, so the cache below is
+# shared by all sessions and survives reruns: only the first read of a sheet (or
+# the first read after its TTL expires or a write) goes to the storage backend
+# (Google Sheets, or the local SQLite engine when TRACKER_BACKEND=local).
+
+_lock = threading.Lock()
+_cache = {}  # (sheet_name, range_name) -> (fetched_at, DataFrame, version)
+_row_counts = {}  # sheet_name -> (counted_at, rows including the header)
+_versions = itertools.count(1)  # every fresh read gets a new data version
+_ttls = dict(SHEET_TTLS)
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+_append_listeners = []
+_write_queue = None
+_replayed = False
+
+
+# Turn a list of rows (header first) into a DataFrame
+def rows_to_frame(data):
+    if data:
+        header = data[0]
+        # Ensures each row has the same number of elements as the header by
+        # appending None values for any missing columns and dropping cells past
+        # the last header (such as submission IDs)
+        rows = [row[:len(header)] + [None] * (len(header) - len(row)) for row in data[1:]]
+        return pd.DataFrame(rows, columns=header)
+    else:
+        return pd.DataFrame()  # Return an empty DataFrame if no data
+
+
+# Change how long a sheet stays cached (seconds)
+def set_ttl(sheet_name, seconds):
+    with _lock:
+        _ttls[sheet_name] = seconds
+
+
+def get_ttl(sheet_name):
+    return _ttls.get(sheet_name, DEFAULT_TTL)
+
+
+# Function to fetch data from a specific sheet, served from the cache while fresh
+def fetch_data(sheet_name, range_name):
+    return fetch_many([(sheet_name, range_name)])[0]
+
+
+# Fetch several (sheet_name, range_name) pairs at once.
+# Cache misses are handed to the backend in one call; the Sheets backend turns
+# them into a single values().batchGet round trip.
+def fetch_many(requests):
+    return [df.copy() for df, _ in fetch_versioned(requests)]
+
+
+# Like fetch_many, but returns (DataFrame, version) pairs without copying.
+# The frames are shared by every session and must not be modified; the version
+# changes whenever the range is read again, so it can key derived caches.
+def fetch_versioned(requests):
+    now = time.monotonic()
+    entries = [None] * len(requests)
+    missing = []
+    with _lock:
+        for i, (sheet_name, range_name) in enumerate(requests):
+            entry = _cache.get((sheet_name, range_name))
+            if entry is not None and now - entry[0] < get_ttl(sheet_name):
+                _stats["hits"] += 1
+                entries[i] = entry[1:]
+            else:
+                _stats["misses"] += 1
+                missing.append(i)
+
+    if missing:
+        with span("fetch"):
+            results = get_backend().read_ranges([tuple(requests[i]) for i in missing])
+        with span("build frames"):
+            frames = [rows_to_frame(values) for values in results]
+        with _lock:
+            for i, df in zip(missing, frames):
+                entries[i] = (df, next(_versions))
+                _cache[tuple(requests[i])] = (now, *entries[i])
+
+    return entries
+
+
+# Rows in a sheet (header included) without reading them, cached and
+# invalidated like a read of the sheet
+def row_count(sheet_name):
+    now = time.monotonic()
+    with _lock:
+        entry = _row_counts.get(sheet_name)
+    if entry is not None and now - entry[0] < get_ttl(sheet_name):
+        return entry[1]
+    with span("fetch"):
+        rows = get_backend().row_count(sheet_name)
+    with _lock:
+        _row_counts[sheet_name] = (now, rows)
+    return rows
+
+
+# Function to append a row to a sheet. The row is first recorded in the local
+# journal under submission_id (a new ID when none is given); a submission_id
+# that was recorded before is a repeated submission and is not written again.
+# With WRITE_BEHIND (the default) the row is then handed to the background write
+# queue and the call returns at once; otherwise it is written before returning.
+# Returns False for a repeated submission, which was not written again.
+def append_data(sheet_name, values, submission_id=None):
+    with span("append"):
+        _replay_once()
+        submission_id = submission_id or journal.new_submission_id()
+        if not journal.record(sheet_name, values, submission_id):
+            return False
+        row = journal.with_id(sheet_name, values, submission_id)
+        if WRITE_BEHIND:
+            write_queue().submit(sheet_name, row)
+        else:
+            append_rows_now(sheet_name, [row])
+        return True
+
+
+# Append rows to a sheet straight away
+def append_rows_now(sheet_name, rows):
+    result = _append_rows(sheet_name, rows)
+    _rows_written(sheet_name, rows)
+    return result
+
+
+# Write journaled rows to the backend. Rows handed to the backend before may
+# already be in the sheet (e.g. a timeout after the append went through), so
+# their IDs are looked up in the sheet first and only the missing rows are sent.
+def _append_rows(sheet_name, rows):
+    ids = [journal.row_id(sheet_name, row) for row in rows]
+    if journal.attempted(ids):
+        present = journal.present_ids(sheet_name)
+        journal.mark_written([submission_id for submission_id in ids if submission_id in present])
+        rows = [row for row, submission_id in zip(rows, ids) if submission_id not in present]
+    journal.mark_attempted(ids)
+    result = get_backend().append_rows(sheet_name, rows) if rows else None
+    journal.mark_written(ids)
+    return result
+
+
+# Send every journaled submission not known to be written, e.g. after a crash or
+# a batch the write queue gave up on; returns how many were sent
+def replay_journal(older_than=0, wait=False):
+    journal.prune()
+    entries = journal.pending(older_than)
+    if WRITE_BEHIND:
+        for sheet_name, row in entries:
+            write_queue().submit(sheet_name, row)
+        if wait:
+            write_queue().flush()
+    else:
+        sheets = {}
+        for sheet_name, row in entries:
+            sheets.setdefault(sheet_name, []).append(row)
+        for sheet_name, rows in sheets.items():
+            append_rows_now(sheet_name, rows)
+    return len(entries)
+
+
+# Replay what a previous run of the app left in the journal before the first new write
+def _replay_once():
+    global _replayed
+    with _lock:
+        if _replayed:
+            return
+        _replayed = True
+    replay_journal()
+
+
+# Once rows are in a sheet, the append listeners are told and cached reads of it are dropped
+def _rows_written(sheet_name, rows):
+    for listener in list(_append_listeners):
+        listener(sheet_name, rows)
+    invalidate(sheet_name)
+
+
+# The process-wide write queue behind append_data, created on first use.
+# Rows still queued when the process exits get a few seconds to be written.
+def write_queue():
+    global _write_queue
+    with _lock:
+        if _write_queue is None:
+            _write_queue = WriteQueue(_append_rows, _rows_written)
+            atexit.register(_write_queue.flush, 10)
+        return _write_queue
+
+
+# Rows waiting to be written, retry and failure counts and flush latency, e.g. for a debug panel
+def write_queue_stats():
+    return write_queue().stats()
+
+
+# Register listener(sheet_name, rows), called after rows are written to a sheet,
+# so state derived from a sheet can be updated without re-reading it
+def add_append_listener(listener):
+    if listener not in _append_listeners:
+        _append_listeners.append(listener)
+
+
+# Drop cached reads for one sheet, or for every sheet when no name is given
+def invalidate(sheet_name=None):
+    with _lock:
+        keys = [key for key in _cache if sheet_name is None or key[0] == sheet_name]
+        for key in keys:
+            del _cache[key]
+        for name in [name for name in _row_counts if sheet_name is None or name == sheet_name]:
+            del _row_counts[name]
+        _stats["invalidations"] += 1
+
+
+# Cache hit/miss counters, e.g. for a debug panel
+def cache_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats["entries"] = len(_cache)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
+
+
+# Row and column count of every sheet in the backend
+def sheet_extents():
+    return get_backend().extents()
+
+
+# Stream a sheet as DataFrame batches sharing the header from its first row.
+# The backend reads it CHUNK_ROWS rows at a time, so memory stays bounded by the
+# chunk size and the first batch can be processed before the rest has arrived.
+def iter_sheet(sheet_name, last_column=None, chunk_rows=CHUNK_ROWS):
+    header = None
+    for rows in get_backend().iter_rows(sheet_name, last_column, chunk_rows):
+        if header is None:
+            if not rows:
+                return
+            header, rows = rows[0], rows[1:]
+        rows = [row for row in rows if row]
+        if rows:
+            yield rows_to_frame([header] + rows)
@@ -0,0 +1,72 @@
+import pandas as pd
+import streamlit as st
+
+from tracker.config import DEBUG_PANEL
+from tracker.timing import finish_rerun, stage_metrics
+
+# Sidebar panel with where the current rerun spent its time.
+# Every page ends with show_rerun_timings(), which finishes the rerun's timing
+# (tracker/timing.py) and, when the panel is on (TRACKER_DEBUG_PANEL=1, or
+# ?debug=1 in the URL for one session), lists the rerun's stages, the p50/p95
+# of each stage over this page's recent reruns in this process, and the state
+# of the sheet and figure caches, the write queue, the journal and the frames.
+
+
+def panel_enabled():
+    return DEBUG_PANEL or st.query_params.get("debug") == "1"
+
+
+def show_rerun_timings():
+    rerun = finish_rerun()
+    if rerun is None or not panel_enabled():
+        return
+    # Only imported with the panel on, so the Log page doesn't load plotly for it
+    from tracker.data import cache_stats, write_queue_stats
+    from tracker.figures import figure_cache_stats
+    from tracker.ingest import memory_report
+    from tracker.journal import journal_stats
+
+    with st.sidebar.expander("Rerun timings", expanded=True):
+        st.markdown(f"**{rerun['seconds'] * 1000:.0f} ms** for this rerun")
+        # Top-level stages add up to the timed part of the rerun; the rest is page code
+        untimed = rerun["seconds"] - sum(seconds for path, _, seconds in rerun["breakdown"] if len(path) == 1)
+        rows = [
+            ("· " * (len(path) - 1) + path[-1], calls, seconds * 1000, seconds / rerun["seconds"])
+            for path, calls, seconds in rerun["breakdown"]
+        ]
+        rows.append(("other page code", 1, untimed * 1000, untimed / rerun["seconds"]))
+        st.dataframe(
+            pd.DataFrame(rows, columns=["Stage", "Calls", "ms", "Share"]),
+            hide_index=True,
+            column_config={
+                "ms": st.column_config.NumberColumn(format="%.1f"),
+                "Share": st.column_config.ProgressColumn(min_value=0, max_value=1, format="%.2f"),
+            },
+        )
+
+        st.markdown("Recent reruns of this page")
+        recent = pd.DataFrame(stage_metrics(rerun["page"]))
+        st.dataframe(
+            pd.DataFrame({
+                "Stage": recent["stage"],
+                "Reruns": recent["window"],
+                "p50 ms": recent["p50"] * 1000,
+                "p95 ms": recent["p95"] * 1000,
+            }).sort_values("p95 ms", ascending=False),
+            hide_index=True,
+            column_config={
+                "p50 ms": st.column_config.NumberColumn(format="%.1f"),
+                "p95 ms": st.column_config.NumberColumn(format="%.1f"),
+            },
+        )
+
+        sheets, figures = cache_stats(), figure_cache_stats()
+        queue, journaled = write_queue_stats(), journal_stats()
+        st.caption(
+            f"Sheet cache: {sheets['hits']} hits, {sheets['misses']} misses ({sheets['hit_rate']:.0%}), "
+            f"{sheets['entries']} ranges  \n"
+            f"Figure cache: {figures['hits']} hits, {figures['misses']} misses, {figures['entries']} figures  \n"
+            f"Write queue: {queue['depth']} waiting, {queue['retrying']} sheets retrying, {queue['failed']} failed  \n"
+            f"Journal: {journaled['waiting']} of {journaled['journaled']} submissions waiting"
+        )
+        st.dataframe(memory_report(), hide_index=True)
@@ -0,0 +1,96 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Calendar dimension shared by the pages.
+# One row per (date, hour) with the ISO year and week, the weekday, the week's
+# Monday and its "Week 7 2025 [2025-02-10 - 2025-02-16]" label, and the time of
+# day bucket. It is built once for the span of dates in the data, grown when a
+# date outside it turns up, and joined by position (day offset * 24 + hour),
+# so no page derives calendar fields row by row.
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Times of day in display order
+TIME_OF_DAY_ORDER = ["Morning", "Afternoon", "Evening", "Night"]
+
+CALENDAR_COLUMNS = ["Date", "Hour", "ISO Year", "ISO Week", "Weekday", "Day of Week", "Week Start", "Week Label", "Time of Day"]
+
+_lock = threading.Lock()
+_calendar = None  # (first day as datetime64[D], calendar DataFrame)
+
+
+# Classify hours (0-23) as Morning 6-12, Afternoon 12-17, Evening 17-21 or Night
+def time_of_day(hours):
+    hours = np.asarray(hours)
+    return np.select(
+        [(hours >= 6) & (hours < 12), (hours >= 12) & (hours < 17), (hours >= 17) & (hours < 21)],
+        TIME_OF_DAY_ORDER[:3],
+        TIME_OF_DAY_ORDER[3],
+    )
+
+
+# Label shown for an ISO week, e.g. "Week 7 2025 [2025-02-10 - 2025-02-16]"
+def week_label(year, week, week_start):
+    week_start = pd.Timestamp(week_start).date()
+    return f"Week {week} {year} [{week_start} - {week_start + pd.Timedelta(days=6)}]"
+
+
+# Calendar rows for every hour of every day from first_day to last_day (datetime64[D])
+def build_calendar(first_day, last_day):
+    days = np.arange(first_day, last_day + np.timedelta64(1, "D"), dtype="datetime64[D]")
+    iso = pd.DatetimeIndex(days).isocalendar()
+    years = iso["year"].to_numpy(dtype=np.int16)
+    weeks = iso["week"].to_numpy(dtype=np.int8)
+    weekdays = (iso["day"].to_numpy() - 1).astype(np.int8)
+    week_starts = days - weekdays.astype("timedelta64[D]")
+
+    # One label per week rather than per day
+    _, first_of_week, week_codes = np.unique(week_starts, return_index=True, return_inverse=True)
+    week_labels = [week_label(years[i], weeks[i], week_starts[i]) for i in first_of_week]
+
+    hours = np.arange(24, dtype=np.int8)
+    calendar = pd.DataFrame({
+        "Date": np.repeat(days, 24).astype("datetime64[ns]"),
+        "Hour": np.tile(hours, len(days)),
+        "ISO Year": np.repeat(years, 24),
+        "ISO Week": np.repeat(weeks, 24),
+        "Weekday": np.repeat(weekdays, 24),
+        "Day of Week": pd.Categorical.from_codes(np.repeat(weekdays, 24), DAY_NAMES),
+        "Week Start": np.repeat(week_starts, 24).astype("datetime64[ns]"),
+        "Week Label": pd.Categorical.from_codes(np.repeat(week_codes, 24), week_labels),
+        "Time of Day": pd.Categorical(np.tile(time_of_day(hours), len(days)), categories=TIME_OF_DAY_ORDER),
+    }, columns=CALENDAR_COLUMNS)
+    return calendar
+
+
+# The cached calendar, grown to cover first_day..last_day if needed
+def load_calendar(first_day, last_day):
+    global _calendar
+    first_day, last_day = np.datetime64(first_day, "D"), np.datetime64(last_day, "D")
+    with _lock:
+        entry = _calendar
+    if entry is not None and entry[0] <= first_day and last_day < entry[0] + len(entry[1]) // 24:
+        return entry
+    if entry is not None:
+        first_day = min(first_day, entry[0])
+        last_day = max(last_day, entry[0] + len(entry[1]) // 24 - 1)
+    entry = (first_day, build_calendar(first_day, last_day))
+    with _lock:
+        _calendar = entry
+    return entry
+
+
+# Calendar fields for a column of dates (and optionally hours, 0 otherwise), row for row
+def join_calendar(dates, hours=None, columns=None):
+    days = np.asarray(dates, dtype="datetime64[D]")
+    columns = columns or CALENDAR_COLUMNS
+    if len(days) == 0:
+        return pd.DataFrame({column: [] for column in columns})
+    first_day, calendar = load_calendar(days.min(), days.max())
+    positions = (days - first_day).astype(np.int64) * 24
+    if hours is not None:
+        positions += np.asarray(hours, dtype=np.int64)
+    return calendar[columns].take(positions).reset_index(drop=True)
+
@@ -0,0 +1,55 @@
+import numpy as np
+
+# Largest-Triangle-Three-Buckets downsampling for line charts.
+# The first and last points are kept and the rest of the series is split into
+# equal buckets; from each bucket the point forming the largest triangle with
+# the previously kept point and the average of the next bucket is kept. Peaks
+# and troughs survive, so a few hundred points per line look like the full log.
+
+
+# Indices of at most n_out points of (x, y) chosen by LTTB; x must be sorted and numeric
+def lttb(x, y, n_out):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Bucket i (0..n_out-3) covers points edges[i]:edges[i + 1]; the first and last points stand alone
+    edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    # Average point of every bucket, and of the final single point, from cumulative sums
+    bounds = np.append(edges, n)
+    x_sums = np.add.reduceat(x[1:], bounds[:-1] - 1)
+    y_sums = np.add.reduceat(y[1:], bounds[:-1] - 1)
+    sizes = np.diff(bounds)
+    x_means, y_means = x_sums / sizes, y_sums / sizes
+
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Twice the triangle area for every candidate in the bucket
+        areas = np.abs(
+            (x[previous] - x_means[i + 1]) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (y_means[i + 1] - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        kept[i + 1] = previous
+    return kept
+
+
+# Rows of df kept when every `group` line (sorted by x) is downsampled to n_out points
+def downsample_lines(df, x, y, group, n_out):
+    df = df.dropna(subset=[x, y]).sort_values(x, kind="stable")
+    x_values = df[x].to_numpy()
+    if x_values.dtype.kind == "M":
+        x_values = x_values.astype("datetime64[ns]").astype(np.int64)
+    y_values = df[y].to_numpy()
+    kept = []
+    for positions in df.groupby(group, observed=True, sort=False).indices.values():
+        kept.append(positions[lttb(x_values[positions], y_values[positions], n_out)])
+    if not kept:
+        return df
+    return df.take(np.sort(np.concatenate(kept)))
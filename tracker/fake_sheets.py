@@ -0,0 +1,279 @@
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from tracker.a1 import column_letter
+from tracker.client import HttpResponse, PooledHttp
+from tracker.config import (
+    SPREADSHEET_ID, FAKE_LATENCY, FAKE_JITTER, FAKE_ERROR_RATE, FAKE_THROTTLE_RATE,
+    FAKE_READ_QUOTA, FAKE_WRITE_QUOTA, FAKE_SHEETS_URL,
+)
+from tracker.lazy import LazyModule
+from tracker.local import LocalBackend
+
+# Stand-in for the Google Sheets API over local tables.
+# FakeSheetsApi answers the requests the app makes (values.get, values.batchGet,
+# values.append and the spreadsheets.get metadata call) from a LocalBackend
+# database, with the URLs, JSON bodies and error responses of the real API.
+# Every request is delayed by the configured latency, a share of them fail with
+# 503 or 429, and read and write requests beyond the per-minute quotas get the
+# API's quota-exceeded 429, so the app's retries, write queue and journal see
+# what they would see in production. It is reached either in-process, through
+# FakeSheetsHttp handed to googleapiclient in place of the HTTP transport, or
+# over HTTP from serve(), so that several app processes share one quota.
+#
+# TRACKER_BACKEND=fake runs the app against it (tables from TRACKER_LOCAL_DB,
+# behaviour from the FAKE_* settings in tracker/config.py). Serve one for several
+# processes, which then set TRACKER_FAKE_SHEETS_URL, with:
+#     python -m tracker.fake_sheets --port 8765
+
+auth_credentials = LazyModule("google.auth.credentials")
+discovery = LazyModule("googleapiclient.discovery")
+
+# Columns read when a range names only the sheet
+_WHOLE_SHEET = "A:ZZZ"
+
+_ERRORS = {
+    429: ("RESOURCE_EXHAUSTED", "Quota exceeded for quota metric '{kind} requests' and limit "
+                                "'{kind} requests per minute per user' of service 'sheets.googleapis.com'."),
+    503: ("UNAVAILABLE", "The service is currently unavailable."),
+}
+
+
+class FakeSheetsApi:
+
+    def __init__(self, tables, spreadsheet_id=SPREADSHEET_ID, latency=0.0, jitter=0.0,
+                 error_rate=0.0, throttle_rate=0.0, read_quota=0, write_quota=0, seed=None):
+        self.tables = tables
+        self.spreadsheet_id = spreadsheet_id
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.quotas = {"Read": read_quota, "Write": write_quota}
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._recent = {"Read": deque(), "Write": deque()}  # request times inside the last minute
+        self._stats = {}  # (operation, status) -> requests
+
+    # (status, JSON body) for one request; `url` may be a full URL or a path and query
+    def handle(self, method, url, body=None):
+        parts = urlsplit(url)
+        query = parse_qs(parts.query)
+        operation, argument = self._route(method, parts.path)
+        kind = "Write" if operation == "append" else "Read"
+
+        status = self._admit(kind) if operation else 404
+        if status == 200:
+            try:
+                if operation == "get":
+                    payload = self._metadata()
+                elif operation == "values.get":
+                    payload = self._values(argument)
+                elif operation == "batchGet":
+                    payload = {
+                        "spreadsheetId": self.spreadsheet_id,
+                        "valueRanges": [self._values(range_name) for range_name in query.get("ranges", [])],
+                    }
+                else:
+                    payload = self._append(argument, json.loads(body or b"{}").get("values", []))
+            except ValueError as error:
+                status, payload = 400, _error(400, "INVALID_ARGUMENT", str(error))
+        elif status == 404:
+            payload = _error(404, "NOT_FOUND", "Requested entity was not found.")
+        else:
+            payload = _error(status, _ERRORS[status][0], _ERRORS[status][1].format(kind=kind))
+
+        with self._lock:
+            key = (operation or "unknown", status)
+            self._stats[key] = self._stats.get(key, 0) + 1
+        return status, payload
+
+    # (operation, range) for a request path, or (None, None) for anything else
+    def _route(self, method, path):
+        prefix = f"/v4/spreadsheets/{self.spreadsheet_id}"
+        if not path.startswith(prefix):
+            return None, None
+        rest = path[len(prefix):]
+        if method == "GET" and rest == "":
+            return "get", None
+        if method == "GET" and rest == "/values:batchGet":
+            return "batchGet", None
+        if rest.startswith("/values/"):
+            range_name = rest[len("/values/"):]
+            if method == "POST" and range_name.endswith(":append"):
+                return "append", unquote(range_name[:-len(":append")])
+            if method == "GET":
+                return "values.get", unquote(range_name)
+        return None, None
+
+    # Wait out the latency, then 200 or the injected error for this request
+    def _admit(self, kind):
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            roll = self._random.random()
+        time.sleep(delay)
+        if roll < self.error_rate:
+            return 503
+        if roll < self.error_rate + self.throttle_rate:
+            return 429
+        quota = self.quotas[kind]
+        if quota:
+            now = time.monotonic()
+            with self._lock:
+                recent = self._recent[kind]
+                while recent and recent[0] <= now - 60:
+                    recent.popleft()
+                if len(recent) >= quota:
+                    return 429
+                recent.append(now)
+        return 200
+
+    def _sheet_and_range(self, range_name):
+        sheet_name, _, cells = range_name.rpartition("!")
+        if not sheet_name:
+            sheet_name, cells = cells, _WHOLE_SHEET
+        if sheet_name.startswith("'") and sheet_name.endswith("'"):
+            sheet_name = sheet_name[1:-1].replace("''", "'")
+        if sheet_name not in self.tables.extents():
+            raise ValueError(f"Unable to parse range: {range_name}")
+        return sheet_name, cells
+
+    def _values(self, range_name):
+        sheet_name, cells = self._sheet_and_range(range_name)
+        (rows,) = self.tables.read_ranges([(sheet_name, cells)])
+        value_range = {"range": f"{sheet_name}!{cells}", "majorDimension": "ROWS"}
+        # Like the API, an empty range has no values key at all
+        if rows:
+            value_range["values"] = rows
+        return value_range
+
+    def _append(self, range_name, rows):
+        sheet_name, _ = self._sheet_and_range(range_name)
+        last_row, _ = self.tables.extents()[sheet_name]
+        self.tables.append_rows(sheet_name, rows)
+        width = max((len(row) for row in rows), default=0)
+        updated_range = f"{sheet_name}!A{last_row + 1}:{column_letter(max(width - 1, 0))}{last_row + len(rows)}"
+        return {
+            "spreadsheetId": self.spreadsheet_id,
+            "updates": {
+                "spreadsheetId": self.spreadsheet_id,
+                "updatedRange": updated_range,
+                "updatedRows": len(rows),
+                "updatedColumns": width,
+                "updatedCells": sum(len(row) for row in rows),
+            },
+        }
+
+    def _metadata(self):
+        return {
+            "spreadsheetId": self.spreadsheet_id,
+            "sheets": [
+                {"properties": {"title": title, "gridProperties": {"rowCount": rows, "columnCount": columns}}}
+                for title, (rows, columns) in self.tables.extents().items()
+            ],
+        }
+
+    # Requests answered so far, by operation and status
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+
+def _error(code, status, message):
+    return {"error": {"code": code, "message": message, "status": status}}
+
+
+# The httplib2.Http interface googleapiclient calls, answered by a FakeSheetsApi in-process
+class FakeSheetsHttp:
+
+    def __init__(self, api):
+        self.api = api
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        status, payload = self.api.handle(method, uri, body)
+        content = json.dumps(payload).encode()
+        reason = "OK" if status == 200 else payload["error"]["status"]
+        return HttpResponse(status, reason, {"content-type": "application/json; charset=UTF-8"}), content
+
+
+# Serve a FakeSheetsApi over HTTP from a background thread (port 0 picks a free
+# port); the app reaches it with TRACKER_FAKE_SHEETS_URL=http://host:port
+def serve(api, host="127.0.0.1", port=0):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def answer(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            status, payload = api.handle(self.command, self.path, self.rfile.read(length) if length else None)
+            content = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        do_GET = do_POST = answer
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# The API configured by the FAKE_* settings over the local database
+def configured_api(tables=None, seed=None):
+    return FakeSheetsApi(
+        tables or LocalBackend(),
+        latency=FAKE_LATENCY,
+        jitter=FAKE_JITTER,
+        error_rate=FAKE_ERROR_RATE,
+        throttle_rate=FAKE_THROTTLE_RATE,
+        read_quota=FAKE_READ_QUOTA,
+        write_quota=FAKE_WRITE_QUOTA,
+        seed=seed,
+    )
+
+
+# Sheets backend for TRACKER_BACKEND=fake: the real SheetsBackend and googleapiclient
+# service, talking to a fake server at FAKE_SHEETS_URL or to one in this process
+def fake_backend():
+    from tracker.sheets import SheetsBackend
+
+    if FAKE_SHEETS_URL:
+        http = PooledHttp(auth_credentials.AnonymousCredentials())
+        client_options = {"api_endpoint": FAKE_SHEETS_URL}
+    else:
+        http = FakeSheetsHttp(configured_api())
+        client_options = None
+    service = discovery.build(
+        "sheets", "v4", http=http, static_discovery=True, cache_discovery=False, client_options=client_options,
+    )
+    return SheetsBackend(service=service)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the fake Sheets API over the local database")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    api = configured_api()
+    server = serve(api, args.host, args.port)
+    print(f"Fake Sheets API on http://{args.host}:{server.server_port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        for (operation, status), count in sorted(api.stats().items()):
+            print(f"{operation} {status}: {count}")
@@ -0,0 +1,83 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from tracker.config import FIGURE_CACHE_SIZE
+from tracker.lazy import LazyModule
+from tracker.timing import span
+
+# Cache of built Plotly figures.
+# Building a figure (px.line over a long weight log, the heatmaps) costs far more
+# than sending it, and most reruns only touch an unrelated widget. Built figures
+# are kept keyed on (figure name, data version, filter tuple), so a rerun with
+# the same data and filters hands the same go.Figure to st.plotly_chart, which
+# only has to copy and serialize it (a plain dict would be validated again).
+# px stores date axes as object arrays of datetimes, which are copied and
+# encoded one element at a time; they are turned into datetime64 arrays once
+# when the figure is cached, so sending it is mostly array work. The cache
+# holds FIGURE_CACHE_SIZE figures and drops the least recently used beyond that.
+
+# Imported with the first user_colors() call, from inside a figure build, so
+# a rerun served from the cache doesn't load plotly
+plotly_colors = LazyModule("plotly.colors")
+
+_lock = threading.Lock()
+_figures = OrderedDict()  # (name, version, filters) -> go.Figure
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+# The figure for (name, version, filters), calling build() to make the plotly
+# Figure only when it is not cached. filters must be hashable (tuples of the
+# page's filter selections). The figure is shared by every session, so it must
+# not be modified; a page that changes it should work on go.Figure(figure).
+def cached_figure(name, version, filters, build):
+    key = (name, version, filters)
+    with _lock:
+        figure = _figures.get(key)
+        if figure is not None:
+            _figures.move_to_end(key)
+            _stats["hits"] += 1
+    if figure is None:
+        with span("build figure"):
+            figure = _with_datetime64(build())
+        with _lock:
+            _stats["misses"] += 1
+            _figures[key] = figure
+            _figures.move_to_end(key)
+            while len(_figures) > FIGURE_CACHE_SIZE:
+                _figures.popitem(last=False)
+                _stats["evictions"] += 1
+    return figure
+
+
+# Replace object arrays of naive datetimes in the traces' x and y with datetime64
+# arrays (the same values and JSON, far cheaper to copy and encode on every send)
+def _with_datetime64(figure):
+    for trace in figure.data:
+        for axis in ("x", "y"):
+            values = getattr(trace, axis, None)
+            if isinstance(values, np.ndarray) and values.dtype == object and len(values):
+                try:
+                    dates = pd.DatetimeIndex(values)
+                except (TypeError, ValueError):
+                    continue
+                if dates.tz is None:
+                    trace[axis] = dates.to_numpy()
+    return figure
+
+
+# Hit, miss and eviction counters and the number of cached figures
+def figure_cache_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats["entries"] = len(_figures)
+    return stats
+
+
+# A colour for every user that only depends on their place in `users` (the
+# App_Users order), so a user keeps their colour whichever users are selected
+def user_colors(users):
+    palette = plotly_colors.qualitative.Plotly
+    return {user: palette[i % len(palette)] for i, user in enumerate(users)}
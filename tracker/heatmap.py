@@ -0,0 +1,31 @@
+import numpy as np
+
+# Week-by-weekday session counts for the heatmaps.
+# Every day is encoded as an integer week code and weekday: 1970-01-01 was a
+# Thursday, so (day number + 3) // 7 numbers the ISO weeks (Monday to Sunday)
+# one after another and (day number + 3) % 7 is the weekday, Monday = 0. The
+# whole (weeks x 7) count matrix then comes out of a single np.bincount, and
+# the overall and weekly heatmaps are slices of that dense array.
+
+
+# Week code and weekday (Monday = 0) of every date
+def week_codes(dates):
+    days = np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+    return (days + 3) // 7, (days + 3) % 7
+
+
+# Monday of each week code
+def week_starts(codes):
+    return (np.asarray(codes, dtype=np.int64) * 7 - 3).astype("datetime64[D]")
+
+
+# Dense (n_weeks, 7) matrix of summed weights (session counts) per week and weekday,
+# covering every week from the first to the last date, and the Monday of each row
+def weekday_matrix(dates, weights=None):
+    codes, weekdays = week_codes(dates)
+    if len(codes) == 0:
+        return np.zeros((0, 7), dtype=np.int64), week_starts([])
+    first_week = codes.min()
+    n_weeks = int(codes.max() - first_week + 1)
+    counts = np.bincount((codes - first_week) * 7 + weekdays, weights=weights, minlength=n_weeks * 7)
+    return counts.reshape(n_weeks, 7).astype(np.int64), week_starts(np.arange(first_week, first_week + n_weeks))
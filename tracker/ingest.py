@@ -0,0 +1,149 @@
+import threading
+
+import pandas as pd
+
+from tracker.data import fetch_versioned
+from tracker.schema import INTENSITY_SCORES, RESPONSE_VOCABULARIES, NUMERIC_DTYPE, categorize, footprint
+from tracker.timing import span
+
+# Typed ingestion of the Raw_Form_Responses and Weight_Tracker sheets.
+# Every column is parsed exactly once per data version and the typed frame is
+# shared by every page and session, so a rerun that only changed a filter
+# reuses the parsed frame instead of converting the strings again. The typed
+# frames use the compact schema in tracker/schema.py.
+
+RESPONSES_SHEET = "Raw_Form_Responses"
+RESPONSES_RANGE = "A1:R"
+
+WEIGHTS_SHEET = "Weight_Tracker"
+WEIGHTS_RANGE = "A1:D"
+
+# Timestamps are written as "%d/%m/%Y %H:%M:%S" by the form and the Log page
+TIMESTAMP_FORMAT = "%d/%m/%Y %H:%M:%S"
+
+# Friendlier names for the optional form questions
+RESPONSE_RENAMES = {
+    "Optional: Distance (miles)": "Distance in Miles",
+    "Optional: Strength: Reps": "Reps",
+}
+
+NUMERIC_COLUMNS = ["Duration", "Distance in Miles", "Reps"]
+
+# Columns every typed frame has, even when the sheet is empty
+REQUIRED_COLUMNS = ["Timestamp", "Exercise Type", "User", "Intensity"] + NUMERIC_COLUMNS
+WEIGHT_COLUMNS = ["Timestamp", "Current Weight", "User", "Target Date"]
+
+_lock = threading.Lock()
+_prepared = {}  # (sheet_name, range_name) -> (version, typed DataFrame)
+
+
+# Parse the timestamps with the explicit format; only the few cells that do not
+# match (e.g. edited by hand without seconds) fall back to day-first inference
+def parse_timestamps(values):
+    parsed = pd.to_datetime(values, format=TIMESTAMP_FORMAT, errors="coerce")
+    leftover = parsed.isna() & values.notna() & (values != "")
+    if leftover.any():
+        parsed[leftover] = pd.to_datetime(values[leftover], dayfirst=True, format="mixed", errors="coerce")
+    return parsed
+
+
+# Turn the raw sheet strings into a typed, validated frame
+def prepare_responses(raw_form_df):
+    df = raw_form_df.rename(columns=RESPONSE_RENAMES)
+    for column in REQUIRED_COLUMNS:
+        if column not in df.columns:
+            df[column] = None
+
+    df["Timestamp"] = parse_timestamps(df["Timestamp"])
+    for column in NUMERIC_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors="coerce").astype(NUMERIC_DTYPE)
+    scores = df["Intensity"].map(INTENSITY_SCORES).astype(NUMERIC_DTYPE)
+    df["Intensity Score"] = scores.fillna(pd.to_numeric(df["Intensity"], errors="coerce").astype(NUMERIC_DTYPE))
+
+    # Rows without a usable timestamp (blank or mangled rows) can't be placed on
+    # any chart or streak, so they are dropped and counted
+    valid = df["Timestamp"].notna()
+    df = df[valid].reset_index(drop=True)
+    for column, vocabulary in RESPONSE_VOCABULARIES.items():
+        if column in df.columns:
+            df[column] = categorize(df[column], vocabulary)
+    df["User"] = categorize(df["User"])
+    df.attrs["dropped_rows"] = int((~valid).sum())
+    return df
+
+
+# Target rows that old versions of the Weight page appended to Weight_Tracker, in
+# [Timestamp, User, Target Weight, Target Date] order: the user sits in the Current
+# Weight column and the target in the User column. They stay in the sheet until
+# python -m tracker.targets has copied them and they are deleted by hand.
+def legacy_target_mask(weight_data_df):
+    weights, users = weight_data_df["Current Weight"], weight_data_df["User"]
+    return (
+        pd.to_numeric(weights, errors="coerce").isna()
+        & weights.fillna("").ne("")
+        & pd.to_numeric(users, errors="coerce").notna()
+    )
+
+
+# Typed weight log: datetime64 timestamps and target dates, float32 weights, categorical users.
+# Legacy target rows are left out, so they never show up as users or weigh-ins.
+def prepare_weights(weight_data_df):
+    df = weight_data_df.copy()
+    for column in WEIGHT_COLUMNS:
+        if column not in df.columns:
+            df[column] = None
+    df = df[~legacy_target_mask(df)].reset_index(drop=True)
+    df["Timestamp"] = parse_timestamps(df["Timestamp"])
+    df["Target Date"] = parse_timestamps(df["Target Date"])
+    df["Current Weight"] = pd.to_numeric(df["Current Weight"], errors="coerce").astype(NUMERIC_DTYPE)
+    df["User"] = categorize(df["User"])
+    return df
+
+
+# The typed responses for the current data version, parsed at most once per version
+def load_responses(range_name=RESPONSES_RANGE):
+    return load_responses_versioned(range_name)[0].copy()
+
+
+# Like load_responses, but returns the shared typed frame (not to be modified)
+# together with its data version, for caches of results derived from it
+def load_responses_versioned(range_name=RESPONSES_RANGE):
+    return _load_versioned(RESPONSES_SHEET, range_name, prepare_responses)
+
+
+# The typed weight log for the current data version
+def load_weights(range_name=WEIGHTS_RANGE):
+    return load_weights_versioned(range_name)[0].copy()
+
+
+def load_weights_versioned(range_name=WEIGHTS_RANGE):
+    return _load_versioned(WEIGHTS_SHEET, range_name, prepare_weights)
+
+
+def _load_versioned(sheet_name, range_name, prepare):
+    ((raw_df, version),) = fetch_versioned([(sheet_name, range_name)])
+    key = (sheet_name, range_name)
+    with _lock:
+        entry = _prepared.get(key)
+    if entry is None or entry[0] != version:
+        with span("coerce types"):
+            df = prepare(raw_df)
+        df.attrs["memory_bytes"] = footprint(df)
+        df.attrs["raw_memory_bytes"] = footprint(raw_df)
+        entry = (version, df)
+        with _lock:
+            _prepared[key] = entry
+    return entry[1], entry[0]
+
+
+# Rows and bytes held by every typed frame, next to the raw string frame it was parsed from
+def memory_report():
+    with _lock:
+        entries = sorted(_prepared.items())
+    return pd.DataFrame(
+        [
+            (f"{sheet_name}!{range_name}", len(df), df.attrs["memory_bytes"], df.attrs["raw_memory_bytes"])
+            for (sheet_name, range_name), (_, df) in entries
+        ],
+        columns=["Frame", "Rows", "Bytes", "Raw Bytes"],
+    )
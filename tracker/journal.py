@@ -0,0 +1,168 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+
+from tracker.a1 import column_index
+from tracker.config import JOURNAL_PATH, JOURNAL_RETENTION_DAYS, SUBMISSION_ID_COLUMNS, SUBMISSION_REPEAT_SECONDS
+from tracker.storage import get_backend
+
+# Write-ahead journal for submissions.
+# Every row a page submits is stored in a local SQLite file (WAL mode, synced
+# on commit) under a client-generated submission ID before it is sent anywhere,
+# and the ID travels with the row into its SUBMISSION_ID_COLUMNS column. A
+# submission that is recorded twice (a double-click) is dropped, an append that
+# failed or never ran is replayed from the journal, and before re-sending rows
+# an earlier attempt may have delivered, the IDs already in the sheet are looked
+# up so nothing is appended twice.
+#
+# Replay whatever is left in the journal (with the app stopped) with:
+#     python -m tracker.journal
+
+
+def _connect():
+    folder = os.path.dirname(JOURNAL_PATH)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    connection = sqlite3.connect(JOURNAL_PATH, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=FULL")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS journal ("
+        "sequence INTEGER PRIMARY KEY AUTOINCREMENT, submission_id TEXT NOT NULL UNIQUE, "
+        "sheet TEXT NOT NULL, cells TEXT NOT NULL, submitted_at REAL NOT NULL, "
+        "attempts INTEGER NOT NULL DEFAULT 0, written_at REAL)"
+    )
+    connection.execute("CREATE INDEX IF NOT EXISTS journal_pending ON journal (written_at, sequence)")
+    return connection
+
+
+def _run(query, parameters=()):
+    connection = _connect()
+    with connection:
+        cursor = connection.execute(query, parameters)
+        rows = cursor.fetchall()
+        count = cursor.rowcount
+    connection.close()
+    return rows, count
+
+
+def new_submission_id():
+    return uuid.uuid4().hex
+
+
+# ID for a form submission, kept in `state` (st.session_state) under `key`.
+# Submitting the same values again within SUBMISSION_REPEAT_SECONDS of the first
+# submit (a double-click) reuses the ID; later, or with other values, it is a
+# new submission, so the same walk logged in the morning and evening counts twice.
+def form_submission_id(state, key, values, now=None):
+    signature = json.dumps(values, default=str)
+    now = time.time() if now is None else now
+    entry = state.get(key)
+    if entry is None or entry[0] != signature or now - entry[2] > SUBMISSION_REPEAT_SECONDS:
+        entry = (signature, new_submission_id(), now)
+        state[key] = entry
+    return entry[1]
+
+
+# Forget the form's submission ID, so its next submit is logged even with the same values
+def clear_submission_id(state, key):
+    state.pop(key, None)
+
+
+# Store a submission before it is sent; False if its ID was recorded already
+def record(sheet_name, values, submission_id):
+    _, count = _run(
+        "INSERT OR IGNORE INTO journal (submission_id, sheet, cells, submitted_at) VALUES (?, ?, ?, ?)",
+        (submission_id, sheet_name, json.dumps(values, default=str), time.time()),
+    )
+    return count == 1
+
+
+# The row as written to the sheet: values padded out to the sheet's submission ID column
+def with_id(sheet_name, values, submission_id):
+    column = SUBMISSION_ID_COLUMNS.get(sheet_name)
+    if column is None:
+        return list(values)
+    position = column_index(column)
+    if len(values) > position:
+        raise ValueError(f"{sheet_name} rows must end before the submission ID column {column}")
+    return list(values) + [""] * (position - len(values)) + [submission_id]
+
+
+# Submission ID of a row built by with_id (None for sheets without an ID column)
+def row_id(sheet_name, row):
+    column = SUBMISSION_ID_COLUMNS.get(sheet_name)
+    if column is None:
+        return None
+    position = column_index(column)
+    return row[position] if len(row) > position else None
+
+
+# Submission IDs already in a sheet, read from the sheet itself
+def present_ids(sheet_name):
+    column = SUBMISSION_ID_COLUMNS.get(sheet_name)
+    if column is None:
+        return set()
+    (rows,) = get_backend().read_live([(sheet_name, f"{column}2:{column}")])
+    return {row[0] for row in rows if row}
+
+
+# IDs among `ids` that were handed to the backend before (the append may have landed)
+def attempted(ids):
+    ids = [submission_id for submission_id in ids if submission_id]
+    if not ids:
+        return set()
+    rows, _ = _run(
+        f"SELECT submission_id FROM journal WHERE attempts > 0 AND submission_id IN ({', '.join('?' * len(ids))})",
+        ids,
+    )
+    return {submission_id for (submission_id,) in rows}
+
+
+def mark_attempted(ids):
+    _update("UPDATE journal SET attempts = attempts + 1 WHERE submission_id = ?", [(i,) for i in ids if i])
+
+
+def mark_written(ids):
+    now = time.time()
+    _update("UPDATE journal SET written_at = ? WHERE submission_id = ? AND written_at IS NULL", [(now, i) for i in ids if i])
+
+
+def _update(query, parameters):
+    if not parameters:
+        return
+    connection = _connect()
+    with connection:
+        connection.executemany(query, parameters)
+    connection.close()
+
+
+# Submissions not known to be written, oldest first, as (sheet_name, row) with the
+# ID in place; only those submitted at least `older_than` seconds ago
+def pending(older_than=0):
+    rows, _ = _run(
+        "SELECT submission_id, sheet, cells FROM journal WHERE written_at IS NULL AND submitted_at <= ? ORDER BY sequence",
+        (time.time() - older_than,),
+    )
+    return [(sheet_name, with_id(sheet_name, json.loads(cells), submission_id)) for submission_id, sheet_name, cells in rows]
+
+
+# Forget written submissions older than JOURNAL_RETENTION_DAYS
+def prune():
+    _run("DELETE FROM journal WHERE written_at IS NOT NULL AND written_at < ?", (time.time() - JOURNAL_RETENTION_DAYS * 86400,))
+
+
+# Submissions in the journal, written and waiting
+def journal_stats():
+    rows, _ = _run("SELECT COUNT(*), COUNT(written_at) FROM journal")
+    total, written = rows[0]
+    return {"journaled": total, "written": written, "waiting": total - written}
+
+
+if __name__ == "__main__":
+    from tracker.data import replay_journal
+    # Skip the last minute's submissions in case an app process is still sending them
+    replayed = replay_journal(older_than=60, wait=True)
+    print(f"Replayed {replayed} submissions; {journal_stats()['waiting']} still waiting.")
@@ -0,0 +1,37 @@
+import importlib
+import threading
+
+# Deferred imports for heavy modules.
+# plotly.express, the date picker component and the Google API client take
+# tenths of a second each to import, and many reruns never touch them (the Log
+# page draws no chart, the pickers sit behind sidebar checkboxes, a page served
+# from the mirror and the figure cache makes no API call). A LazyModule stands
+# in for the module and imports it on first attribute access, so a page only
+# pays for what it uses. The import itself goes through importlib, under the
+# interpreter's import lock, so concurrent sessions can share one safely.
+#
+#     px = LazyModule("plotly.express")
+#     fig = px.line(...)  # plotly.express is imported here
+
+
+class LazyModule:
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attribute):
+        if attribute.startswith("__"):
+            raise AttributeError(attribute)
+        module = self._module
+        if module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+                module = self._module
+        return getattr(module, attribute)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule {self._name!r} ({state})>"
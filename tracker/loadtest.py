@@ -0,0 +1,178 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from tracker.config import (
+    LOCAL_DB_PATH, FAKE_LATENCY, FAKE_JITTER, FAKE_ERROR_RATE, FAKE_THROTTLE_RATE, FAKE_READ_QUOTA, FAKE_WRITE_QUOTA,
+)
+from tracker.fake_sheets import FakeSheetsApi, serve
+from tracker.local import LocalBackend
+from tracker.startup import ROOT, page_scripts
+from tracker.timing import percentile
+
+# End-to-end load test against the fake Sheets API.
+# One fake API (tracker/fake_sheets.py) is served over the local database, and
+# --workers app processes (each with its own mirror, summary and journal, like
+# separate server replicas) run every page --reruns times through streamlit's
+# AppTest, all going through the real SheetsBackend and googleapiclient to the
+# shared fake, so its latency, errors and quotas apply to all of them at once.
+# With --write-every N every Nth run of the Log page also submits an activity,
+# which is appended to the database. Reports rerun time percentiles per page,
+# failed reruns and the API requests answered, by operation and status.
+#
+#     python -m tracker.synthetic --rows 100000 --db .tracker/load.sqlite3
+#     python -m tracker.loadtest --db .tracker/load.sqlite3 --workers 4 --read-quota 60
+
+LOG_PAGE = os.path.join("pages", "4_Log Your Activity.py")
+
+# Runs in each worker process: one JSON line per page run on stdout
+_WORKER = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+pages, reruns, write_every, log_page = json.loads(sys.argv[1])
+apps = {}
+for run in range(reruns):
+    for page in pages:
+        app = apps.setdefault(page, AppTest.from_file(page, default_timeout=300))
+        write = page == log_page and write_every and run % write_every == write_every - 1 and app.radio
+        started = time.perf_counter()
+        try:
+            if write:
+                person = app.radio(key="person_question")
+                person.set_value(person.options[0])
+                app.slider(key="duration_question").set_value(30)
+                app.button[0].click()
+            app.run()
+            exceptions = [exception.message for exception in app.exception]
+        except Exception as error:
+            exceptions = [repr(error)]
+        print(json.dumps({
+            "page": page,
+            "seconds": time.perf_counter() - started,
+            "exceptions": exceptions,
+            "write": bool(write),
+            "saved": bool(write) and any("Saved" in message.value for message in app.success),
+        }), flush=True)
+"""
+
+
+def run_workers(url, pages, workers, reruns, write_every):
+    runs = []
+    with tempfile.TemporaryDirectory() as state:
+        processes = []
+        for worker in range(workers):
+            env = dict(
+                os.environ,
+                TRACKER_BACKEND="fake",
+                TRACKER_FAKE_SHEETS_URL=url,
+                TRACKER_STATE_DIR=os.path.join(state, f"worker-{worker}"),
+            )
+            output = open(os.path.join(state, f"worker-{worker}.jsonl"), "w+")
+            errors = open(os.path.join(state, f"worker-{worker}.log"), "w+")
+            process = subprocess.Popen(
+                [sys.executable, "-c", _WORKER, json.dumps([pages, reruns, write_every, LOG_PAGE])],
+                cwd=ROOT, env=env, stdout=output, stderr=errors,
+            )
+            processes.append((process, output, errors))
+        for process, output, errors in processes:
+            process.wait()
+            output.seek(0)
+            runs += [json.loads(line) for line in output if line.strip()]
+            if process.returncode != 0:
+                errors.seek(0)
+                raise RuntimeError(f"A worker failed:\n{errors.read()[-2000:]}")
+            output.close()
+            errors.close()
+    return runs
+
+
+# Per-page rerun times and failures, write outcomes and the API's request counts
+def summarize(runs, api_stats, elapsed):
+    pages = {}
+    for run in runs:
+        pages.setdefault(run["page"], []).append(run)
+    return {
+        "elapsed": elapsed,
+        "pages": {
+            page: {
+                "runs": len(page_runs),
+                "failed": sum(1 for run in page_runs if run["exceptions"]),
+                "p50": percentile([run["seconds"] for run in page_runs], 0.5),
+                "p95": percentile([run["seconds"] for run in page_runs], 0.95),
+                "max": max(run["seconds"] for run in page_runs),
+            }
+            for page, page_runs in pages.items()
+        },
+        "writes": {
+            "submitted": sum(1 for run in runs if run["write"]),
+            "saved": sum(1 for run in runs if run["saved"]),
+        },
+        "api": {f"{operation} {status}": count for (operation, status), count in sorted(api_stats.items())},
+        "errors": sorted({message.splitlines()[0][:200] for run in runs for message in run["exceptions"]}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the pages against the fake Sheets API")
+    parser.add_argument("--db", default=LOCAL_DB_PATH, help="local database behind the fake API (writes go into it)")
+    parser.add_argument("--workers", type=int, default=4, help="app processes running at once")
+    parser.add_argument("--reruns", type=int, default=3, help="runs of every page per worker")
+    parser.add_argument("--pages", nargs="+", help="page scripts (default: every page)")
+    parser.add_argument("--write-every", type=int, default=0, help="submit an activity every Nth Log page run")
+    parser.add_argument("--latency", type=float, default=FAKE_LATENCY, help="seconds per API request")
+    parser.add_argument("--jitter", type=float, default=FAKE_JITTER, help="up to this many seconds more")
+    parser.add_argument("--error-rate", type=float, default=FAKE_ERROR_RATE, help="share of requests answered 503")
+    parser.add_argument("--throttle-rate", type=float, default=FAKE_THROTTLE_RATE, help="share answered 429")
+    parser.add_argument("--read-quota", type=int, default=FAKE_READ_QUOTA, help="read requests per minute (0: none)")
+    parser.add_argument("--write-quota", type=int, default=FAKE_WRITE_QUOTA, help="write requests per minute (0: none)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        parser.error(f"{args.db} does not exist; fill it with python -m tracker.synthetic or python -m tracker.local")
+    api = FakeSheetsApi(
+        LocalBackend(os.path.abspath(args.db)),
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        read_quota=args.read_quota,
+        write_quota=args.write_quota,
+        seed=args.seed,
+    )
+    server = serve(api)
+    started = time.perf_counter()
+    try:
+        runs = run_workers(
+            f"http://127.0.0.1:{server.server_port}", args.pages or page_scripts(), args.workers, args.reruns,
+            args.write_every,
+        )
+    finally:
+        server.shutdown()
+    summary = summarize(runs, api.stats(), time.perf_counter() - started)
+
+    if args.json:
+        print(json.dumps(summary))
+        return 0
+    print(f"{args.workers} workers, {len(runs)} page runs in {summary['elapsed']:.1f}s")
+    print(f"{'page':<40} {'runs':>5} {'failed':>7} {'p50':>8} {'p95':>8} {'max':>8}")
+    for page, result in summary["pages"].items():
+        print(
+            f"{page:<40} {result['runs']:>5} {result['failed']:>7} {result['p50']:>7.2f}s "
+            f"{result['p95']:>7.2f}s {result['max']:>7.2f}s"
+        )
+    if summary["writes"]["submitted"]:
+        print(f"Activities submitted: {summary['writes']['submitted']}, confirmed saved: {summary['writes']['saved']}")
+    print("API requests: " + ", ".join(f"{key}: {count}" for key, count in summary["api"].items()))
+    for message in summary["errors"]:
+        print(f"    error: {message}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
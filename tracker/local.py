@@ -0,0 +1,164 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+from tracker.a1 import parse_range
+from tracker.config import CHUNK_ROWS, LOCAL_DB_PATH, SHEET_HEADERS, LOCAL_INDEXES
+from tracker.storage import StorageBackend, create_backend
+
+# Local SQLite storage engine.
+# Each worksheet is a table with one row per sheet row: row_number is the sheet
+# row (the header is row 1 and lives in the sheets table) and c0, c1, ... hold
+# the cells of columns A, B, .... A1 ranges are answered with a column and
+# row_number projection, and the columns in LOCAL_INDEXES are indexed.
+#
+# Copy the live spreadsheet into the local file with:
+#     python -m tracker.local
+
+
+def _table(sheet_name):
+    return '"sheet_' + sheet_name.replace('"', '""') + '"'
+
+
+class LocalBackend(StorageBackend):
+    name = "local"
+
+    def __init__(self, path=LOCAL_DB_PATH):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS sheets (name TEXT PRIMARY KEY, header TEXT NOT NULL)")
+        self._headers = {
+            name: json.loads(header) for name, header in self._connection.execute("SELECT name, header FROM sheets")
+        }
+
+    # Create (or widen) a sheet's table so it holds at least `width` columns
+    def _ensure_sheet(self, sheet_name, header=None, width=0):
+        current = self._headers.get(sheet_name)
+        if current is None:
+            current = list(header if header is not None else SHEET_HEADERS.get(sheet_name, []))
+            columns = "".join(f", c{i} TEXT" for i in range(len(current)))
+            self._connection.execute(f"CREATE TABLE {_table(sheet_name)} (row_number INTEGER PRIMARY KEY{columns})")
+            for column in LOCAL_INDEXES.get(sheet_name, []):
+                if column in current:
+                    position = current.index(column)
+                    self._connection.execute(
+                        f'CREATE INDEX "idx_{sheet_name}_{position}" ON {_table(sheet_name)} (c{position})'
+                    )
+        for i in range(len(current), width):
+            self._connection.execute(f"ALTER TABLE {_table(sheet_name)} ADD COLUMN c{i} TEXT")
+            current.append("")
+        self._connection.execute(
+            "INSERT OR REPLACE INTO sheets (name, header) VALUES (?, ?)", (sheet_name, json.dumps(current))
+        )
+        self._headers[sheet_name] = current
+        return current
+
+    # Rows first_row..last_row (1-based, header included) of columns first_col..last_col
+    def _select(self, sheet_name, first_col, first_row, last_col, last_row):
+        header = self._headers.get(sheet_name)
+        if header is None:
+            return []
+        last_col = len(header) - 1 if last_col is None else min(last_col, len(header) - 1)
+        positions = range(first_col, last_col + 1)
+        if not positions:
+            return []
+
+        rows = [_trimmed(header[first_col:last_col + 1])] if first_row <= 1 else []
+        query = (
+            f"SELECT row_number, {', '.join(f'c{i}' for i in positions)} FROM {_table(sheet_name)} "
+            f"WHERE row_number >= ? AND row_number <= ? ORDER BY row_number"
+        )
+        next_row = max(first_row, 2)
+        for row_number, *cells in self._connection.execute(query, (next_row, last_row or sys.maxsize)):
+            # Rows never written come back empty, like blank rows in a sheet
+            rows.extend([] for _ in range(row_number - next_row))
+            rows.append(_trimmed(cells))
+            next_row = row_number + 1
+        while rows and not rows[-1]:
+            rows.pop()
+        return rows
+
+    def read_ranges(self, requests):
+        with self._lock:
+            return [self._select(sheet_name, *parse_range(range_name)) for sheet_name, range_name in requests]
+
+    def extents(self):
+        with self._lock:
+            extents = {}
+            for sheet_name, header in self._headers.items():
+                (last_row,) = self._connection.execute(f"SELECT MAX(row_number) FROM {_table(sheet_name)}").fetchone()
+                extents[sheet_name] = (last_row or 1, len(header))
+            return extents
+
+    def iter_rows(self, sheet_name, last_column=None, chunk_rows=CHUNK_ROWS):
+        row_count, _ = self.extents().get(sheet_name, (0, 0))
+        last_col = parse_range(last_column)[2] if last_column else None
+        for first_row in range(1, row_count + 1, chunk_rows):
+            last_row = min(first_row + chunk_rows - 1, row_count)
+            with self._lock:
+                rows = self._select(sheet_name, 0, first_row, last_col, last_row)
+            if last_row < row_count:
+                rows += [[] for _ in range(last_row - first_row + 1 - len(rows))]
+            yield rows
+
+    def append_rows(self, sheet_name, rows):
+        with self._lock, self._connection:
+            header = self._ensure_sheet(sheet_name, width=max((len(row) for row in rows), default=0))
+            # New rows go below the last one; the header is row 1
+            (last_row,) = self._connection.execute(
+                f"SELECT COALESCE(MAX(row_number), 1) FROM {_table(sheet_name)}"
+            ).fetchone()
+            self._insert(sheet_name, header, enumerate(rows, start=last_row + 1))
+        return {"updates": {"updatedRows": len(rows)}}
+
+    # Replace a whole sheet with rows (header first)
+    def import_rows(self, sheet_name, rows):
+        header, body = (rows[0], rows[1:]) if rows else (SHEET_HEADERS.get(sheet_name, []), [])
+        width = max([len(header)] + [len(row) for row in body])
+        with self._lock, self._connection:
+            self._connection.execute(f"DROP TABLE IF EXISTS {_table(sheet_name)}")
+            self._headers.pop(sheet_name, None)
+            header = self._ensure_sheet(sheet_name, header=header, width=width)
+            self._insert(sheet_name, header, ((number, row) for number, row in enumerate(body, start=2) if row))
+
+    def _insert(self, sheet_name, header, numbered_rows):
+        columns = ", ".join(f"c{i}" for i in range(len(header)))
+        placeholders = ", ".join("?" for _ in header)
+        self._connection.executemany(
+            f"INSERT INTO {_table(sheet_name)} (row_number, {columns}) VALUES (?, {placeholders})",
+            [(number, *_cells(row, len(header))) for number, row in numbered_rows],
+        )
+
+    # Copy every sheet of another backend into this one, chunk by chunk
+    def copy_from(self, source, sheet_names):
+        for sheet_name in sheet_names:
+            rows = []
+            for chunk in source.iter_rows(sheet_name):
+                rows.extend(chunk)
+            self.import_rows(sheet_name, rows)
+
+
+def _cells(row, width):
+    cells = [None if value is None else str(value) for value in row]
+    return cells + [None] * (width - len(cells))
+
+
+# Sheets drop trailing empty cells, so do the same
+def _trimmed(cells):
+    cells = ["" if value is None else value for value in cells]
+    while cells and cells[-1] == "":
+        cells.pop()
+    return cells
+
+
+if __name__ == "__main__":
+    target = LocalBackend()
+    target.copy_from(create_backend("sheets"), list(SHEET_HEADERS))
+    print(f"Copied {', '.join(SHEET_HEADERS)} into {target.path}")
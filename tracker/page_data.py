@@ -0,0 +1,64 @@
+import pandas as pd
+
+from tracker.a1 import column_letter
+from tracker.config import SHEET_HEADERS
+from tracker.data import fetch_many
+
+# Declared data dependencies of a page.
+# A page lists the sheets it reads and, for each, the columns it uses (by
+# their SHEET_HEADERS names) or an A1 range for the whole sheet. Nothing is
+# fetched until the page first touches a dataset, and then only the declared
+# columns are requested, one A1 range per run of adjacent columns. The columns
+# are picked by their position in SHEET_HEADERS and named from it, not from the
+# live sheet's header row, whose text may differ (App_Users' is not known).
+# Datasets only shown behind a checkbox are never downloaded unless it is ticked.
+#
+#     page_data = PageData(users=("App_Users", ["User"]))
+#     dynamic_users = page_data.users["User"].unique()
+
+
+# A1 ranges (header row included) covering the given columns of a sheet, each
+# with the names of its columns (None for a range given as is)
+def column_ranges(sheet_name, columns):
+    if isinstance(columns, str):
+        return [(columns, None)]
+    header = SHEET_HEADERS[sheet_name]
+    positions = sorted(header.index(column) for column in columns)
+    runs = []
+    for position in positions:
+        if runs and position == runs[-1][1] + 1:
+            runs[-1][1] = position
+        else:
+            runs.append([position, position])
+    return [(f"{column_letter(first)}1:{column_letter(last)}", header[first:last + 1]) for first, last in runs]
+
+
+class PageData:
+
+    # datasets: name -> (sheet_name, list of column names or an A1 range)
+    def __init__(self, **datasets):
+        self._datasets = datasets
+        self._frames = {}
+
+    def __getattr__(self, name):
+        if name.startswith("_") or name not in self._datasets:
+            raise AttributeError(name)
+        return self.load(name)[0]
+
+    # Several datasets at once, fetched together in one backend call
+    def load(self, *names):
+        missing = [name for name in names if name not in self._frames]
+        requests = [
+            (name, self._datasets[name][0], range_name, columns)
+            for name in missing
+            for range_name, columns in column_ranges(*self._datasets[name])
+        ]
+        frames = fetch_many([(sheet_name, range_name) for _, sheet_name, range_name, _ in requests])
+        for name in missing:
+            parts = [
+                frame if columns is None else frame.set_axis(columns[:len(frame.columns)], axis=1)
+                for (owner, _, _, columns), frame in zip(requests, frames)
+                if owner == name
+            ]
+            self._frames[name] = parts[0] if len(parts) == 1 else pd.concat(parts, axis=1)
+        return [self._frames[name] for name in names]
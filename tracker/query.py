@@ -0,0 +1,66 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from tracker.rollup import load_rollup_versioned
+from tracker.timing import span
+
+# Indexed queries over the daily rollup.
+# The rollup is sorted by date once per data version, with users and exercise
+# types turned into categorical codes. A query finds its date range with a
+# binary search and checks the codes of the rows inside it only, so every
+# filter on a page resolves in one selection instead of a chain of full-frame
+# boolean masks.
+
+_lock = threading.Lock()
+_indexes = {}  # data version -> RollupIndex
+
+
+class RollupIndex:
+
+    def __init__(self, rollup, version=None):
+        self.version = version
+        self.frame = rollup.sort_values("Date", kind="stable").reset_index(drop=True)
+        self.days = self.frame["Date"].to_numpy(dtype="datetime64[D]")
+        users = pd.Categorical(self.frame["User"])
+        types = pd.Categorical(self.frame["Exercise Type"])
+        self.users, self.user_codes = users.categories, users.codes
+        self.types, self.type_codes = types.categories, types.codes
+
+    # Rows for one exercise type (None for all), a list of users (None for all)
+    # and the days inside every (start, end) range given (both ends inclusive).
+    # Returns a new frame the page may extend.
+    def select(self, exercise_type=None, users=None, date_ranges=()):
+        with span("filter"):
+            return self._select(exercise_type, users, date_ranges)
+
+    def _select(self, exercise_type, users, date_ranges):
+        first, last = 0, len(self.days)
+        for start, end in date_ranges:
+            first = max(first, int(np.searchsorted(self.days, np.datetime64(start, "D"), side="left")))
+            last = min(last, int(np.searchsorted(self.days, np.datetime64(end, "D"), side="right")))
+        if first >= last:
+            return self.frame.iloc[0:0].copy()
+
+        keep = np.ones(last - first, dtype=bool)
+        if exercise_type is not None:
+            keep &= self.type_codes[first:last] == self.types.get_indexer([exercise_type])[0]
+        if users is not None:
+            codes = self.users.get_indexer(list(users))
+            keep &= np.isin(self.user_codes[first:last], codes[codes >= 0])
+        return self.frame.take(first + np.flatnonzero(keep))
+
+
+# The index over the current data version's rollup, built at most once per version
+def load_rollup_index():
+    rollup, version = load_rollup_versioned()
+    with _lock:
+        index = _indexes.get(version)
+    if index is None:
+        with span("rollup index"):
+            index = RollupIndex(rollup, version)
+        with _lock:
+            _indexes.clear()
+            _indexes[version] = index
+    return index
@@ -0,0 +1,99 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from tracker.dimensions import join_calendar
+from tracker.ingest import RESPONSES_SHEET, load_responses_versioned
+from tracker.schema import labels
+from tracker.storage import get_backend
+from tracker.timing import span
+
+# Daily rollup of the responses.
+# One row per (user, exercise type, day, time of day) with the session count and
+# the duration, distance, reps and intensity sums. It is what the overview and
+# frequency pages filter and chart, so a rerun works on a table the size of the
+# number of active days rather than the number of sessions. The rollup is built
+# once per data version; when the new version only adds rows at the end of the
+# sheet, just those rows are aggregated and folded in.
+
+ROLLUP_KEYS = ["User", "Exercise Type", "Date", "Time of Day"]
+ROLLUP_SUMS = ["Sessions", "Duration", "Distance in Miles", "Reps", "Intensity"]
+
+_lock = threading.Lock()
+_rollup = None  # (data version, rows folded in, last timestamp folded in, edit count, rollup)
+
+
+# Time of day bucket of every timestamp, from the shared calendar dimension
+def _time_of_day(timestamps):
+    return join_calendar(timestamps, timestamps.dt.hour, ["Time of Day"])["Time of Day"].to_numpy()
+
+
+# Roll typed responses up to one row per ROLLUP_KEYS value.
+# Missing users and exercise types become "" so those sessions still count in totals.
+def aggregate(df):
+    rows = pd.DataFrame({
+        "User": labels(df["User"]),
+        "Exercise Type": labels(df["Exercise Type"]),
+        "Date": df["Timestamp"].dt.normalize(),
+        "Time of Day": _time_of_day(df["Timestamp"]),
+        "Sessions": np.ones(len(df), dtype=np.int64),
+        # Totals are summed in float64 so large sums keep their precision
+        "Duration": df["Duration"].astype("float64"),
+        "Distance in Miles": df["Distance in Miles"].astype("float64"),
+        "Reps": df["Reps"].astype("float64"),
+        "Intensity": df["Intensity Score"].astype("float64"),
+    })
+    # Sums skip missing numbers, like np.sum over the raw columns
+    return rows.groupby(ROLLUP_KEYS, as_index=False, sort=True)[ROLLUP_SUMS].sum()
+
+
+# Add the rollup of some new sessions to an existing rollup
+def fold(rollup, new_rows):
+    if new_rows.empty:
+        return rollup
+    combined = pd.concat([rollup, new_rows], ignore_index=True)
+    return combined.groupby(ROLLUP_KEYS, as_index=False, sort=True)[ROLLUP_SUMS].sum()
+
+
+# The rollup for the current data version (a copy the page may filter and extend)
+def load_rollup():
+    return load_rollup_versioned()[0].copy()
+
+
+# Like load_rollup, but returns the shared rollup (not to be modified) and its data version
+def load_rollup_versioned():
+    global _rollup
+    df, version = load_responses_versioned()
+    with _lock:
+        entry = _rollup
+    if entry is not None and entry[0] == version:
+        return entry[4], version
+
+    edits = get_backend().edit_count(RESPONSES_SHEET)
+    last_timestamp = df["Timestamp"].iloc[-1] if len(df) else None
+    appended = (
+        entry is not None and entry[3] == edits and len(df) >= entry[1]
+        # The last row folded in must still be in place for the rest to be new
+        and (entry[1] == 0 or df["Timestamp"].iloc[entry[1] - 1] == entry[2])
+    )
+    with span("rollup"):
+        if appended:
+            rollup = fold(entry[4], aggregate(df.iloc[entry[1]:]))
+        else:
+            rollup = aggregate(df)
+    with _lock:
+        _rollup = (version, len(df), last_timestamp, edits, rollup)
+    return rollup, version
+
+
+# The raw sessions behind some rows of the rollup, e.g. to show the filtered data
+def sessions_for(df, rollup):
+    keys = pd.MultiIndex.from_arrays([
+        labels(df["User"]),
+        labels(df["Exercise Type"]),
+        df["Timestamp"].dt.normalize(),
+        _time_of_day(df["Timestamp"]),
+    ])
+    selected = pd.MultiIndex.from_frame(rollup[ROLLUP_KEYS])
+    return df[keys.isin(selected)]
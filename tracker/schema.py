@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+# Compact in-memory schema for the typed frames.
+# Answers that come from a fixed list in the form and on the Log page are held
+# as categoricals over that list, numbers as float32 and dates as datetime64,
+# so a frame shared by every session costs a small integer per cell instead of
+# a Python string. The vocabularies below are also what the pages offer as
+# choices, so there is one list of exercise types, moods and intensities.
+
+EXERCISE_TYPES = ["Cycling", "Strength", "Yoga", "Running", "Meditation", "Hiking"]
+
+# Mood answers and the description shown next to each on the Log page
+MOOD_OPTIONS = {
+    "Very Unhappy": "😟 Sluggish, Tired, Drained",
+    "Unhappy": "🙁 Frustrated, Low Energy",
+    "Neutral": "😐 Okay, Balanced, Indifferent",
+    "Happy": "🙂 Content, Energetic, Positive",
+    "Very Happy": "😁 Proud, Excited, Accomplished"
+}
+
+# Perceived intensity as written by the Log page; the form may also write the score itself
+INTENSITY_SCORES = {
+    "Very Light": 1,
+    "Light": 2,
+    "Moderate": 3,
+    "Hard": 4,
+    "Very Hard": 5,
+}
+
+BODY_PARTS = ["Upper Body", "Chest", "Core", "Legs", "Whole Body"]
+
+# Categorical columns of the typed responses and their fixed vocabularies
+RESPONSE_VOCABULARIES = {
+    "Exercise Type": EXERCISE_TYPES,
+    "Mood Prior": list(MOOD_OPTIONS),
+    "Mood After": list(MOOD_OPTIONS),
+    "Intensity": list(INTENSITY_SCORES),
+    "Part of Body": BODY_PARTS,
+}
+
+NUMERIC_DTYPE = "float32"
+
+
+# Categorical over a fixed vocabulary. Blank cells are missing; values outside
+# the vocabulary (e.g. typed into the sheet by hand) are kept as extra
+# categories after it, so the codes of the vocabulary never move.
+def categorize(values, vocabulary=()):
+    values = values.mask(values == "")
+    extra = sorted(set(values.dropna().unique()) - set(vocabulary))
+    return pd.Categorical(values, categories=list(vocabulary) + extra)
+
+
+# Strings of a categorical or object column as an array, with "" for missing values
+def labels(values):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = np.append(values.cat.categories.astype(str).to_numpy(dtype=object), "")
+        return categories[values.cat.codes.to_numpy()]
+    return values.fillna("").astype(str).to_numpy(dtype=object)
+
+
+# Bytes held by a frame, counting the Python strings in object columns
+def footprint(df):
+    return int(df.memory_usage(deep=True).sum())
@@ -0,0 +1,143 @@
+import threading
+
+from tracker import sync
+from tracker.a1 import crop_rows, column_letter
+from tracker.client import get_service
+from tracker.config import SPREADSHEET_ID, CHUNK_ROWS, SYNCED_SHEETS
+from tracker.storage import StorageBackend
+
+# Google Sheets backend.
+# Plain ranges are read with one values().batchGet per call. Append-only sheets
+# listed in SYNCED_SHEETS are served from the local mirror (tracker/sync.py), so
+# the request for them only carries the rows added since the last sync.
+
+
+class SheetsBackend(StorageBackend):
+    name = "sheets"
+
+    def __init__(self, service=None, spreadsheet_id=SPREADSHEET_ID):
+        self._service = service
+        self.spreadsheet_id = spreadsheet_id
+        self._lock = threading.Lock()
+
+    # The process-wide Sheets service (tracker/client.py) unless one was passed in
+    @property
+    def service(self):
+        with self._lock:
+            if self._service is None:
+                self._service = get_service()
+            return self._service
+
+    def read_ranges(self, requests):
+        # One range per plain request, one delta range per synced sheet.
+        # A full reconcile of a synced sheet is read in chunks on its own.
+        fetches = {}  # key -> (sheet_name, range_name, full); synced sheets are keyed by name
+        for sheet_name, range_name in requests:
+            if sync.is_synced(sheet_name):
+                if sheet_name not in fetches:
+                    fetches[sheet_name] = (sheet_name, *sync.sync_range(sheet_name))
+            else:
+                fetches[(sheet_name, range_name)] = (sheet_name, range_name, None)
+
+        batched = [key for key, (_, _, full) in fetches.items() if not full]
+        value_ranges = dict(zip(batched, self._batch_get([fetches[key][:2] for key in batched])))
+        fetched = {}
+        for key, (sheet_name, range_name, full) in fetches.items():
+            if full is None:
+                fetched[key] = value_ranges[key]
+                continue
+            values = None if full else sync.merge(sheet_name, value_ranges[key], False)
+            if values is None:
+                # First sync, reconcile due, or the sheet no longer lines up with the mirror
+                values = sync.merge(sheet_name, self._read_all_rows(sheet_name), True)
+            fetched[key] = values
+
+        results = []
+        for sheet_name, range_name in requests:
+            if sync.is_synced(sheet_name):
+                results.append(crop_rows(fetched[sheet_name], range_name))
+            else:
+                results.append(fetched[(sheet_name, range_name)])
+        return results
+
+    # Columns outside the mirror (e.g. submission IDs) are read from the sheet itself
+    def read_live(self, requests):
+        return self._batch_get(list(requests))
+
+    # Download (sheet_name, range_name) pairs with values().batchGet, returning each range's rows.
+    # The field mask keeps the response down to the cell values (no range echo or metadata).
+    def _batch_get(self, ranges):
+        if not ranges:
+            return []
+        result = self.service.spreadsheets().values().batchGet(
+            spreadsheetId=self.spreadsheet_id,
+            ranges=[f"{sheet_name}!{range_name}" for sheet_name, range_name in ranges],
+            fields="valueRanges(values)",
+        ).execute()
+        # Value ranges come back in the order they were requested
+        return [value_range.get('values', []) for value_range in result.get('valueRanges', [])]
+
+    # Row and column count of every sheet, from one metadata call with a field mask
+    def extents(self):
+        result = self.service.spreadsheets().get(
+            spreadsheetId=self.spreadsheet_id,
+            fields="sheets.properties(title,gridProperties(rowCount,columnCount))",
+        ).execute()
+        extents = {}
+        for sheet in result.get('sheets', []):
+            properties = sheet['properties']
+            grid = properties.get('gridProperties', {})
+            extents[properties['title']] = (grid.get('rowCount', 0), grid.get('columnCount', 0))
+        return extents
+
+    # The sheet's real extent is looked up first, so nothing past a fixed row
+    # limit is ever dropped however long the sheet grows.
+    def iter_rows(self, sheet_name, last_column=None, chunk_rows=CHUNK_ROWS):
+        row_count, column_count = self.extents().get(sheet_name, (0, 0))
+        last_column = last_column or column_letter(max(column_count - 1, 0))
+        for first_row in range(1, row_count + 1, chunk_rows):
+            last_row = min(first_row + chunk_rows - 1, row_count)
+            result = self.service.spreadsheets().values().get(
+                spreadsheetId=self.spreadsheet_id,
+                range=f"{sheet_name}!A{first_row}:{last_column}{last_row}",
+                fields="values",
+            ).execute()
+            rows = result.get('values', [])
+            # Empty rows inside the chunk are dropped from the end of the response
+            # only, so pad back to the chunk size unless this is the last chunk
+            if last_row < row_count:
+                rows += [[] for _ in range(last_row - first_row + 1 - len(rows))]
+            yield rows
+
+    # Every row of a sheet, read chunk by chunk
+    def _read_all_rows(self, sheet_name):
+        rows = []
+        for chunk in self.iter_rows(sheet_name, SYNCED_SHEETS.get(sheet_name)):
+            rows.extend(chunk)
+        # Drop the padding after the last real row
+        while rows and not rows[-1]:
+            rows.pop()
+        return rows
+
+    # Full reconciles of the mirror count rows that were edited by hand
+    def edit_count(self, sheet_name):
+        return sync.edit_count(sheet_name)
+
+    # The grid's row count includes blank rows, so a synced sheet is counted in its
+    # mirror (after fetching only the rows added since the last sync) and any other
+    # sheet by reading its first column
+    def row_count(self, sheet_name):
+        if sync.is_synced(sheet_name):
+            self.read_ranges([(sheet_name, "A1:A1")])
+            return sync.row_count(sheet_name)
+        (rows,) = self._batch_get([(sheet_name, "A:A")])
+        return len(rows)
+
+    def append_rows(self, sheet_name, rows):
+        body = {"values": rows}
+        return self.service.spreadsheets().values().append(
+            spreadsheetId=self.spreadsheet_id,
+            range=sheet_name,
+            valueInputOption="RAW",
+            body=body
+        ).execute()
@@ -0,0 +1,156 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from tracker.config import LOCAL_DB_PATH
+
+# Cold-start benchmark for the page scripts.
+# Every page is run in a fresh interpreter (as after a container start) through
+# streamlit's AppTest against the local SQLite backend, with empty app state
+# (summary, journal and mirror files in a new temporary folder). For each page
+# it reports the time spent importing modules while the page first ran, the
+# time to its first complete render and the whole process time, as medians over
+# --repeat runs, plus the slowest modules the page imported. "(empty page)"
+# is the same harness running a script with no code in it. --budget makes the
+# run fail when a page's first render is slower than that many seconds.
+#
+#     python -m tracker.local       # once, to fill the local database
+#     python -m tracker.startup --repeat 5
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_PAGE = "Exercise_Wellness_Overview_Page.py"
+
+# Runs in the child process: the harness is imported first, then a marker is
+# written to stderr so the imports made by the page can be told apart
+_CHILD = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=300)
+print("-- page --", file=sys.stderr, flush=True)
+rendered = time.perf_counter()
+app.run()
+finished = time.perf_counter()
+print(json.dumps({
+    "harness": rendered - started,
+    "render": finished - rendered,
+    "exceptions": [exception.message for exception in app.exception],
+}))
+"""
+
+
+# Page scripts in sidebar order, the main page first
+def page_scripts():
+    pages = sorted(os.listdir(os.path.join(ROOT, "pages")))
+    return [MAIN_PAGE] + [os.path.join("pages", page) for page in pages if page.endswith(".py")]
+
+
+# Total and per-module import times (seconds) from -X importtime output after the marker.
+# Only top-level imports are listed per module; their time includes what they imported.
+def parse_import_times(stderr):
+    total, modules, in_page = 0.0, {}, False
+    for line in stderr.splitlines():
+        if line.startswith("-- page --"):
+            in_page = True
+            continue
+        if not in_page or not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|", 2)
+        total += int(own) / 1e6
+        # Nested imports are indented two spaces per level
+        if name[1:2] != " ":
+            modules[name.strip()] = int(cumulative) / 1e6
+    return total, modules
+
+
+# One cold start of a page: {"imports", "render", "process", "modules", "exceptions"}
+def run_page(script, db_path):
+    with tempfile.TemporaryDirectory() as state:
+        env = dict(
+            os.environ,
+            TRACKER_BACKEND="local",
+            TRACKER_LOCAL_DB=db_path,
+            TRACKER_SUMMARY_PATH=os.path.join(state, "summary.sqlite3"),
+            TRACKER_JOURNAL_PATH=os.path.join(state, "journal.sqlite3"),
+            TRACKER_MIRROR_PATH=os.path.join(state, "mirror.sqlite3"),
+        )
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _CHILD, script],
+            cwd=ROOT, env=env, capture_output=True, text=True,
+        )
+        process = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"{script} failed to run:\n{result.stderr[-2000:]}")
+    imports, modules = parse_import_times(result.stderr)
+    child = json.loads(result.stdout.strip().splitlines()[-1])
+    return {
+        "imports": imports,
+        "render": child["render"],
+        "process": process,
+        "modules": modules,
+        "exceptions": child["exceptions"],
+    }
+
+
+# Medians over `repeat` cold starts, and the slowest top-level imports of the last one
+def measure(script, db_path, repeat):
+    runs = [run_page(script, db_path) for _ in range(repeat)]
+    slowest = sorted(runs[-1]["modules"].items(), key=lambda item: item[1], reverse=True)[:3]
+    return {
+        "page": script,
+        "imports": statistics.median(run["imports"] for run in runs),
+        "render": statistics.median(run["render"] for run in runs),
+        "process": statistics.median(run["process"] for run in runs),
+        "slowest_imports": [[name, round(seconds, 3)] for name, seconds in slowest],
+        "exceptions": runs[-1]["exceptions"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import and first-render time of every page")
+    parser.add_argument("--repeat", type=int, default=3, help="cold starts per page (the median is reported)")
+    parser.add_argument("--db", default=LOCAL_DB_PATH, help="local SQLite database the pages read")
+    parser.add_argument("--budget", type=float, help="fail if a page's first render takes longer (seconds)")
+    parser.add_argument("--json", action="store_true", help="print one JSON line per page")
+    args = parser.parse_args()
+
+    db_path = os.path.abspath(args.db)
+    if not os.path.exists(db_path):
+        parser.error(f"{db_path} does not exist; fill it with python -m tracker.local")
+
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as empty:
+        pass
+    try:
+        results = [dict(measure(empty.name, db_path, args.repeat), page="(empty page)")]
+    finally:
+        os.remove(empty.name)
+    results += [measure(script, db_path, args.repeat) for script in page_scripts()]
+
+    if args.json:
+        for result in results:
+            print(json.dumps(result))
+    else:
+        print(f"{'page':<40} {'imports':>8} {'render':>8} {'process':>8}  slowest imports")
+        for result in results:
+            slowest = ", ".join(f"{name} {seconds:.3f}" for name, seconds in result["slowest_imports"])
+            print(
+                f"{result['page']:<40} {result['imports']:>7.3f}s {result['render']:>7.3f}s "
+                f"{result['process']:>7.3f}s  {slowest}"
+            )
+            for message in result["exceptions"]:
+                print(f"    exception: {message}")
+
+    failed = [result for result in results if result["exceptions"]]
+    if args.budget is not None:
+        failed += [result for result in results if result["render"] > args.budget]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
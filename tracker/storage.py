@@ -0,0 +1,74 @@
+import threading
+
+from tracker.config import BACKEND, CHUNK_ROWS
+
+# Storage backends behind tracker.data.
+# Every backend stores the same worksheets (header row first, then one list of
+# cell strings per row) and answers the same A1-range requests, so the pages
+# run unchanged against Google Sheets or against the local SQLite engine.
+
+
+class StorageBackend:
+    name = "base"
+
+    # Rows (header first) for each (sheet_name, range_name) pair, in request order
+    def read_ranges(self, requests):
+        raise NotImplementedError
+
+    # Like read_ranges, but straight from the store, bypassing any local mirror
+    def read_live(self, requests):
+        return self.read_ranges(requests)
+
+    # A sheet's rows in bounded chunks, one list of rows per chunk
+    def iter_rows(self, sheet_name, last_column=None, chunk_rows=CHUNK_ROWS):
+        raise NotImplementedError
+
+    # {sheet_name: (row_count, column_count)} for every sheet
+    def extents(self):
+        raise NotImplementedError
+
+    # Rows in a sheet (header included) down to its last row with data, without reading them
+    def row_count(self, sheet_name):
+        return self.extents().get(sheet_name, (0, 0))[0]
+
+    # Append rows (lists of cell values) to the end of a sheet
+    def append_rows(self, sheet_name, rows):
+        raise NotImplementedError
+
+    # Counter that moves whenever existing rows of a sheet were changed outside
+    # the app; state maintained incrementally from appends is rebuilt when it does
+    def edit_count(self, sheet_name):
+        return 0
+
+
+_lock = threading.Lock()
+_backend = None
+
+
+# The backend chosen by TRACKER_BACKEND ("sheets", "local" or "fake"), created once per process
+def get_backend():
+    global _backend
+    with _lock:
+        if _backend is None:
+            _backend = create_backend(BACKEND)
+        return _backend
+
+
+# Swap the process-wide backend, e.g. to point a benchmark at a local copy
+def set_backend(backend):
+    global _backend
+    with _lock:
+        _backend = backend
+
+
+def create_backend(name):
+    if name == "sheets":
+        from tracker.sheets import SheetsBackend
+        return SheetsBackend()
+    if name == "local":
+        from tracker.local import LocalBackend
+        return LocalBackend()
+    if name == "fake":
+        from tracker.fake_sheets import fake_backend
+        return fake_backend()
+    raise ValueError(f"Unknown storage backend: {name!r} (expected 'sheets', 'local' or 'fake')")
@@ -0,0 +1,169 @@
+import threading
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from tracker.ingest import load_responses_versioned
+from tracker.schema import labels
+from tracker.timing import span
+
+# Vectorized streak engine.
+# Activity is laid out as a day bitmap (one row per group, one column per day
+# from STREAK_START to today) and streaks are read off with run-length encoding:
+# a run is a stretch of consecutive active days, the longest streak is the
+# longest run and the current streak is the run that ends today (0 if today is
+# not active). Every group is handled in the same NumPy pass.
+
+# First day counted by the streak tracker
+STREAK_START = date(2024, 1, 1)
+
+# Label used for "every user" / "every exercise type" rows of the streak table
+ALL = "All"
+
+STREAK_COLUMNS = ["User", "Exercise Type", "Current Streak", "Longest Streak"]
+
+_lock = threading.Lock()
+_tables = {}  # (data version, today) -> streak table
+
+
+# Day offsets from `start` for an array of timestamps
+def day_offsets(timestamps, start=STREAK_START):
+    days = np.asarray(timestamps, dtype="datetime64[D]")
+    return (days - np.datetime64(start, "D")).astype(np.int64)
+
+
+# Boolean (n_groups, n_days) matrix marking which group was active on which day.
+# Days outside 0..n_days-1 (before the start or after today) are ignored.
+def day_bitmap(offsets, group_codes, n_groups, n_days):
+    offsets = np.asarray(offsets)
+    group_codes = np.asarray(group_codes)
+    inside = (offsets >= 0) & (offsets < n_days)
+    bitmap = np.zeros((n_groups, n_days), dtype=bool)
+    bitmap[group_codes[inside], offsets[inside]] = True
+    return bitmap
+
+
+# (current, longest) streak for every row of a day bitmap
+def run_lengths(bitmap):
+    n_groups, n_days = bitmap.shape
+    padded = np.zeros((n_groups, n_days + 2), dtype=np.int8)
+    padded[:, 1:-1] = bitmap
+    steps = np.diff(padded, axis=1)
+    # Starts and ends come out row by row in order, so they pair up one to one
+    start_rows, start_days = np.nonzero(steps == 1)
+    _, end_days = np.nonzero(steps == -1)
+    lengths = end_days - start_days
+
+    longest = np.zeros(n_groups, dtype=np.int64)
+    np.maximum.at(longest, start_rows, lengths)
+    current = np.zeros(n_groups, dtype=np.int64)
+    ends_today = end_days == n_days
+    current[start_rows[ends_today]] = lengths[ends_today]
+    return current, longest
+
+
+# (current, longest) streak for the sessions in one frame, e.g. the filtered responses
+# or the filtered daily rollup (column="Date")
+def streaks_for(df, today=None, start=STREAK_START, column="Timestamp"):
+    today = today or datetime.today().date()
+    n_days = (today - start).days + 1
+    if df.empty or n_days <= 0:
+        return 0, 0
+    with span("streaks"):
+        offsets = day_offsets(df[column], start)
+        current, longest = run_lengths(day_bitmap(offsets, np.zeros(len(offsets), dtype=np.int64), 1, n_days))
+    return int(current[0]), int(longest[0])
+
+
+# (length, last day offset) of the final run in every row of a day bitmap; (0, -1) for empty rows.
+# Unlike the current streak this is kept even when the run ended before today.
+def final_runs(bitmap):
+    n_groups, n_days = bitmap.shape
+    padded = np.zeros((n_groups, n_days + 2), dtype=np.int8)
+    padded[:, 1:-1] = bitmap
+    steps = np.diff(padded, axis=1)
+    start_rows, start_days = np.nonzero(steps == 1)
+    _, end_days = np.nonzero(steps == -1)
+
+    length = np.zeros(n_groups, dtype=np.int64)
+    last_day = np.full(n_groups, -1, dtype=np.int64)
+    # Runs are in row order, so later assignments win and leave each row's last run
+    length[start_rows] = end_days - start_days
+    last_day[start_rows] = end_days - 1
+    return length, last_day
+
+
+# Day bitmap for the overall, per-user, per-exercise-type and per-(user, type) groups.
+# Returns the bitmap and the User / Exercise Type label of each of its rows;
+# aggregate rows use ALL. Sessions without a user or type are labelled "".
+def group_bitmap(df, today=None, start=STREAK_START):
+    today = today or datetime.today().date()
+    n_days = max((today - start).days + 1, 0)
+    users = pd.Categorical(labels(df["User"]))
+    types = pd.Categorical(labels(df["Exercise Type"]))
+    n_users, n_types = len(users.categories), len(types.categories)
+
+    # Group rows: overall, then per user, per exercise type, per (user, type)
+    user_codes = users.codes.astype(np.int64)
+    type_codes = types.codes.astype(np.int64)
+    group_codes = np.concatenate([
+        np.zeros(len(df), dtype=np.int64),
+        1 + user_codes,
+        1 + n_users + type_codes,
+        1 + n_users + n_types + user_codes * n_types + type_codes,
+    ])
+    offsets = np.tile(day_offsets(df["Timestamp"], start), 4)
+    n_groups = 1 + n_users + n_types + n_users * n_types
+    bitmap = day_bitmap(offsets, group_codes, n_groups, n_days)
+
+    user_labels = np.concatenate([
+        [ALL], users.categories, np.full(n_types, ALL), np.repeat(users.categories, n_types),
+    ])
+    type_labels = np.concatenate([
+        [ALL], np.full(n_users, ALL), types.categories, np.tile(types.categories, n_users),
+    ])
+    return bitmap, user_labels, type_labels
+
+
+# Current and longest streak for every user, every exercise type and every
+# (user, exercise type) pair, plus the overall streak, in a single pass.
+# Aggregate rows use ALL in the User and/or Exercise Type column.
+def streak_table(df, today=None, start=STREAK_START):
+    bitmap, user_labels, type_labels = group_bitmap(df, today, start)
+    current, longest = run_lengths(bitmap)
+    table = pd.DataFrame({
+        "User": user_labels,
+        "Exercise Type": type_labels,
+        "Current Streak": current,
+        "Longest Streak": longest,
+    }, columns=STREAK_COLUMNS)
+    # Pairs that never trained together are noise in the table, and sessions
+    # without a user or type only count towards the aggregate rows
+    keep = (table["Longest Streak"] > 0) | (table["User"] == ALL) | (table["Exercise Type"] == ALL)
+    keep &= (table["User"] != "") & (table["Exercise Type"] != "")
+    return table[keep].reset_index(drop=True)
+
+
+# The streak table for the current data version, computed at most once per version and day
+def load_streak_table(today=None):
+    today = today or datetime.today().date()
+    df, version = load_responses_versioned()
+    key = (version, today)
+    with _lock:
+        table = _tables.get(key)
+    if table is None:
+        with span("streaks"):
+            table = streak_table(df, today)
+        with _lock:
+            _tables.clear()
+            _tables[key] = table
+    return table
+
+
+# Look up one (user, exercise type) row of a streak table; (0, 0) if it has no sessions
+def lookup_streaks(table, user=ALL, exercise_type=ALL):
+    row = table[(table["User"] == user) & (table["Exercise Type"] == exercise_type)]
+    if row.empty:
+        return 0, 0
+    return int(row["Current Streak"].iloc[0]), int(row["Longest Streak"].iloc[0])
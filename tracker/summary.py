@@ -0,0 +1,268 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from tracker.config import SUMMARY_PATH, SHEET_HEADERS
+from tracker.data import fetch_versioned, add_append_listener, invalidate, row_count
+from tracker.ingest import (
+    RESPONSES_SHEET, RESPONSES_RANGE, RESPONSE_RENAMES, NUMERIC_COLUMNS,
+    load_responses_versioned, parse_timestamps,
+)
+from tracker.schema import labels
+from tracker.storage import get_backend
+from tracker.streaks import ALL, STREAK_START, group_bitmap, final_runs, run_lengths
+from tracker.timing import span
+
+# Per-user activity summary behind the overview cards.
+# For every (user, exercise type) pair, plus the ALL aggregates, it keeps the
+# session count, the duration / distance / reps totals and the run of active
+# days ending at the last session. A row logged through append_data updates the
+# four keys it belongs to in constant time, so the cards never rescan the sheet.
+# The state is persisted in SQLite and rebuilt from the sheet only when it has
+# drifted: the sheet's row count (tracker.data.row_count, which for the Sheets
+# mirror only fetches the rows added since the last sync) no longer matches,
+# rows were edited by hand, or a backdated session may have joined two runs.
+# The sheet is counted and re-read outside the lock record_row takes, so a slow
+# backend call never holds up the write queue's listeners. A rebuild is swapped
+# in under the lock, and if rows were appended while it ran (they may or may not
+# be in what it read) the count is checked again before the summary is returned.
+
+SUMMARY_COLUMNS = ["sessions", "minutes", "miles", "reps", "last_day", "current_run", "longest_run"]
+
+_lock = threading.Lock()
+_state = None  # {"totals": {(user, exercise_type): [...]}, "meta": {...}}
+_appended = 0  # rows record_row was told about, to tell whether one raced a rebuild
+
+# Rebuilds load_summary tries while appends keep racing them, before it returns
+# the last one (the next call's count check picks up anything it missed)
+REBUILD_PASSES = 3
+
+
+def _connect():
+    folder = os.path.dirname(SUMMARY_PATH)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    connection = sqlite3.connect(SUMMARY_PATH)
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS summary_totals ("
+        "user TEXT NOT NULL, exercise_type TEXT NOT NULL, sessions INTEGER NOT NULL, "
+        "minutes REAL NOT NULL, miles REAL NOT NULL, reps REAL NOT NULL, last_day INTEGER NOT NULL, "
+        "current_run INTEGER NOT NULL, longest_run INTEGER NOT NULL, PRIMARY KEY (user, exercise_type))"
+    )
+    connection.execute("CREATE TABLE IF NOT EXISTS summary_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    return connection
+
+
+# Load the persisted summary the first time it is needed
+def _load_state():
+    global _state
+    if _state is None:
+        with _connect() as connection:
+            totals = {
+                (user, exercise_type): list(values) for user, exercise_type, *values in connection.execute(
+                    f"SELECT user, exercise_type, {', '.join(SUMMARY_COLUMNS)} FROM summary_totals"
+                )
+            }
+            meta = {key: json.loads(value) for key, value in connection.execute("SELECT key, value FROM summary_meta")}
+        connection.close()
+        _state = {"totals": totals, "meta": meta}
+    return _state
+
+
+def _save(keys=None):
+    totals, meta = _state["totals"], _state["meta"]
+    with _connect() as connection:
+        if keys is None:
+            connection.execute("DELETE FROM summary_totals")
+            keys = list(totals)
+        connection.executemany(
+            f"INSERT OR REPLACE INTO summary_totals (user, exercise_type, {', '.join(SUMMARY_COLUMNS)}) "
+            f"VALUES (?, ?, {', '.join('?' * len(SUMMARY_COLUMNS))})",
+            [(*key, *totals[key]) for key in keys],
+        )
+        connection.executemany(
+            "INSERT OR REPLACE INTO summary_meta (key, value) VALUES (?, ?)",
+            [(key, json.dumps(value)) for key, value in meta.items()],
+        )
+    connection.close()
+
+
+# Totals for one row: pandas sums skip missing and non-numeric cells, so they count as 0
+def _number(value):
+    number = pd.to_numeric(value, errors="coerce")
+    return 0.0 if pd.isna(number) else float(number)
+
+
+# The aggregate keys a session with this user and exercise type counts towards
+def _keys(user, exercise_type):
+    keys = [(ALL, ALL)]
+    if user:
+        keys.append((user, ALL))
+    if exercise_type:
+        keys.append((ALL, exercise_type))
+    if user and exercise_type:
+        keys.append((user, exercise_type))
+    return keys
+
+
+# Fold one appended Raw_Form_Responses row into the summary in O(1)
+def record_row(values):
+    global _appended
+    today = datetime.today().date()
+    with _lock:
+        _appended += 1
+        state = _load_state()
+        meta = state["meta"]
+        if "sheet_rows" not in meta:
+            # Never built: load_summary() builds it from the sheet
+            return
+        meta["sheet_rows"] += 1
+
+        header = meta.get("header") or SHEET_HEADERS[RESPONSES_SHEET]
+        row = dict(zip([RESPONSE_RENAMES.get(name, name) for name in header], values))
+        timestamp = parse_timestamps(pd.Series([row.get("Timestamp")], dtype=object))[0]
+        if pd.isna(timestamp):
+            # Dropped on ingestion as well, so it only counts as a sheet row
+            _save([])
+            return
+
+        day = (timestamp.date() - STREAK_START).days
+        if timestamp.date() > today:
+            # Streaks ignore days after today, so rebuild once that day has come
+            meta["rebuild_on"] = min(meta.get("rebuild_on") or day, day)
+        totals = state["totals"]
+        minutes, miles, reps = (_number(row.get(column)) for column in NUMERIC_COLUMNS)
+        keys = _keys(row.get("User") or "", row.get("Exercise Type") or "")
+        for key in keys:
+            entry = totals.setdefault(key, [0, 0.0, 0.0, 0.0, -1, 0, 0])
+            entry[0] += 1
+            entry[1] += minutes
+            entry[2] += miles
+            entry[3] += reps
+            if day < 0 or timestamp.date() > today or day == entry[4]:
+                continue
+            if day < entry[4]:
+                # A backdated session may join two runs; only a rebuild can tell
+                meta["dirty"] = True
+            elif day == entry[4] + 1:
+                entry[5] += 1
+            else:
+                entry[5] = 1
+            entry[4] = max(entry[4], day)
+            entry[6] = max(entry[6], entry[5])
+        _save(keys)
+
+
+def _on_append(sheet_name, rows):
+    if sheet_name == RESPONSES_SHEET:
+        for values in rows:
+            record_row(values)
+
+
+add_append_listener(_on_append)
+
+
+# Summary totals computed from the whole typed responses frame, and the day
+# offset (from STREAK_START) on which they must be rebuilt for future-dated rows
+def build_totals(df, today):
+    users = labels(df["User"])
+    types = labels(df["Exercise Type"])
+    sums = df[NUMERIC_COLUMNS].astype("float64").fillna(0).assign(sessions=1)
+    frames = [
+        sums.groupby([np.full(len(df), ALL), np.full(len(df), ALL)]).sum(),
+        sums.groupby([users, np.full(len(df), ALL)]).sum(),
+        sums.groupby([np.full(len(df), ALL), types]).sum(),
+        sums.groupby([users, types]).sum(),
+    ]
+    totals = {}
+    for frame in frames:
+        for (user, exercise_type), sessions, minutes, miles, reps in zip(
+            frame.index, frame["sessions"], frame["Duration"], frame["Distance in Miles"], frame["Reps"],
+        ):
+            if user != "" and exercise_type != "":
+                totals[(user, exercise_type)] = [int(sessions), float(minutes), float(miles), float(reps), -1, 0, 0]
+
+    bitmap, user_labels, type_labels = group_bitmap(df, today)
+    length, last_day = final_runs(bitmap)
+    _, longest = run_lengths(bitmap)
+    for user, exercise_type, run, day, best in zip(user_labels, type_labels, length, last_day, longest):
+        entry = totals.get((user, exercise_type))
+        if entry is not None:
+            entry[4:] = [int(day), int(run), int(best)]
+
+    future = df.loc[df["Timestamp"].dt.date > today, "Timestamp"]
+    rebuild_on = (future.min().date() - STREAK_START).days if len(future) else None
+    return totals, rebuild_on
+
+
+# The summary, rebuilt from the sheet when it no longer matches it
+def load_summary(today=None):
+    today = today or datetime.today().date()
+    backend = get_backend()
+    for _ in range(REBUILD_PASSES):
+        # Counted outside the lock: for the Sheets backend this may go to the network
+        sheet_rows = max(row_count(RESPONSES_SHEET) - 1, 0)
+        edits = backend.edit_count(RESPONSES_SHEET)
+        with _lock:
+            state = _load_state()
+            meta = state["meta"]
+            rebuild_on = meta.get("rebuild_on")
+            counted = meta.get("sheet_rows") == sheet_rows
+            stale = (
+                not counted
+                or meta.get("edits") != edits
+                or meta.get("dirty", False)
+                or (rebuild_on is not None and STREAK_START + timedelta(days=rebuild_on) <= today)
+            )
+            if not stale:
+                return state
+            appended = _appended
+        if not counted:
+            # Rows were added outside the app (e.g. the Google Form), so a
+            # cached read from before them can't be used for the rebuild
+            invalidate(RESPONSES_SHEET)
+        ((raw_form_df, _),) = fetch_versioned([(RESPONSES_SHEET, RESPONSES_RANGE)])
+        df, _ = load_responses_versioned()
+        with span("summary"):
+            totals, rebuild_on = build_totals(df, today)
+        with _lock:
+            state = _load_state()
+            state["totals"] = totals
+            # The rows actually summarized, so the count check catches a row
+            # appended after the read whose record_row this swap overwrote
+            state["meta"] = {
+                "sheet_rows": len(raw_form_df),
+                "edits": edits,
+                "header": list(raw_form_df.columns),
+                "dirty": False,
+                "rebuild_on": rebuild_on,
+            }
+            _save()
+            if _appended == appended:
+                return state
+    return state
+
+
+# Sessions, minutes, miles, reps, current and longest streak for one (user, exercise type).
+# The current streak only counts if its run reaches today.
+def lookup(user=ALL, exercise_type=ALL, today=None):
+    today = today or datetime.today().date()
+    state = load_summary(today)
+    with _lock:
+        entry = state["totals"].get((user, exercise_type))
+    if entry is None:
+        return {"sessions": 0, "minutes": 0.0, "miles": 0.0, "reps": 0.0, "current_streak": 0, "longest_streak": 0}
+    sessions, minutes, miles, reps, last_day, current_run, longest_run = entry
+    return {
+        "sessions": sessions,
+        "minutes": minutes,
+        "miles": miles,
+        "reps": reps,
+        "current_streak": current_run if last_day == (today - STREAK_START).days else 0,
+        "longest_streak": longest_run,
+    }
@@ -0,0 +1,140 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from tracker.config import SYNCED_SHEETS, RECONCILE_INTERVAL, MIRROR_PATH
+
+# Local mirror of the append-only sheets (Raw_Form_Responses, Weight_Tracker, Weight_Targets).
+# Rows only ever get appended to these sheets, so after the first download each
+# sync asks Google only for the rows below the last one we already hold. The
+# rows are persisted in SQLite so a restarted app resumes from where it stopped,
+# and every RECONCILE_INTERVAL the whole sheet is re-downloaded to pick up edits
+# made by hand in the spreadsheet.
+
+_lock = threading.Lock()
+_mirrors = {}  # sheet_name -> {"rows": [...], "last_full_sync": float, "edits": int}
+
+
+def is_synced(sheet_name):
+    return sheet_name in SYNCED_SHEETS
+
+
+def _connect():
+    folder = os.path.dirname(MIRROR_PATH)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    connection = sqlite3.connect(MIRROR_PATH)
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS mirror_rows ("
+        "sheet TEXT NOT NULL, row_number INTEGER NOT NULL, cells TEXT NOT NULL, "
+        "PRIMARY KEY (sheet, row_number))"
+    )
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS mirror_meta ("
+        "sheet TEXT PRIMARY KEY, last_full_sync REAL NOT NULL, edits INTEGER NOT NULL DEFAULT 0)"
+    )
+    # Mirrors written before edits were counted
+    columns = [name for _, name, *_ in connection.execute("PRAGMA table_info(mirror_meta)")]
+    if "edits" not in columns:
+        connection.execute("ALTER TABLE mirror_meta ADD COLUMN edits INTEGER NOT NULL DEFAULT 0")
+    return connection
+
+
+# Load a sheet's mirror from disk the first time it is needed
+def _mirror(sheet_name):
+    mirror = _mirrors.get(sheet_name)
+    if mirror is None:
+        with _connect() as connection:
+            rows = [
+                json.loads(cells) for (cells,) in connection.execute(
+                    "SELECT cells FROM mirror_rows WHERE sheet = ? ORDER BY row_number", (sheet_name,)
+                )
+            ]
+            meta = connection.execute(
+                "SELECT last_full_sync, edits FROM mirror_meta WHERE sheet = ?", (sheet_name,)
+            ).fetchone()
+        connection.close()
+        mirror = {"rows": rows, "last_full_sync": meta[0] if meta else 0.0, "edits": meta[1] if meta else 0}
+        _mirrors[sheet_name] = mirror
+    return mirror
+
+
+# Range to request for the next sync, and whether it is a full reconcile.
+# The last synced row is always re-read so a mirror that no longer lines up
+# with the sheet (rows deleted by hand) is noticed before the next reconcile.
+def sync_range(sheet_name):
+    last_column = SYNCED_SHEETS[sheet_name]
+    with _lock:
+        mirror = _mirror(sheet_name)
+        last_row = len(mirror["rows"])
+        if last_row == 0 or time.time() - mirror["last_full_sync"] >= RECONCILE_INTERVAL:
+            return f"A1:{last_column}", True
+        return f"A{last_row}:{last_column}", False
+
+
+# Merge a response for sync_range() into the mirror and return all mirrored rows.
+# Returns None when the overlap row no longer matches, meaning a full reconcile is needed.
+def merge(sheet_name, values, full):
+    with _lock:
+        mirror = _mirror(sheet_name)
+        rows = mirror["rows"]
+        if full:
+            # Anything but new rows at the end means the sheet was edited by hand
+            if rows and [_trimmed(row) for row in values[:len(rows)]] != [_trimmed(row) for row in rows]:
+                mirror["edits"] += 1
+            rows[:] = values
+            mirror["last_full_sync"] = time.time()
+            first_new = 0
+        else:
+            if not values or _trimmed(values[0]) != _trimmed(rows[-1]):
+                mirror["last_full_sync"] = 0.0
+                return None
+            first_new = len(rows)
+            rows.extend(values[1:])
+
+        with _connect() as connection:
+            if full:
+                connection.execute("DELETE FROM mirror_rows WHERE sheet = ?", (sheet_name,))
+            connection.executemany(
+                "INSERT OR REPLACE INTO mirror_rows (sheet, row_number, cells) VALUES (?, ?, ?)",
+                [(sheet_name, number + 1, json.dumps(row)) for number, row in enumerate(rows[first_new:], first_new)],
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO mirror_meta (sheet, last_full_sync, edits) VALUES (?, ?, ?)",
+                (sheet_name, mirror["last_full_sync"], mirror["edits"]),
+            )
+        connection.close()
+        return list(rows)
+
+
+# Rows held in a sheet's mirror, header included
+def row_count(sheet_name):
+    with _lock:
+        return len(_mirror(sheet_name)["rows"])
+
+
+# How many full reconciles found rows changed by hand (not just appended).
+# Anything derived incrementally from the sheet should be rebuilt when this moves.
+def edit_count(sheet_name):
+    if not is_synced(sheet_name):
+        return 0
+    with _lock:
+        return _mirror(sheet_name)["edits"]
+
+
+# Force the next sync of a sheet (or of every sheet) to be a full reconcile
+def request_reconcile(sheet_name=None):
+    with _lock:
+        for name in SYNCED_SHEETS:
+            if sheet_name is None or name == sheet_name:
+                _mirror(name)["last_full_sync"] = 0.0
+
+
+# The Sheets API drops trailing empty cells, so compare rows without them
+def _trimmed(row):
+    row = list(row)
+    while row and row[-1] in ("", None):
+        row.pop()
+    return row
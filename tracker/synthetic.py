@@ -0,0 +1,185 @@
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from tracker.config import LOCAL_DB_PATH, SHEET_HEADERS
+from tracker.dimensions import DAY_NAMES
+from tracker.schema import BODY_PARTS, EXERCISE_TYPES, INTENSITY_SCORES, MOOD_OPTIONS
+
+# Synthetic sheet data for benchmarks and load tests.
+# responses() and weights() return frames shaped like the raw Raw_Form_Responses
+# and Weight_Tracker sheets (header names, every cell a string as the Sheets API
+# returns it), with rows in the order they would have been appended. Users are
+# active at very different rates (a few log most sessions), sessions cluster in
+# the morning and evening, and a small share of rows has a blank timestamp like
+# rows cleared by hand. The same arguments and seed always give the same frame.
+# Strings are built from small lookup tables, so 10 million rows take seconds.
+#
+# Fill a local database for the local backend with:
+#     python -m tracker.synthetic --rows 100000 --db .tracker/synthetic.sqlite3
+
+DEFAULT_DAYS = 2 * 365
+
+# Share of rows with a blank timestamp, which ingestion drops
+BLANK_ROWS = 0.001
+
+# Relative chance of a session starting in each hour of the day
+HOUR_WEIGHTS = np.array([1, 1, 1, 1, 1, 2, 6, 9, 9, 6, 4, 4, 5, 4, 3, 3, 4, 7, 9, 8, 5, 3, 2, 1], dtype=float)
+
+CARDIO_TYPES = {"Cycling", "Running", "Hiking"}
+NOTES = ["Felt great", "Tired legs", "New route", "Short on time", "With friends"]
+
+
+# Users scale with the rows: about one per 500 rows, between 5 and 5000
+def default_users(n_rows):
+    return int(min(max(n_rows // 500, 5), 5000))
+
+
+def user_names(n_users):
+    return [f"User {i + 1:04d}" for i in range(n_users)]
+
+
+# Timestamp strings in TIMESTAMP_FORMAT for whole seconds since `first_day`,
+# joined from a table of day strings and a table of time-of-day strings
+def _timestamps(seconds, first_day):
+    days, seconds_of_day = np.divmod(seconds, 86400)
+    day_strings = np.array(
+        [f"{first_day + timedelta(days=int(day)):%d/%m/%Y} " for day in range(int(days.max(initial=0)) + 1)],
+        dtype=object,
+    )
+    time_strings = np.array(
+        [f"{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}" for second in range(86400)],
+        dtype=object,
+    )
+    return day_strings[days] + time_strings[seconds_of_day]
+
+
+# Seconds since the first day for n sessions over `days` days, sorted, following HOUR_WEIGHTS
+def _session_seconds(rng, n_rows, days):
+    hours = rng.choice(24, size=n_rows, p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum())
+    seconds = rng.integers(0, days, size=n_rows) * 86400 + hours * 3600 + rng.integers(0, 3600, size=n_rows)
+    seconds.sort()
+    return seconds
+
+
+# Which user each row belongs to: user i logs in proportion to 1 / (i + 1) ** 0.8
+def _user_codes(rng, n_rows, n_users):
+    activity = 1 / np.arange(1, n_users + 1) ** 0.8
+    return rng.choice(n_users, size=n_rows, p=activity / activity.sum())
+
+
+# Pick one string per code from a list of strings (shared objects, so cheap per row)
+def _take(strings, codes):
+    return np.array(strings, dtype=object)[codes]
+
+
+# Raw Raw_Form_Responses frame with n_rows sessions over the `days` days up to today
+def responses(n_rows, n_users=None, days=DEFAULT_DAYS, today=None, seed=0):
+    rng = np.random.default_rng(seed)
+    n_users = n_users or default_users(n_rows)
+    today = today or datetime.today().date()
+    first_day = today - timedelta(days=days - 1)
+
+    types = rng.choice(len(EXERCISE_TYPES), size=n_rows, p=[0.25, 0.2, 0.15, 0.2, 0.1, 0.1])
+    cardio = np.isin(types, [EXERCISE_TYPES.index(name) for name in CARDIO_TYPES])
+    strength = types == EXERCISE_TYPES.index("Strength")
+    moods = list(MOOD_OPTIONS)
+    intensities = list(INTENSITY_SCORES)
+    intensity_codes = rng.choice(len(intensities), size=n_rows, p=[0.1, 0.2, 0.4, 0.2, 0.1])
+    # The form writes the score itself for some responses
+    scored = rng.random(n_rows) < 0.05
+    numbers = [str(number) for number in range(401)]
+
+    body_parts = np.where(cardio, len(BODY_PARTS), rng.integers(0, len(BODY_PARTS), size=n_rows))
+    notes = np.where(rng.random(n_rows) < 0.05, rng.integers(0, len(NOTES), size=n_rows), len(NOTES))
+    timestamps = _timestamps(_session_seconds(rng, n_rows, days), first_day)
+    timestamps[rng.random(n_rows) < BLANK_ROWS] = ""
+
+    columns = {
+        "Timestamp": timestamps,
+        "Exercise Type": _take(EXERCISE_TYPES, types),
+        "Mood Prior": _take(moods, rng.integers(0, len(moods), size=n_rows)),
+        "Duration": _take(numbers, rng.integers(1, 9, size=n_rows) * 15),
+        "Optional: Distance (miles)": _take(numbers, np.where(cardio, rng.integers(1, 21, size=n_rows), 0)),
+        "Part of Body": _take(BODY_PARTS + [""], body_parts),
+        "Optional: Strength: Reps": _take(numbers, np.where(strength, rng.integers(1, 11, size=n_rows) * 15, 0)),
+        "Intensity": np.where(scored, _take(numbers, intensity_codes + 1), _take(intensities, intensity_codes)),
+        "Mood After": _take(moods, rng.integers(0, len(moods), size=n_rows)),
+        "Notes": _take(NOTES + [""], notes),
+        "User": _take(user_names(n_users), _user_codes(rng, n_rows, n_users)),
+    }
+    return pd.DataFrame(columns, columns=SHEET_HEADERS["Raw_Form_Responses"])
+
+
+# Raw Weight_Tracker frame: every user drifts from a starting weight with daily noise
+def weights(n_rows, n_users=None, days=DEFAULT_DAYS, today=None, seed=0):
+    rng = np.random.default_rng(seed)
+    n_users = n_users or default_users(n_rows)
+    today = today or datetime.today().date()
+    first_day = today - timedelta(days=days - 1)
+
+    seconds = _session_seconds(rng, n_rows, days)
+    users = _user_codes(rng, n_rows, n_users)
+    start = rng.uniform(60, 110, size=n_users)
+    drift = rng.uniform(-0.02, 0.005, size=n_users)  # kg per day
+    weight = start[users] + drift[users] * seconds / 86400 + rng.normal(0, 0.6, size=n_rows)
+    return pd.DataFrame({
+        "Timestamp": _timestamps(seconds, first_day),
+        # Weights to one decimal, looked up from a table of strings like the other columns
+        "Current Weight": _take(
+            [f"{tenths / 10:.1f}" for tenths in range(3001)], np.clip(np.rint(weight * 10), 0, 3000).astype(int)
+        ),
+        "User": _take(user_names(n_users), users),
+    })
+
+
+# Every sheet the pages read, as rows (header first) for LocalBackend.import_rows
+def sheets(n_rows, n_users=None, weight_rows=None, days=DEFAULT_DAYS, today=None, seed=0):
+    n_users = n_users or default_users(n_rows)
+    today = today or datetime.today().date()
+    weight_rows = weight_rows if weight_rows is not None else max(n_rows // 10, n_users)
+    names = user_names(n_users)
+    rng = np.random.default_rng(seed)
+
+    def rows(df):
+        return [list(df.columns)] + df.values.tolist()
+
+    targets = [
+        [f"{today:%d/%m/%Y} 08:00:00", user, f"{rng.uniform(60, 90):.1f}", f"{today + timedelta(days=180):%d/%m/%Y} 00:00:00"]
+        for user in names[::3]
+    ]
+    return {
+        "Raw_Form_Responses": rows(responses(n_rows, n_users, days, today, seed)),
+        "Weight_Tracker": rows(weights(weight_rows, n_users, days, today, seed)),
+        "Weight_Targets": [SHEET_HEADERS["Weight_Targets"]] + targets,
+        "App_Users": [SHEET_HEADERS["App_Users"]] + [[str(i + 1), user] for i, user in enumerate(names)],
+        "Inspirational_Quotes": [
+            SHEET_HEADERS["Inspirational_Quotes"],
+            ["1", "The only bad workout is the one that didn't happen.", "Unknown"],
+            ["2", "Strength does not come from the body. It comes from the will.", "Gandhi"],
+        ],
+        "Regime": [SHEET_HEADERS["Regime"]] + [
+            [day_name, EXERCISE_TYPES[day % len(EXERCISE_TYPES)]] for day, day_name in enumerate(DAY_NAMES)
+        ],
+    }
+
+
+if __name__ == "__main__":
+    from tracker.local import LocalBackend
+
+    parser = argparse.ArgumentParser(description="Fill a local database with synthetic sheet data")
+    parser.add_argument("--rows", type=int, default=10000, help="form responses")
+    parser.add_argument("--users", type=int, help="users (default: one per 500 responses, 5 to 5000)")
+    parser.add_argument("--weight-rows", type=int, help="weight log rows (default: a tenth of the responses)")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="days of history up to today")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db", default=LOCAL_DB_PATH, help="local SQLite database to write (sheets are replaced)")
+    args = parser.parse_args()
+
+    target = LocalBackend(args.db)
+    for sheet_name, sheet_rows in sheets(args.rows, args.users, args.weight_rows, args.days, seed=args.seed).items():
+        target.import_rows(sheet_name, sheet_rows)
+        print(f"{sheet_name}: {len(sheet_rows) - 1} rows")
+    print(f"Wrote {target.path}")
@@ -0,0 +1,137 @@
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from tracker.data import fetch_versioned, append_data, add_append_listener
+from tracker.ingest import TIMESTAMP_FORMAT, WEIGHTS_SHEET, WEIGHTS_RANGE, legacy_target_mask, parse_timestamps
+from tracker.storage import get_backend
+
+# Target weights, kept in their own Weight_Targets sheet.
+# Every "Set target weight" submission is appended as
+# [Timestamp, User, Target Weight, Target Date]; the latest row per user is the
+# user's current target. An index of those latest rows is built once from the
+# sheet and updated in place by every write made through set_target(), so the
+# chart looks a user's target up in O(1) and the index is only rebuilt when the
+# sheet changed some other way (a new row count or rows edited by hand).
+#
+# Target rows written to Weight_Tracker by older versions of the Weight page
+# (in [Timestamp, User, Target Weight, Target Date] order) are left out of the
+# weight log (tracker.ingest.legacy_target_mask) and can be copied over with:
+#     python -m tracker.targets
+
+TARGETS_SHEET = "Weight_Targets"
+TARGETS_RANGE = "A1:D"
+
+TARGET_COLUMNS = ["Timestamp", "User", "Target Weight", "Target Date"]
+
+_lock = threading.Lock()
+_index = None  # {"version", "rows", "edits", "targets": {user: (timestamp, target weight, target date)}}
+
+
+# Latest (timestamp, target weight, target date) per user from the raw sheet frame.
+# Rows without a user, a timestamp or a numeric target are skipped; of rows with
+# the same timestamp the one further down the sheet wins.
+def build_index(targets_df):
+    df = targets_df.reindex(columns=TARGET_COLUMNS)
+    rows = pd.DataFrame({
+        "Timestamp": parse_timestamps(df["Timestamp"]),
+        "User": df["User"],
+        "Target Weight": pd.to_numeric(df["Target Weight"], errors="coerce"),
+        "Target Date": parse_timestamps(df["Target Date"]),
+    })
+    rows = rows[rows["Timestamp"].notna() & rows["Target Weight"].notna() & rows["User"].fillna("").ne("")]
+    latest = rows.sort_values("Timestamp", kind="stable").drop_duplicates("User", keep="last")
+    return {
+        user: (timestamp, float(target), None if pd.isna(target_date) else target_date)
+        for user, timestamp, target, target_date in zip(
+            latest["User"], latest["Timestamp"], latest["Target Weight"], latest["Target Date"],
+        )
+    }
+
+
+# Fold rows appended through append_data into the index in O(1) per row
+def _on_append(sheet_name, rows):
+    if sheet_name != TARGETS_SHEET:
+        return
+    with _lock:
+        if _index is None:
+            return
+        _index["rows"] += len(rows)
+        # Rows may carry more cells (the submission ID) after the target columns
+        written = pd.DataFrame([row[:len(TARGET_COLUMNS)] for row in rows], columns=TARGET_COLUMNS)
+        for user, entry in build_index(written).items():
+            current = _index["targets"].get(user)
+            if current is None or entry[0] >= current[0]:
+                _index["targets"][user] = entry
+
+
+add_append_listener(_on_append)
+
+
+# {user: (timestamp, target weight, target date)} and its data version, rebuilt
+# from the sheet only when it no longer matches the index kept up to date on write
+def load_target_index():
+    global _index
+    ((targets_df, version),) = fetch_versioned([(TARGETS_SHEET, TARGETS_RANGE)])
+    with _lock:
+        index = _index
+        if index is not None and index["version"] == version:
+            return index["targets"], version
+    edits = get_backend().edit_count(TARGETS_SHEET)
+    with _lock:
+        if _index is not None and _index["rows"] == len(targets_df) and _index["edits"] == edits:
+            _index["version"] = version
+            return _index["targets"], version
+    targets = build_index(targets_df)
+    with _lock:
+        _index = {"version": version, "rows": len(targets_df), "edits": edits, "targets": targets}
+    return targets, version
+
+
+# The user's current (target weight, target date), or None without a target
+def target_for(user):
+    targets, _ = load_target_index()
+    entry = targets.get(user)
+    return None if entry is None else entry[1:]
+
+
+# {user: target weight} for every user with a target
+def current_targets():
+    targets, _ = load_target_index()
+    return {user: target for user, (_, target, _) in targets.items()}
+
+
+# Append a new target for a user; it replaces their previous one.
+# Returns False for a repeated submission (see tracker.data.append_data).
+def set_target(user, target_weight, target_date, submission_id=None):
+    values = [
+        datetime.now().strftime(TIMESTAMP_FORMAT),
+        user,
+        target_weight,
+        target_date.strftime(TIMESTAMP_FORMAT),
+    ]
+    return append_data(TARGETS_SHEET, values, submission_id)
+
+
+# Legacy target rows in Weight_Tracker (see tracker.ingest.legacy_target_mask),
+# in TARGET_COLUMNS order, with their sheet row numbers
+def legacy_target_rows(weight_data_df):
+    df = weight_data_df.reindex(columns=["Timestamp", "Current Weight", "User", "Target Date"])
+    legacy = df[legacy_target_mask(df)]
+    rows = legacy[["Timestamp", "Current Weight", "User", "Target Date"]].fillna("").values.tolist()
+    # Row 1 is the header
+    return rows, [position + 2 for position in legacy.index]
+
+
+if __name__ == "__main__":
+    ((weight_data_df, _),) = fetch_versioned([(WEIGHTS_SHEET, WEIGHTS_RANGE)])
+    ((targets_df, _),) = fetch_versioned([(TARGETS_SHEET, TARGETS_RANGE)])
+    rows, row_numbers = legacy_target_rows(weight_data_df)
+    existing = set(map(tuple, targets_df.reindex(columns=TARGET_COLUMNS).fillna("").values.tolist()))
+    new_rows = [row for row in rows if tuple(row) not in existing]
+    if new_rows:
+        get_backend().append_rows(TARGETS_SHEET, new_rows)
+    print(f"Copied {len(new_rows)} target rows to {TARGETS_SHEET}.")
+    if row_numbers:
+        print(f"Delete rows {', '.join(map(str, row_numbers))} from {WEIGHTS_SHEET} once the copy is checked.")
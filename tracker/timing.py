@@ -0,0 +1,183 @@
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from tracker.config import METRICS_PATH, METRICS_WINDOW, METRICS_INTERVAL, METRICS_KEEP
+
+# Stage timings of page reruns.
+# A page calls start_rerun(page) at the top and finish_rerun() (through
+# tracker.debug_panel) at the end; the stages in between (the Sheets fetch,
+# building frames, type coercion, the rollup, filtering, streaks, figure
+# building, st.plotly_chart) are wrapped in `with span(name):`. Spans nest, and
+# only count while a rerun is being timed on the current thread, so the shared
+# modules cost nothing when called from the benchmarks or a background thread.
+# Each finished rerun adds its time per stage (and in total, as "rerun") to a
+# window of the last METRICS_WINDOW reruns per page and stage. With
+# TRACKER_METRICS_PATH set, p50/p95 of every window are written there every
+# METRICS_INTERVAL seconds: as a Prometheus text file when the path ends in
+# .prom (for node_exporter's textfile collector), otherwise as JSON lines
+# holding the last METRICS_KEEP snapshots.
+
+_local = threading.local()
+_lock = threading.Lock()
+_recent = {}  # (page, stage) -> deque of the last METRICS_WINDOW rerun times
+_totals = {}  # (page, stage) -> [reruns, seconds] since the process started
+_export_lock = threading.Lock()  # one export at a time, and around _exported_at
+_exported_at = 0.0
+
+
+# Start timing a rerun of `page` on this thread (an unfinished one is dropped)
+def start_rerun(page):
+    _local.rerun = {"page": page, "started": time.perf_counter(), "spans": [], "path": []}
+
+
+# Time the block as stage `name` of the current rerun, nested under any open span
+@contextmanager
+def span(name):
+    rerun = getattr(_local, "rerun", None)
+    if rerun is None:
+        yield
+        return
+    rerun["path"].append(name)
+    # Spans are listed in the order they started, so a parent comes before its children
+    position = len(rerun["spans"])
+    rerun["spans"].append(None)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        rerun["spans"][position] = (tuple(rerun["path"]), time.perf_counter() - started)
+        rerun["path"].pop()
+
+
+# Stop timing the current rerun and add it to the metrics. Returns the rerun's
+# page, total seconds and breakdown: (span path, calls, seconds) in start order,
+# with a span's time including its children. None if no rerun was being timed.
+def finish_rerun():
+    rerun = getattr(_local, "rerun", None)
+    if rerun is None:
+        return None
+    _local.rerun = None
+    seconds = time.perf_counter() - rerun["started"]
+
+    breakdown = {}
+    stages = {"rerun": seconds}
+    for path, span_seconds in (entry for entry in rerun["spans"] if entry is not None):
+        calls, total = breakdown.get(path, (0, 0.0))
+        breakdown[path] = (calls + 1, total + span_seconds)
+        # A stage nested in itself (a fetch inside a fetch) is only counted once
+        if path[-1] not in path[:-1]:
+            stages[path[-1]] = stages.get(path[-1], 0.0) + span_seconds
+
+    with _lock:
+        for stage, stage_seconds in stages.items():
+            key = (rerun["page"], stage)
+            _recent.setdefault(key, deque(maxlen=METRICS_WINDOW)).append(stage_seconds)
+            totals = _totals.setdefault(key, [0, 0.0])
+            totals[0] += 1
+            totals[1] += stage_seconds
+    if METRICS_PATH and time.monotonic() - _exported_at >= METRICS_INTERVAL and not _export_lock.locked():
+        export_metrics()
+    return {
+        "page": rerun["page"],
+        "seconds": seconds,
+        "breakdown": [(path, calls, total) for path, (calls, total) in breakdown.items()],
+    }
+
+
+# Nearest-rank percentile (q between 0 and 1) of a non-empty list
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(math.ceil(q * len(ordered)) - 1, 0))]
+
+
+# p50, p95 and max seconds over the recent reruns of every page (or one page) and
+# stage, with the reruns in the window and the reruns and seconds since start
+def stage_metrics(page=None):
+    with _lock:
+        windows = {key: list(window) for key, window in _recent.items() if page is None or key[0] == page}
+        totals = {key: tuple(_totals[key]) for key in windows}
+    return [
+        {
+            "page": key[0],
+            "stage": key[1],
+            "window": len(window),
+            "p50": percentile(window, 0.5),
+            "p95": percentile(window, 0.95),
+            "max": max(window),
+            "count": totals[key][0],
+            "sum": totals[key][1],
+        }
+        for key, window in sorted(windows.items())
+    ]
+
+
+# Write the current metrics to METRICS_PATH (or `path`)
+def export_metrics(path=None):
+    global _exported_at
+    path = path or METRICS_PATH
+    with _export_lock:
+        _exported_at = time.monotonic()
+        metrics = stage_metrics()
+        if not metrics:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if path.endswith(".prom"):
+            text = prometheus_text(metrics)
+        else:
+            now, pid = time.time(), os.getpid()
+            snapshot = [json.dumps({"time": now, "pid": pid, **metric}) + "\n" for metric in metrics]
+            text = "".join(line for lines in _kept_snapshots(path) for line in lines) + "".join(snapshot)
+        # Written next to the file and renamed, so a reader never sees half of it
+        with open(path + ".tmp", "w") as f:
+            f.write(text)
+        os.replace(path + ".tmp", path)
+
+
+# The last METRICS_KEEP - 1 snapshots already in a JSON lines file, each a list
+# of its lines, so the file holds METRICS_KEEP with the one being written
+def _kept_snapshots(path):
+    snapshots = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                snapshots.setdefault((record.get("time"), record.get("pid")), []).append(line)
+    except FileNotFoundError:
+        return []
+    return list(snapshots.values())[-(METRICS_KEEP - 1):] if METRICS_KEEP > 1 else []
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# The metrics as a Prometheus summary, in the text exposition format
+def prometheus_text(metrics):
+    lines = [
+        f"# HELP tracker_rerun_stage_seconds Seconds per page rerun spent in each stage "
+        f"(quantiles over the last {METRICS_WINDOW} reruns)",
+        "# TYPE tracker_rerun_stage_seconds summary",
+    ]
+    for metric in metrics:
+        labels = f'page="{_label(metric["page"])}",stage="{_label(metric["stage"])}"'
+        lines += [
+            f'tracker_rerun_stage_seconds{{{labels},quantile="0.5"}} {metric["p50"]:.6f}',
+            f'tracker_rerun_stage_seconds{{{labels},quantile="0.95"}} {metric["p95"]:.6f}',
+            f"tracker_rerun_stage_seconds_sum{{{labels}}} {metric['sum']:.6f}",
+            f"tracker_rerun_stage_seconds_count{{{labels}}} {metric['count']}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+# The last reruns' timings are written out when the process stops
+if METRICS_PATH:
+    atexit.register(export_metrics)
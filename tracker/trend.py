@@ -0,0 +1,119 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from tracker.ingest import load_weights_versioned
+from tracker.schema import labels
+from tracker.timing import span
+
+# Weight trends for every user at once.
+# The weigh-ins are sorted by (user, timestamp) once, then smoothed with a
+# rolling median (drops one-off spikes) followed by an EWMA, both as grouped
+# kernels over all users in one call. The rate of change is a least-squares
+# slope over each user's last TREND_DAYS days, from per-user sums collected with
+# np.bincount, and the date a user reaches their target is projected from the
+# smoothed weight and that rate. Results are cached per data version.
+
+# Weigh-ins in the rolling median and the EWMA span
+MEDIAN_WINDOW = 5
+EWMA_SPAN = 7
+
+# Days before each user's last weigh-in used for the rate of change
+TREND_DAYS = 28
+
+# Projections further out than this are not shown
+MAX_PROJECTION_DAYS = 5 * 365
+
+_lock = threading.Lock()
+_trends = {}  # data version -> (smoothed weigh-ins, trend per user)
+
+
+# Weigh-ins with a user, timestamp and weight, sorted by user then time, with a Smoothed Weight column
+def smooth(weights_df):
+    rows = pd.DataFrame({
+        "Timestamp": weights_df["Timestamp"],
+        "User": labels(weights_df["User"]),
+        "Current Weight": weights_df["Current Weight"].astype("float64"),
+    })
+    rows = rows[rows["Timestamp"].notna() & rows["Current Weight"].notna() & (rows["User"] != "")]
+    rows = rows.sort_values(["User", "Timestamp"], kind="stable").reset_index(drop=True)
+    by_user = rows["User"].to_numpy()
+    median = (
+        rows["Current Weight"].groupby(by_user, sort=False)
+        .rolling(MEDIAN_WINDOW, min_periods=1).median()
+        .droplevel(0)
+    )
+    rows["Smoothed Weight"] = (
+        median.groupby(by_user, sort=False).ewm(span=EWMA_SPAN).mean().droplevel(0).sort_index()
+    )
+    return rows
+
+
+# One row per user: last weigh-in, latest smoothed weight, least-squares rate
+# over the last TREND_DAYS days (NaN with fewer than two days) and weigh-ins used
+def fit_trends(rows):
+    if rows.empty:
+        # Typed like a non-empty result, so project_targets can add dates to it
+        return pd.DataFrame({
+            "Last Weigh-in": pd.Series(dtype="datetime64[ns]"),
+            "Smoothed Weight": pd.Series(dtype=np.float64),
+            "Rate (kg/week)": pd.Series(dtype=np.float64),
+            "Weigh-ins": pd.Series(dtype=np.int64),
+        }, index=pd.Index([], name="User"))
+    codes, users = pd.factorize(rows["User"], sort=False)
+    n_users = len(users)
+    # Rows are sorted by user, so each user's last weigh-in is the row before the next user's first
+    ends = np.append(np.flatnonzero(np.diff(codes)), len(codes) - 1)
+    days = rows["Timestamp"].to_numpy(dtype="datetime64[ns]").astype(np.int64) / 86_400e9
+    x = days - days[ends][codes]
+    y = rows["Current Weight"].to_numpy()
+    window = (x >= -TREND_DAYS).astype(np.float64)
+
+    n = np.bincount(codes, weights=window, minlength=n_users)
+    sum_x = np.bincount(codes, weights=window * x, minlength=n_users)
+    sum_y = np.bincount(codes, weights=window * y, minlength=n_users)
+    sum_xy = np.bincount(codes, weights=window * x * y, minlength=n_users)
+    sum_xx = np.bincount(codes, weights=window * x * x, minlength=n_users)
+    spread = n * sum_xx - sum_x ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(spread > 1e-9 * np.maximum(n, 1) ** 2, (n * sum_xy - sum_x * sum_y) / spread, np.nan)
+
+    return pd.DataFrame({
+        "Last Weigh-in": rows["Timestamp"].to_numpy()[ends],
+        "Smoothed Weight": rows["Smoothed Weight"].to_numpy()[ends],
+        "Rate (kg/week)": slope * 7,
+        "Weigh-ins": n.astype(np.int64),
+    }, index=pd.Index(users, name="User"))
+
+
+# The trends with each user's target weight and the date the smoothed weight
+# reaches it at the current rate (NaT with no target, when moving away from it
+# or when it is more than MAX_PROJECTION_DAYS away)
+def project_targets(trends, targets):
+    projected = trends.copy()
+    target = pd.to_numeric(projected.index.map(lambda user: targets.get(user)), errors="coerce")
+    projected["Target Weight"] = np.asarray(target, dtype=np.float64)
+    remaining = projected["Target Weight"] - projected["Smoothed Weight"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        days = remaining / (projected["Rate (kg/week)"] / 7)
+    reached = remaining.abs() < 0.05
+    days = days.where(reached | ((days >= 0) & (days <= MAX_PROJECTION_DAYS)))
+    days = days.where(~reached, 0.0)
+    projected["Projected Date"] = (projected["Last Weigh-in"] + pd.to_timedelta(days, unit="D")).dt.round("s")
+    return projected
+
+
+# Smoothed weigh-ins and per-user trends for the current data version, shared (not to be modified)
+def load_weight_trends():
+    weights_df, version = load_weights_versioned()
+    with _lock:
+        entry = _trends.get(version)
+    if entry is None:
+        with span("weight trend"):
+            rows = smooth(weights_df)
+            entry = (rows, fit_trends(rows))
+        with _lock:
+            _trends.clear()
+            _trends[version] = entry
+    return entry[0], entry[1], version
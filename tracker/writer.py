@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import deque
+
+from tracker.config import WRITE_LINGER, WRITE_RETRY_DELAY, WRITE_RETRY_MAX_DELAY, WRITE_MAX_ATTEMPTS
+
+# Write-behind queue for appends.
+# submit() only records the row and returns, so a button handler never waits on
+# the storage backend. A background thread waits WRITE_LINGER seconds for more
+# rows, then writes every sheet's pending rows with one append call, oldest
+# first. A failed append is retried with exponential backoff (WRITE_RETRY_DELAY
+# doubling up to WRITE_RETRY_MAX_DELAY) while the other sheets keep flushing;
+# errors that retrying can't fix (HTTP 4xx other than 408 and 429) and batches
+# that fail WRITE_MAX_ATTEMPTS times are set aside in `failed`. Set-aside
+# batches go back in the queue with the next submit, so rows held up by a longer
+# outage reach the sheet once it is back without restarting the app.
+
+# HTTP statuses worth retrying: timeouts, rate limits and server errors
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# Flushes kept for the latency figures
+LATENCY_SAMPLES = 200
+
+
+# Whether an append error may succeed on retry. Errors without an HTTP status
+# (connection resets, timeouts, a locked SQLite file) are treated as transient.
+def is_retryable(error):
+    status = getattr(getattr(error, "resp", None), "status", None)
+    return status is None or int(status) in RETRY_STATUSES
+
+
+class WriteQueue:
+
+    # write(sheet_name, rows) appends rows to a sheet and raises on failure;
+    # written(sheet_name, rows) is called after each successful append
+    def __init__(self, write, written=None, linger=WRITE_LINGER, retry_delay=WRITE_RETRY_DELAY,
+                 max_delay=WRITE_RETRY_MAX_DELAY, max_attempts=WRITE_MAX_ATTEMPTS):
+        self.write = write
+        self.written = written
+        self.linger = linger
+        self.retry_delay = retry_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.failed = []  # (sheet_name, rows, error) set aside after the last attempt
+        self._condition = threading.Condition()
+        self._pending = {}  # sheet_name -> [(submitted_at, row), ...] in submission order
+        self._retry_at = {}  # sheet_name -> (monotonic time of the next attempt, attempts so far)
+        self._in_flight = 0
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)  # seconds from submit to written, per flush
+        self._last_latency = None
+        self._stats = {"submitted": 0, "written": 0, "batches": 0, "retries": 0, "last_error": None}
+        self._thread = None
+
+    # Queue one row for a sheet, after any batches set aside earlier; returns at once
+    def submit(self, sheet_name, values):
+        now = time.monotonic()
+        with self._condition:
+            # Latest first, so each sheet gets its set-aside rows back in their old order
+            for failed_sheet, rows, _ in reversed(self.failed):
+                self._pending[failed_sheet] = [(now, row) for row in rows] + self._pending.get(failed_sheet, [])
+            self.failed = []
+            self._pending.setdefault(sheet_name, []).append((now, values))
+            self._stats["submitted"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="tracker-write-queue", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    # Block until every queued row was written or set aside; False on timeout
+    def flush(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    # Queue depth, rows set aside, counters and flush latency (seconds from submit to written)
+    def stats(self):
+        with self._condition:
+            stats = dict(self._stats)
+            stats["failed"] = sum(len(rows) for _, rows, _ in self.failed)
+            stats["depth"] = sum(len(rows) for rows in self._pending.values()) + self._in_flight
+            stats["retrying"] = len(self._retry_at)
+            stats["last_flush_seconds"] = self._last_latency
+            latencies = sorted(self._latencies)
+        stats["p50_flush_seconds"] = latencies[len(latencies) // 2] if latencies else None
+        stats["p95_flush_seconds"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None
+        return stats
+
+    # Sheets whose rows may be written now, and seconds until the next retry is due otherwise
+    def _ready(self, now):
+        ready = [sheet for sheet in self._pending if self._retry_at.get(sheet, (0, 0))[0] <= now]
+        waits = [retry_at - now for retry_at, _ in self._retry_at.values() if retry_at > now]
+        return ready, min(waits) if waits else None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                ready, wait = self._ready(time.monotonic())
+                while not ready:
+                    self._condition.wait(wait)
+                    ready, wait = self._ready(time.monotonic())
+            # Let a burst of submissions gather into one append per sheet
+            time.sleep(self.linger)
+            with self._condition:
+                ready, _ = self._ready(time.monotonic())
+                batches = [(sheet, self._pending.pop(sheet)) for sheet in ready]
+                self._in_flight = sum(len(batch) for _, batch in batches)
+            for sheet_name, batch in batches:
+                self._write_batch(sheet_name, batch)
+
+    def _write_batch(self, sheet_name, batch):
+        rows = [row for _, row in batch]
+        try:
+            self.write(sheet_name, rows)
+        except Exception as error:
+            with self._condition:
+                _, attempts = self._retry_at.pop(sheet_name, (0, 0))
+                attempts += 1
+                self._stats["last_error"] = repr(error)
+                if is_retryable(error) and attempts < self.max_attempts:
+                    # Back in front of anything submitted meanwhile, to keep the sheet's row order
+                    self._pending[sheet_name] = batch + self._pending.get(sheet_name, [])
+                    delay = min(self.retry_delay * 2 ** (attempts - 1), self.max_delay)
+                    self._retry_at[sheet_name] = (time.monotonic() + delay, attempts)
+                    self._stats["retries"] += 1
+                else:
+                    self.failed.append((sheet_name, rows, error))
+                self._in_flight -= len(batch)
+                self._condition.notify_all()
+            return
+
+        now = time.monotonic()
+        if self.written is not None:
+            # The rows are in the sheet by now, so a failing callback must not cause a retry
+            try:
+                self.written(sheet_name, rows)
+            except Exception as error:
+                with self._condition:
+                    self._stats["last_error"] = repr(error)
+        with self._condition:
+            self._retry_at.pop(sheet_name, None)
+            self._stats["written"] += len(rows)
+            self._stats["batches"] += 1
+            self._last_latency = now - batch[0][0]
+            self._latencies.append(self._last_latency)
+            self._in_flight -= len(batch)
+            self._condition.notify_all()